@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетная выгрузка отчётов по участкам молодняков без интерфейса.
+
+Итоги считаются тем же кодом, что и в экране молодняков
+(core/molodniki_reports.py); участки обрабатываются параллельно в пуле
+процессов.
+
+Примеры:
+  python batch_reports.py                        # все участки из forest_data.db
+  python batch_reports.py 12 15 17               # только перечисленные участки
+  python batch_reports.py --json-dir reports     # из выгруженных JSON
+  python batch_reports.py --formats excel,pdf --workers 8 --out reports/season
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.database import DB_NAME, get_connection, close_all
+from core.dirty_rows import DirtyRowTracker
+from core.molodniki_reports import MolodnikiReports, default_project_data
+from core.molodniki_storage import MolodnikiStorage
+from core.plot_store import PlotStore
+
+
+FORMATS = {
+    'json': 'save_to_json',
+    'excel': 'save_to_excel_without_dialog',
+    'word': 'save_to_word_without_dialog',
+    'pdf': 'save_to_pdf_without_dialog',
+}
+# Форматы, которым передаются уже посчитанные итоги
+TOTALS_FORMATS = ('json', 'pdf')
+
+
+class HeadlessSection(MolodnikiStorage, MolodnikiReports):
+    """Данные одного участка для расчёта итогов и выгрузки без экрана"""
+
+    def __init__(self, section, page_data=None, radius='5.64', quarter='', plot='', forestry='',
+                 project_data=None, reports_dir='reports', db_path=DB_NAME):
+        self.db_name = db_path
+        self.current_section = section
+        self.current_radius = radius or '5.64'
+        self.plot_area_input = ''
+        self.current_quarter = quarter or ''
+        self.current_plot = plot or ''
+        self.current_forestry = forestry or ''
+        self.project_data = project_data or default_project_data()
+        self.reports_dir = reports_dir
+        self.page_data = page_data or {}
+        self.current_page = min(self.page_data) if self.page_data else 0
+        self.plot_store = PlotStore()
+        self.plot_store.rebuild(self.page_data)
+        self.dirty_rows = DirtyRowTracker()
+
+    def load_page_data(self):
+        pass
+
+    def show_success(self, message):
+        pass
+
+    def show_error(self, message):
+        print(f"{self.current_section}: {message}")
+
+
+def list_sections(db_path=DB_NAME):
+    """Участки, для которых в базе есть строки молодняков"""
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('SELECT DISTINCT section_name FROM molodniki_data ORDER BY section_name')
+    return [name for (name,) in cursor if name]
+
+
+def load_section(section, db_path=DB_NAME, reports_dir='reports'):
+    """Участок из базы тем же кодом, что и в экране (load_existing_data)"""
+    headless = HeadlessSection(section, reports_dir=reports_dir, db_path=db_path)
+    headless.load_existing_data()
+    return headless
+
+
+def load_section_json(path, reports_dir='reports'):
+    """Участок из JSON, сохранённого кнопкой «Сохранить все форматы»"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # Ключи страниц в JSON стали строками
+    page_data = {int(page): rows for page, rows in data['page_data'].items()}
+    return HeadlessSection(data.get('section', ''), page_data,
+                           radius=data.get('radius'), quarter=data.get('quarter'),
+                           plot=data.get('plot'), forestry=data.get('forestry'),
+                           project_data=data.get('project_data'), reports_dir=reports_dir)
+
+
+def find_json_exports(json_dir):
+    """Последний по времени JSON молодняков для каждого участка в json_dir"""
+    latest = {}
+    for path in glob.glob(os.path.join(json_dir, '*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, dict) or 'page_data' not in data or 'project_data' not in data:
+            continue
+        section = data.get('section', '')
+        mtime = os.path.getmtime(path)
+        if section not in latest or latest[section][0] < mtime:
+            latest[section] = (mtime, path)
+    return {section: path for section, (_, path) in sorted(latest.items())}
+
+
+def export_section(source, formats, reports_dir, db_path=DB_NAME):
+    """Выгрузить один участок; выполняется в дочернем процессе.
+
+    source — ('db', имя участка) или ('json', путь к файлу).
+    Возвращает (участок, [(result, error), ...]).
+    """
+    kind, value = source
+    if kind == 'json':
+        section = load_section_json(value, reports_dir)
+    else:
+        section = load_section(value, db_path, reports_dir)
+    total_data = section.get_total_data_from_db()
+
+    outcomes = []
+    for fmt in formats:
+        method = getattr(section, FORMATS[fmt])
+        if fmt in TOTALS_FORMATS:
+            outcomes.append(method(total_data=total_data))
+        else:
+            outcomes.append(method())
+    return section.current_section, outcomes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетная выгрузка отчётов по участкам молодняков')
+    parser.add_argument('sections', nargs='*', help='участки (по умолчанию все)')
+    parser.add_argument('--db', default=DB_NAME, help='файл базы (по умолчанию %(default)s)')
+    parser.add_argument('--json-dir', help='брать участки из JSON-выгрузок в этой папке, а не из базы')
+    parser.add_argument('--out', default='reports', help='папка для отчётов (по умолчанию %(default)s)')
+    parser.add_argument('--formats', default='json,excel,word,pdf',
+                        help='через запятую: ' + ', '.join(FORMATS) + ' (по умолчанию все)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='число процессов (по умолчанию по числу ядер)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        print(f"Неизвестные форматы: {', '.join(unknown)}")
+        return 2
+
+    if args.json_dir:
+        exports = find_json_exports(args.json_dir)
+        names = args.sections or list(exports)
+        sources = [('json', exports[name]) for name in names if name in exports]
+        missing = [name for name in names if name not in exports]
+    else:
+        available = list_sections(args.db)
+        names = args.sections or available
+        sources = [('db', name) for name in names if name in available]
+        missing = [name for name in names if name not in available]
+        # Дочерние процессы открывают свои соединения
+        close_all()
+
+    for name in missing:
+        print(f"Участок не найден: {name}")
+    if not sources:
+        print("Нет участков для выгрузки")
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(export_section, source, formats, args.out, args.db): source
+                   for source in sources}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                section, outcomes = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(sources)}] {futures[future][1]}: ошибка: {e}")
+                continue
+            errors = [error for _, error in outcomes if error]
+            results = [result for result, _ in outcomes if result]
+            if errors:
+                failed += 1
+            print(f"[{done}/{len(sources)}] {section}: {', '.join(results) or '-'}")
+            for error in errors:
+                print(f"    {error}")
+
+    print(f"Готово: {len(sources) - failed} из {len(sources)} участков за {time.perf_counter() - started:.1f} с")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сравнение скалярного и векторного API core/forest_calculator.
+
+Запуск: python benchmarks/bench_forest_calculator.py [кол-во строк]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core import forest_calculator as fc
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(rows=100_000):
+    rnd = random.Random(42)
+    radius = [rnd.choice([1.78, 2.52, 3.99, 5.64]) for _ in range(rows)]
+    count = [rnd.randint(0, 60) for _ in range(rows)]
+    diameter = [rnd.uniform(0.5, 30) for _ in range(rows)]
+    height = [rnd.uniform(0.3, 25) for _ in range(rows)]
+    target = [rnd.uniform(500, 5000) for _ in range(rows)]
+    coef_c = [rnd.uniform(0.5, 5) for _ in range(rows)]
+    coef_b = [rnd.uniform(0.1, 2) for _ in range(rows)]
+
+    radius_a, count_a = np.array(radius), np.array(count)
+    diameter_a, height_a, target_a = np.array(diameter), np.array(height), np.array(target)
+    coef_c_a, coef_b_a = np.array(coef_c), np.array(coef_b)
+
+    density_a = fc.calculate_density_array(radius_a, count_a)
+    density = density_a.tolist()
+
+    cases = [
+        ('area_ha',
+         lambda: [fc.calculate_area_ha(r) for r in radius],
+         lambda: fc.calculate_area_ha_array(radius_a)),
+        ('density',
+         lambda: [fc.calculate_density(r, n) for r, n in zip(radius, count)],
+         lambda: fc.calculate_density_array(radius_a, count_a)),
+        ('stock',
+         lambda: [fc.calculate_stock(d, h, g) for d, h, g in zip(diameter, height, density)],
+         lambda: fc.calculate_stock_array(diameter_a, height_a, density_a)),
+        ('intensity',
+         lambda: [fc.calculate_intensity(g, t) for g, t in zip(density, target)],
+         lambda: fc.calculate_intensity_array(density_a, target_a)),
+        ('basal_area',
+         lambda: fc.calculate_basal_area(diameter),
+         lambda: fc.calculate_basal_area_array(diameter_a)),
+        ('michaelis',
+         lambda: [fc.calculate_michaelis_formula(c, b, d) for c, b, d in zip(coef_c, coef_b, diameter)],
+         lambda: fc.calculate_michaelis_formula_array(coef_c_a, coef_b_a, diameter_a)),
+    ]
+
+    print(f"Строк: {rows}")
+    print(f"{'функция':<12} {'скаляр, мс':>12} {'numpy, мс':>12} {'ускорение':>10}")
+    for name, scalar, vector in cases:
+        expected, scalar_time = timed(scalar)
+        actual, vector_time = timed(vector)
+        assert np.allclose(expected, actual), name
+        speedup = scalar_time / vector_time if vector_time > 0 else float('inf')
+        print(f"{name:<12} {scalar_time * 1000:>12.1f} {vector_time * 1000:>12.1f} {speedup:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк участка молодняков на синтетических данных.
+
+Генерирует участки из N страниц по M площадок с K породами на площадку
+(JSON столбца «Порода», как его пишет окно ввода пород) и замеряет
+сохранение и загрузку страниц, расчёт итогов, экспорт JSON/Excel/Word и
+create_backup на нескольких размерах. Перед замерами густота пород из
+molodniki_breed_stats сверяется с «Итого» при радиусе участка, отличном
+от 5.64. Результаты пишутся в JSON, чтобы сравнивать версии: --compare
+старый.json показывает изменения и завершает работу с кодом 1, если
+что-то замедлилось сильнее --threshold.
+
+Запуск: python benchmarks/bench_molodniki.py [--sizes 5x30x2,20x30x3] [--repeat 3]
+                                              [--out results.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from batch_reports import HeadlessSection
+from core.backup_tools import create_backup
+from core.database import close_all
+from core.molodniki_breeds import section_breed_stats
+from core.plot_geo import nearest_plots
+
+
+DEFAULT_SIZES = '5x30x2,20x30x3,100x30x3'
+# Не 5.64: check_breed_density проверяет, что радиус участка доходит до SQL
+RADIUSES = ['1.78', '2.52', '3.99']
+FOREST_TYPES = ['Сосняк черничный', 'Ельник кисличный', 'Березняк разнотравный', '']
+CONIFEROUS = ['Сосна', 'Ель', 'Пихта', 'Кедр', 'Лиственница']
+DECIDUOUS = ['Берёза', 'Осина', 'Ольха серая', 'Ива']
+
+
+def generate_breed(rnd):
+    if rnd.random() < 0.5:
+        return {
+            'name': rnd.choice(CONIFEROUS),
+            'type': 'coniferous',
+            'do_05': rnd.randint(0, 6),
+            '05_15': rnd.randint(0, 6),
+            'bolee_15': rnd.randint(0, 4),
+            'height': round(rnd.uniform(0.3, 3.5), 1),
+            'diameter': round(rnd.uniform(0.5, 4), 1),
+            'age': rnd.randint(3, 20),
+        }
+    return {
+        'name': rnd.choice(DECIDUOUS),
+        'type': 'deciduous',
+        'density': rnd.randint(1, 15),
+        'height': round(rnd.uniform(0.5, 6), 1),
+        'diameter': round(rnd.uniform(0.5, 6), 1),
+        'age': rnd.randint(3, 20),
+    }
+
+
+def generate_page_data(pages, plots, breeds, seed=42):
+    """page_data участка: pages страниц по plots площадок с breeds породами"""
+    rnd = random.Random(seed)
+    page_data = {}
+    nn = 0
+    for page in range(1, pages + 1):
+        rows = []
+        for _ in range(plots):
+            nn += 1
+            poroda = [generate_breed(rnd) for _ in range(breeds)]
+            care = f"{rnd.randint(1, 4)}С{rnd.randint(1, 3)}Б" if rnd.random() < 0.6 else ''
+            rows.append([
+                str(nn),
+                f"{rnd.uniform(55, 60):.5f}, {rnd.uniform(35, 45):.5f}",
+                care,
+                json.dumps(poroda, ensure_ascii=False),
+                '',
+                rnd.choice(FOREST_TYPES),
+            ])
+        page_data[page] = rows
+    return page_data
+
+
+def timed(func, setup=None, repeat=3):
+    """Время func(*setup()) за repeat запусков; setup в замер не входит"""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(*args)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def check_breed_density(section):
+    """Густота пород в molodniki_breed_stats должна совпадать с «Итого»"""
+    expected = {breed['name']: breed['density'] for breed in section.get_total_data_from_db()['breeds']}
+    actual = {row['breed_name']: row['avg_density_ha']
+              for row in section_breed_stats(section.current_section, section.db_name)}
+    for name, density in expected.items():
+        if abs(actual.get(name, 0.0) - density) > 1e-6 * max(density, 1.0):
+            raise RuntimeError(f"густота {name} при радиусе {section.current_radius}: "
+                               f"SQL {actual.get(name, 0.0):.1f}, «Итого» {density:.1f}")
+
+
+def run_size(pages, plots, breeds, repeat, workdir):
+    page_data = generate_page_data(pages, plots, breeds)
+    radius = random.Random(pages * plots * breeds).choice(RADIUSES)
+    reports_dir = os.path.join(workdir, 'reports')
+    os.makedirs(reports_dir, exist_ok=True)
+    counter = iter(range(1_000_000))
+
+    def fresh_section():
+        """Новый участок в новой базе, данные ещё не сохранены"""
+        db_path = os.path.join(workdir, f'bench_{next(counter)}.db')
+        section = HeadlessSection('bench', {page: [list(row) for row in rows] for page, rows in page_data.items()},
+                                  radius=radius, reports_dir=reports_dir, db_path=db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            section.setup_database()
+        section.save_settings_to_db()
+        return (section,)
+
+    def save_all_pages(section):
+        for page in sorted(section.page_data):
+            section.current_page = page
+            section.save_current_page()
+
+    saved = fresh_section()[0]
+    save_all_pages(saved)
+
+    def edited_section():
+        # Одна изменённая строка на текущей странице
+        saved.current_page = 1
+        row = saved.page_data[1][0]
+        row[4] = 'x' if row[4] != 'x' else 'y'
+        return (saved,)
+
+    def loaded_section():
+        section = HeadlessSection('bench', reports_dir=reports_dir, db_path=saved.db_name)
+        section.load_existing_data()
+        return (section,)
+
+    loaded = loaded_section()[0]
+    check_breed_density(loaded)
+    backup_dir = os.path.join(workdir, 'backups')
+
+    benchmarks = {
+        'save_current_page (все страницы, первая запись)': (save_all_pages, fresh_section),
+        'save_current_page (одна изменённая строка)': (lambda s: s.save_current_page(), edited_section),
+        'load_existing_data': (lambda s: s.load_existing_data(),
+                               lambda: (HeadlessSection('bench', reports_dir=reports_dir, db_path=saved.db_name),)),
+        'calculate_section_totals': (lambda s: s.calculate_section_totals(), lambda: (loaded,)),
+        'get_total_data_from_db': (lambda s: s.get_total_data_from_db(), lambda: (loaded,)),
+        'section_breed_stats (SQL)': (lambda: section_breed_stats('bench', saved.db_name), None),
+        'nearest_plots (R-tree)': (lambda: nearest_plots(57.5, 40.0, k=10, db_path=saved.db_name), None),
+        'save_to_json': (lambda s: check(s.save_to_json()), lambda: (loaded,)),
+        'save_to_excel_without_dialog': (lambda s: check(s.save_to_excel_without_dialog()), lambda: (loaded,)),
+        'save_to_word_without_dialog': (lambda s: check(s.save_to_word_without_dialog()), lambda: (loaded,)),
+        'create_backup': (lambda: create_backup(saved.db_name, backup_dir), None),
+    }
+
+    results = []
+    for name, (func, setup) in benchmarks.items():
+        try:
+            times = timed(func, setup, repeat)
+        except Exception as e:
+            results.append({'benchmark': name, 'error': str(e)})
+            print(f"  {name:<50} ошибка: {e}")
+            continue
+        results.append({
+            'benchmark': name,
+            'min_s': min(times),
+            'median_s': statistics.median(times),
+            'runs': times,
+        })
+        print(f"  {name:<50} {min(times) * 1000:10.1f} мс (медиана {statistics.median(times) * 1000:.1f})")
+    return results
+
+
+def check(outcome):
+    """Экспорт возвращает (result, error); ошибка должна прервать замер"""
+    result, error = outcome
+    if error:
+        raise RuntimeError(error)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, old_path, threshold):
+    """Сравнить min_s с прошлым запуском; вернуть число замедлений сверх threshold"""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    previous = {(r['size'], r['benchmark']): r['min_s'] for r in old['results'] if 'min_s' in r}
+    slower = 0
+    print(f"\nСравнение с {old_path} ({old['meta'].get('revision')}):")
+    for r in results:
+        before = previous.get((r['size'], r['benchmark']))
+        if before is None or 'min_s' not in r or before <= 0:
+            continue
+        ratio = r['min_s'] / before
+        mark = ''
+        if ratio > threshold:
+            mark = '  <-- замедление'
+            slower += 1
+        print(f"  {r['size']:<10} {r['benchmark']:<50} x{ratio:5.2f}{mark}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк участка молодняков')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='размеры СТРАНИЦxПЛОЩАДОКxПОРОД через запятую (по умолчанию %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='запусков на замер (по умолчанию %(default)s)')
+    parser.add_argument('--out', default='bench_molodniki.json', help='файл результатов (по умолчанию %(default)s)')
+    parser.add_argument('--compare', help='прошлый файл результатов для сравнения')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='допустимое замедление при --compare (по умолчанию x%(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = [tuple(int(n) for n in size.split('x')) for size in args.sizes.split(',') if size]
+    results = []
+    for pages, plots, breeds in sizes:
+        size = f'{pages}x{plots}x{breeds}'
+        print(f"Участок {size}: {pages * plots} площадок, {pages * plots * breeds} пород")
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                for result in run_size(pages, plots, breeds, args.repeat, workdir):
+                    result['size'] = size
+                    results.append(result)
+            finally:
+                close_all()
+
+    data = {
+        'meta': {
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты: {args.out}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
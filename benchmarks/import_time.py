@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Время импорта модулей приложения (python -X importtime).
+
+Каждый модуль импортируется в отдельном процессе. Для него выводится
+общее время импорта, самые медленные зависимости и тяжёлые модули
+(pandas, openpyxl, python-docx, reportlab, ...), попавшие в импорт при
+запуске. Если тяжёлый модуль загружается модулем из STARTUP_MODULES,
+скрипт завершается с кодом 1.
+
+Запуск: python benchmarks/import_time.py [модуль ...] [--json файл]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.lazy import HEAVY_MODULES
+
+
+# Модули, которые загружаются до показа главного меню
+STARTUP_MODULES = [
+    'core.database',
+    'core.suggestions',
+    'core.export_jobs',
+    'core.plot_store',
+    'core.dirty_rows',
+    'core.molodniki_reports',
+    'screens.table_screen',
+    'screens.dashboard_screen',
+    'screens.map_screen',
+    'molodniki_extended',
+    'main_modern',
+]
+TOP_DEPENDENCIES = 5
+
+
+def measure(module):
+    """Разобрать вывод -X importtime для import module"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, capture_output=True, text=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    # Всё до site загружает сам интерпретатор при старте
+    site = [i for i, (name, _, _) in enumerate(entries) if name == 'site']
+    if site:
+        entries = entries[site[-1] + 1:]
+
+    result = {'module': module, 'ok': proc.returncode == 0}
+    if not result['ok']:
+        result['error'] = (proc.stderr.strip().splitlines() or ['?'])[-1]
+        return result
+    names = {name for name, _, _ in entries}
+    result['total_ms'] = next((cum for name, _, cum in entries if name == module), 0) / 1000
+    result['slowest'] = [(name, self_us / 1000) for name, self_us, _ in
+                         sorted(entries, key=lambda e: e[1], reverse=True)[:TOP_DEPENDENCIES]]
+    result['heavy'] = [name for name in HEAVY_MODULES if name in names]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Время импорта модулей приложения')
+    parser.add_argument('modules', nargs='*', help='модули (по умолчанию STARTUP_MODULES)')
+    parser.add_argument('--json', help='записать результаты в JSON-файл')
+    args = parser.parse_args(argv)
+
+    results = [measure(module) for module in args.modules or STARTUP_MODULES]
+    regressions = 0
+    for result in results:
+        if not result['ok']:
+            print(f"{result['module']:<28} не импортируется: {result['error']}")
+            continue
+        print(f"{result['module']:<28} {result['total_ms']:9.1f} мс")
+        for name, ms in result['slowest']:
+            print(f"    {name:<40} {ms:8.1f} мс")
+        if result['heavy']:
+            print(f"    тяжёлые модули при импорте: {', '.join(result['heavy'])}")
+            if result['module'] in STARTUP_MODULES:
+                regressions += 1
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
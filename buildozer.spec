@@ -5,7 +5,7 @@ package.domain = org.forestcrypt
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,ttf,json,docx,xlsx
 version = 1.0.0
-requirements = python3,kivy==2.3.1,kivymd==1.2.0,pandas,openpyxl,python-docx,Pillow,sqlite3,pyjnius,android
+requirements = python3,kivy==2.3.1,kivymd==1.2.0,numpy,pandas,openpyxl,python-docx,Pillow,sqlite3,pyjnius,android
 orientation = portrait
 fullscreen = 0
 android.permissions = WRITE_EXTERNAL_STORAGE,READ_EXTERNAL_STORAGE,INTERNET
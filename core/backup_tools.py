@@ -2,18 +2,93 @@ import os
 import shutil
 import json
 import datetime
+import hashlib
 import sqlite3
+import tempfile
+import zipfile
+from core.database import get_connection, close_all, remove_wal_files
+from core.dirty_rows import reset_all as reset_dirty_rows
+from core.migrations import migrate
+from core.suggestions import reload_all as reload_suggestions
 
 
-def create_backup(db_path='forest_data.db', backup_dir='backups'):
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    backup_name = f'forestapp_backup_{timestamp}'
-    backup_path = os.path.join(backup_dir, backup_name)
-    os.makedirs(backup_path, exist_ok=True)
+SNAPSHOT_NAME = 'forest_data.db'
+METADATA_NAME = 'metadata.json'
+MANIFEST_NAME = 'pages.sha1'
+PAGES_NAME = 'pages.bin'
+# Страниц за один шаг backup API; между шагами база доступна для записи
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+DIGEST_SIZE = 20
+# Инкрементальных бекапов подряд, после которых снова делается полный
+MAX_CHAIN = 7
+CHUNK_SIZE = 1024 * 1024
+
+
+def _snapshot(db_path, target, progress=None):
+    """Согласованная копия базы через online backup API, по PAGES_PER_STEP страниц"""
+    source = get_connection(db_path)
+    dest = sqlite3.connect(target)
+    try:
+        source.backup(dest, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP)
+        page_size = dest.execute('PRAGMA page_size').fetchone()[0]
+        # Только имена: COUNT(*) читал бы каждую таблицу целиком; объём
+        # бекапа описывают page_count и changed_pages
+        tables = [name for (name,) in dest.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    finally:
+        dest.close()
+    return page_size, tables
+
+
+def _page_digests(path, page_size):
+    """SHA-1 каждой страницы файла базы"""
+    digests = []
+    with open(path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                break
+            digests.append(hashlib.sha1(page).digest())
+    return digests
 
-    if os.path.exists(db_path):
-        shutil.copy2(db_path, os.path.join(backup_path, 'forest_data.db'))
+
+def _read_metadata(zf):
+    try:
+        with zf.open(METADATA_NAME) as mf:
+            return json.load(mf)
+    except (KeyError, ValueError):
+        return {}
+
+
+def _latest_snapshot(backup_dir):
+    """Метаданные и хэши страниц последнего бекапа, если они есть"""
+    for backup in list_backups(backup_dir):
+        try:
+            with zipfile.ZipFile(backup['path']) as zf:
+                manifest = zf.read(MANIFEST_NAME)
+        except (KeyError, zipfile.BadZipFile, OSError):
+            return None
+        digests = [manifest[i:i + DIGEST_SIZE] for i in range(0, len(manifest), DIGEST_SIZE)]
+        return backup, digests
+    return None
+
+
+def create_backup(db_path='forest_data.db', backup_dir='backups', incremental=False, progress=None):
+    """Создать бекап базы в zip-архиве.
+
+    Снимок делается через sqlite3 backup API, поэтому он согласован даже
+    при одновременной записи. При incremental=True в архив попадают только
+    страницы, изменившиеся с последнего бекапа (он указывается в metadata
+    как base и нужен для восстановления); после MAX_CHAIN инкрементальных
+    бекапов подряд делается полный.
+    progress(status, remaining, total) вызывается после каждого шага копирования.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    now = datetime.datetime.now()
+    timestamp = now.strftime('%Y-%m-%d_%H-%M-%S')
+    # Микросекунды в имени: два бекапа в одну секунду не затирают друг друга
+    backup_name = f'forestapp_backup_{timestamp}-{now:%f}'
+    archive_path = os.path.join(backup_dir, f'{backup_name}.zip')
 
     metadata = {
         'app': 'ForestApp',
@@ -21,47 +96,110 @@ def create_backup(db_path='forest_data.db', backup_dir='backups'):
         'created_at': timestamp,
         'tables': [],
     }
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        for row in cursor.fetchall():
-            table = row[0]
-            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
-            count = cursor.fetchone()[0]
-            metadata['tables'].append({'name': table, 'rows': count})
-        conn.close()
-    except Exception:
-        pass
-
-    with open(os.path.join(backup_path, 'metadata.json'), 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
 
-    archive_path = os.path.join(backup_dir, f'{backup_name}.zip')
-    shutil.make_archive(backup_path, 'zip', backup_path)
-    shutil.rmtree(backup_path)
+    with tempfile.TemporaryDirectory(dir=backup_dir) as tmpdir:
+        snapshot_path = os.path.join(tmpdir, SNAPSHOT_NAME)
+        page_size, metadata['tables'] = _snapshot(db_path, snapshot_path, progress)
+        digests = _page_digests(snapshot_path, page_size)
+        metadata['page_size'] = page_size
+        metadata['page_count'] = len(digests)
+
+        previous = _latest_snapshot(backup_dir) if incremental else None
+        if previous:
+            previous_meta = previous[0]['metadata']
+            if previous_meta.get('page_size') != page_size or previous_meta.get('chain', 0) >= MAX_CHAIN:
+                previous = None
+            elif os.path.abspath(previous[0]['path']) == os.path.abspath(archive_path):
+                # Архив не может быть базой самому себе
+                previous = None
+
+        # 'x': существующий архив не перезаписывается
+        with zipfile.ZipFile(archive_path, 'x', compression=zipfile.ZIP_DEFLATED) as zf:
+            if previous:
+                base, base_digests = previous
+                metadata['base'] = base['name']
+                metadata['chain'] = base['metadata'].get('chain', 0) + 1
+                changed = 0
+                with open(snapshot_path, 'rb') as src, \
+                        zf.open(PAGES_NAME, 'w', force_zip64=True) as pages:
+                    for page_no, digest in enumerate(digests):
+                        if page_no < len(base_digests) and base_digests[page_no] == digest:
+                            continue
+                        src.seek(page_no * page_size)
+                        pages.write(page_no.to_bytes(4, 'big'))
+                        pages.write(src.read(page_size))
+                        changed += 1
+                metadata['changed_pages'] = changed
+            else:
+                zf.write(snapshot_path, SNAPSHOT_NAME)
+            zf.writestr(MANIFEST_NAME, b''.join(digests))
+            zf.writestr(METADATA_NAME, json.dumps(metadata, ensure_ascii=False, indent=2))
     return archive_path
 
 
-def restore_backup(zip_path, db_path='forest_data.db'):
-    import tempfile
-    import zipfile
+def _backup_chain(zip_path):
+    """Архивы, из которых собирается бекап: полный первым, zip_path последним"""
+    chain = []
+    seen = set()
+    path = zip_path
+    while True:
+        real_path = os.path.realpath(path)
+        if real_path in seen:
+            raise ValueError(f'Цикл в цепочке бекапов: {os.path.basename(path)}')
+        seen.add(real_path)
+        with zipfile.ZipFile(path, 'r') as zf:
+            metadata = _read_metadata(zf)
+        chain.append((path, metadata))
+        base = metadata.get('base')
+        if not base:
+            return chain[::-1]
+        path = os.path.join(os.path.dirname(zip_path), base)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Не найден базовый бекап {base}')
 
-    with zipfile.ZipFile(zip_path, 'r') as zf:
+
+def _materialize(zip_path, target):
+    """Собрать файл базы из бекапа; инкрементальные накладываются на свою base"""
+    (full_path, _), *increments = _backup_chain(zip_path)
+    with zipfile.ZipFile(full_path, 'r') as zf:
         backup_db = None
         for name in zf.namelist():
-            if name.endswith('forest_data.db'):
+            if name.endswith(SNAPSHOT_NAME):
                 backup_db = name
                 break
         if not backup_db:
             raise FileNotFoundError('В архиве не найден forest_data.db')
+        with zf.open(backup_db) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    for path, metadata in increments:
+        page_size = metadata['page_size']
+        with zipfile.ZipFile(path, 'r') as zf, \
+                zf.open(PAGES_NAME) as pages, open(target, 'r+b') as dst:
+            while True:
+                header = pages.read(4)
+                if not header:
+                    break
+                dst.seek(int.from_bytes(header, 'big') * page_size)
+                dst.write(pages.read(page_size))
+            dst.truncate(metadata['page_count'] * page_size)
+
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            zf.extract(backup_db, tmpdir)
-            src = os.path.join(tmpdir, backup_db)
-            if os.path.exists(db_path):
-                os.replace(db_path, db_path + '.bak')
-            shutil.copy2(src, db_path)
+def restore_backup(zip_path, db_path='forest_data.db'):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = os.path.join(tmpdir, SNAPSHOT_NAME)
+        _materialize(zip_path, src)
+        # Открытые соединения и журнал WAL относятся к старой базе
+        close_all()
+        remove_wal_files(db_path)
+        if os.path.exists(db_path):
+            os.replace(db_path, db_path + '.bak')
+        shutil.copy2(src, db_path)
+    # Копия могла быть сделана до последних изменений схемы
+    migrate(db_path)
+    reload_suggestions()
+    # id строк в dirty_rows относятся к старой базе
+    reset_dirty_rows()
     return True
 
 
@@ -88,6 +226,12 @@ def list_backups(backup_dir='backups'):
                         meta = json.load(mf)
                 except Exception:
                     pass
+            else:
+                try:
+                    with zipfile.ZipFile(full_path) as zf:
+                        meta = _read_metadata(zf)
+                except (zipfile.BadZipFile, OSError):
+                    pass
 
             backups.append({
                 'path': full_path,
@@ -1,6 +1,7 @@
 from kivy.uix.screenmanager import Screen
 from kivy.properties import NumericProperty, BooleanProperty, ListProperty, StringProperty
-import sqlite3
+from core.database import get_connection
+from core.migrations import migrate
 import os
 
 class BaseTableScreen(Screen):
@@ -22,7 +23,9 @@ class BaseTableScreen(Screen):
         self.setup_database()
         
     def setup_database(self):
-        conn = sqlite3.connect(self.db_name)
+        migrate(self.db_name)
+        # Таблица шаблона задаётся экраном, в общую схему она не входит
+        conn = get_connection(self.db_name)
         cursor = conn.cursor()
         cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self.table_name} (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
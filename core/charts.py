@@ -0,0 +1,152 @@
+"""
+Графики дашборда в фоновом потоке.
+
+ChartRenderer рисует фигуры matplotlib (Figure + Agg, без pyplot) в
+отдельном потоке и отдаёт PNG в UI-поток через Clock. Готовые PNG
+хранятся по хэшу входных данных, поэтому пока статистика не меняется,
+график не перерисовывается. matplotlib импортируется при первом
+построении графика, а не при загрузке дашборда.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+STYLE = {
+    'font.family': 'DejaVu Sans',
+    'figure.facecolor': '#1e1e1e',
+    'axes.facecolor': '#2d2d2d',
+    'axes.edgecolor': '#555555',
+    'axes.labelcolor': '#cccccc',
+    'xtick.color': '#cccccc',
+    'ytick.color': '#cccccc',
+    'text.color': '#ffffff',
+}
+CACHE_SIZE = 16
+DPI = 100
+
+
+def _schedule_on_ui(callback, *args):
+    from kivy.clock import Clock
+    Clock.schedule_once(lambda dt: callback(*args), 0)
+
+
+def chart_key(kind, data):
+    """Ключ кэша: вид графика и хэш его данных"""
+    payload = json.dumps([kind, data], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _figure(width, height):
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    matplotlib.rcParams.update(STYLE)
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI, bbox_inches='tight', facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+
+def render_species_pie(species_counts):
+    from matplotlib import cm
+    fig = _figure(4, 3)
+    ax = fig.add_subplot()
+    species = list(species_counts.keys())
+    counts = list(species_counts.values())
+    colors = cm.Set3([i / len(species) for i in range(len(species))])
+    wedges, texts, autotexts = ax.pie(
+        counts, labels=None, autopct='%1.0f%%',
+        colors=colors, startangle=90,
+        textprops={'color': 'white', 'fontsize': 8},
+    )
+    ax.legend(wedges, [f'{s} ({c})' for s, c in zip(species, counts)],
+              loc='lower center', bbox_to_anchor=(0.5, -0.15),
+              ncol=2, fontsize=7, frameon=False, labelcolor='white')
+    ax.set_title('Распределение пород', color='white', fontsize=11, pad=10)
+    return _png(fig)
+
+
+def render_histogram(histogram, width, color, xlabel, title):
+    """Гистограмма из готовых корзин {начало: количество}"""
+    fig = _figure(4, 2.5)
+    ax = fig.add_subplot()
+    buckets = sorted(histogram.items(), key=lambda item: float(item[0]))
+    ax.bar([float(start) for start, _ in buckets], [count for _, count in buckets],
+           width=width, align='edge', color=color, edgecolor='white', alpha=0.8)
+    ax.set_xlabel(xlabel, color='#cccccc', fontsize=9)
+    ax.set_ylabel('Количество', color='#cccccc', fontsize=9)
+    ax.set_title(title, color='white', fontsize=11)
+    ax.tick_params(labelsize=8)
+    return _png(fig)
+
+
+class ChartRenderer:
+    """Очередь построения графиков с кэшем PNG по ключу данных.
+
+    submit(key, render, on_ready) вызывает on_ready(key, png) в UI-потоке:
+    сразу, если PNG уже в кэше, иначе после построения в фоне.
+    Ошибка построения передаётся как png=None.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, schedule=_schedule_on_ui):
+        self.cache_size = cache_size
+        self.schedule = schedule
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Один поток: matplotlib не рассчитан на параллельное рисование
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+
+    def cached(self, key):
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+            return png
+
+    def submit(self, key, render, on_ready):
+        png = self.cached(key)
+        if png is not None:
+            on_ready(key, png)
+            return
+        with self._lock:
+            # Тот же график уже строится — просто дождаться его
+            if key in self._pending:
+                self._pending[key].append(on_ready)
+                return
+            self._pending[key] = [on_ready]
+        self._executor.submit(self._run, key, render)
+
+    def _run(self, key, render):
+        try:
+            png = render()
+        except Exception as e:
+            print(f"[charts] ошибка построения графика: {e}")
+            png = None
+        with self._lock:
+            if png is not None:
+                self._cache[key] = png
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            self.schedule(callback, key, png)
+
+
+_renderer = None
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer
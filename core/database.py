@@ -0,0 +1,103 @@
+"""
+Общее подключение к базе данных приложения.
+
+Каждый поток получает одно долгоживущее соединение с forest_data.db
+(WAL, настроенные PRAGMA, кэш подготовленных выражений), поэтому
+открытие и закрытие базы не повторяется в каждом методе, а фоновый
+экспорт может читать, пока интерфейс пишет.
+"""
+import os
+import sqlite3
+import threading
+import weakref
+
+
+DB_NAME = 'forest_data.db'
+
+# Размер кэша подготовленных выражений на соединение
+CACHED_STATEMENTS = 256
+
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -8000),  # ~8 МБ страниц в памяти
+    ('busy_timeout', 5000),
+)
+
+
+class SharedConnection(sqlite3.Connection):
+    """Соединение, которое переживает close() в вызывающем коде.
+
+    close() не закрывает базу, а лишь откатывает незафиксированную
+    транзакцию — так же, как это происходило при настоящем закрытии.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+
+_local = threading.local()
+_lock = threading.Lock()
+# Слабые ссылки: соединение завершившегося потока закрывается сборщиком мусора
+_connections = weakref.WeakSet()
+_generation = 0
+
+
+def _open(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=5.0,
+        factory=SharedConnection,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=False,
+    )
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+
+def get_connection(db_path=DB_NAME):
+    """Соединение текущего потока с базой db_path (создаётся при первом обращении)"""
+    key = os.path.abspath(db_path)
+    if getattr(_local, 'generation', None) != _generation:
+        _local.connections = {}
+        _local.generation = _generation
+    conn = _local.connections.get(key)
+    if conn is None:
+        conn = _open(db_path)
+        _local.connections[key] = conn
+        with _lock:
+            _connections.add(conn)
+    return conn
+
+
+def close_all():
+    """Закрыть соединения всех потоков (перед заменой файла базы)"""
+    global _generation
+    with _lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+    for conn in connections:
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+
+
+def checkpoint(db_path=DB_NAME):
+    """Перенести журнал WAL в основной файл базы"""
+    get_connection(db_path).execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def remove_wal_files(db_path=DB_NAME):
+    """Удалить файлы -wal/-shm, оставшиеся от закрытой базы"""
+    for suffix in ('-wal', '-shm'):
+        path = db_path + suffix
+        if os.path.exists(path):
+            os.remove(path)
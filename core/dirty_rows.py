@@ -0,0 +1,74 @@
+"""
+Отслеживание изменённых строк page_data относительно базы данных.
+
+Для каждой сохранённой строки хранится её id в molodniki_data и
+значения ячеек на момент сохранения; при сохранении страницы в базу
+пишутся только строки, которые отличаются от сохранённых.
+
+Состояние годится, только пока page_data и база не заменены целиком:
+после загрузки участка из JSON или Excel и после восстановления бекапа
+(reset_all) трекер сбрасывается, и страница при сохранении читается из
+базы заново.
+"""
+import weakref
+
+
+_trackers = weakref.WeakSet()
+
+
+class DirtyRowTracker:
+    """Последнее сохранённое состояние строк по ключу (участок, страница)"""
+
+    def __init__(self):
+        self._saved = {}
+        _trackers.add(self)
+
+    def reset(self):
+        self._saved.clear()
+
+    def has_page(self, section, page_num):
+        return (section, page_num) in self._saved
+
+    def load_page(self, section, page_num, saved_rows):
+        """Запомнить строки страницы, прочитанные из БД: {row_index: (id, cells)}"""
+        self._saved[(section, page_num)] = {
+            row_idx: (row_id, tuple(cells)) for row_idx, (row_id, cells) in saved_rows.items()
+        }
+
+    def diff(self, section, page_num, rows):
+        """Сравнить строки страницы с сохранёнными.
+
+        Возвращает (upserts, deletes):
+        upserts — [(row_idx, cells, row_id или None, старые cells или None)],
+        deletes — [(row_idx, row_id)] для опустевших и исчезнувших строк.
+        """
+        saved = self._saved.get((section, page_num), {})
+        upserts = []
+        deletes = []
+        for row_idx, row in enumerate(rows):
+            cells = tuple(row)
+            entry = saved.get(row_idx)
+            if not any(cells[:5]):
+                if entry is not None:
+                    deletes.append((row_idx, entry[0]))
+                continue
+            if entry is None:
+                upserts.append((row_idx, cells, None, None))
+            elif entry[1] != cells:
+                upserts.append((row_idx, cells, entry[0], entry[1]))
+        for row_idx, (row_id, _) in saved.items():
+            if row_idx >= len(rows):
+                deletes.append((row_idx, row_id))
+        return upserts, deletes
+
+    def mark_saved(self, section, page_num, row_idx, row_id, cells):
+        self._saved.setdefault((section, page_num), {})[row_idx] = (row_id, tuple(cells))
+
+    def mark_deleted(self, section, page_num, row_idx):
+        self._saved.get((section, page_num), {}).pop(row_idx, None)
+
+
+def reset_all():
+    """Сбросить все трекеры (база заменена, например, восстановлением бекапа)"""
+    for tracker in list(_trackers):
+        tracker.reset()
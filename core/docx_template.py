@@ -0,0 +1,99 @@
+"""
+Скомпилированные шаблоны DOCX для заполнения проектов ухода.
+
+Шаблон читается и разбирается один раз: запоминаются тексты всех
+абзацев (в теле документа и в ячейках таблиц) по их положению. Для
+набора плейсхолдеров вычисляется список абзацев, где они встречаются;
+при заполнении замены выполняются только в этих абзацах. Кэш
+сбрасывается при изменении mtime файла шаблона.
+"""
+import io
+import os
+import threading
+
+from docx import Document
+
+
+class CompiledTemplate:
+    """Разобранный шаблон: байты файла и тексты абзацев по положению"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.texts = {}
+        doc = self.new_document()
+        # Порядок обхода как в fill_document: сначала абзацы, затем ячейки таблиц
+        for p_idx, paragraph in enumerate(doc.paragraphs):
+            self.texts[('p', p_idx)] = paragraph.text
+        for t_idx, table in enumerate(doc.tables):
+            for r_idx, row in enumerate(table.rows):
+                for c_idx, cell in enumerate(row.cells):
+                    for p_idx, paragraph in enumerate(cell.paragraphs):
+                        self.texts[('t', t_idx, r_idx, c_idx, p_idx)] = paragraph.text
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def new_document(self):
+        """Свежий Document из байтов шаблона (без повторного чтения файла)"""
+        return Document(io.BytesIO(self.data))
+
+    def slots(self, placeholders):
+        """Положения абзацев, содержащих хотя бы один из плейсхолдеров.
+
+        Текст абзаца собирается из всех его run, поэтому находятся и
+        плейсхолдеры, разбитые Word на несколько run.
+        """
+        key = tuple(placeholders)
+        with self._lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = [location for location, text in self.texts.items()
+                         if any(placeholder in text for placeholder in key)]
+                self._slots[key] = slots
+        return slots
+
+    def apply(self, doc, replacements):
+        """Выполнить замены replacements (по порядку) в известных абзацах doc"""
+        body = None
+        rows = {}
+        for location in self.slots(replacements):
+            if location[0] == 'p':
+                if body is None:
+                    body = doc.paragraphs
+                paragraphs = body
+                p_idx = location[1]
+            else:
+                _, t_idx, r_idx, c_idx, p_idx = location
+                cells = rows.get((t_idx, r_idx))
+                if cells is None:
+                    cells = rows[(t_idx, r_idx)] = doc.tables[t_idx].rows[r_idx].cells
+                paragraphs = cells[c_idx].paragraphs
+            if p_idx >= len(paragraphs):
+                continue
+            paragraph = paragraphs[p_idx]
+            text = paragraph.text
+            matched = False
+            for old_text, new_text in replacements.items():
+                if old_text in text:
+                    text = text.replace(old_text, str(new_text))
+                    matched = True
+            if matched:
+                paragraph.text = text
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_template(path):
+    """Скомпилированный шаблон path; перечитывается при изменении файла"""
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    template = CompiledTemplate(path)
+    with _cache_lock:
+        _cache[path] = (mtime, template)
+    return template
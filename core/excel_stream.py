@@ -0,0 +1,76 @@
+"""
+Потоковая запись отчётов Excel.
+
+Листы создаются в режиме write_only: строки сразу уходят в файл, и
+память не растёт с числом записей. Ширина столбцов берётся из текущих
+максимумов длины значений. В write_only ширины пишутся в файл до первой
+строки, поэтому источник строк проходится дважды: сначала замер (хранятся
+только максимумы), затем запись.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+
+MAX_WIDTH = 50
+WIDTH_PADDING = 2
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
+
+
+def new_workbook():
+    """Пустая книга в потоковом режиме (без листа по умолчанию)"""
+    return Workbook(write_only=True)
+
+
+class StreamingSheet:
+    """Лист write_only с автоподбором ширины столбцов"""
+
+    def __init__(self, wb, title):
+        self.ws = wb.create_sheet(title)
+        self.widths = {}
+
+    def cell(self, value, font=None, fill=None):
+        """Ячейка со стилем для передачи в строке"""
+        cell = WriteOnlyCell(self.ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
+    def header(self, values):
+        """Строка заголовков: жирный шрифт и зелёная заливка"""
+        return [self.cell(value, font=HEADER_FONT, fill=HEADER_FILL) for value in values]
+
+    def merge(self, cell_range):
+        self.ws.merged_cells.add(cell_range)
+
+    def measure(self, row):
+        """Обновить максимумы длины по столбцам строки row"""
+        widths = self.widths
+        for col_num, value in enumerate(row, 1):
+            if isinstance(value, Cell):
+                value = value.value
+            if value is None:
+                continue
+            length = len(str(value))
+            if length > widths.get(col_num, 0):
+                widths[col_num] = length
+
+    def write(self, rows):
+        """Записать строки на лист.
+
+        rows — список строк или функция без аргументов, возвращающая новый
+        итератор строк; функция вызывается дважды (замер и запись), так что
+        строки не собираются в памяти целиком.
+        """
+        source = rows if callable(rows) else (lambda: rows)
+        for row in source():
+            self.measure(row)
+        for col_num, length in self.widths.items():
+            width = min(length + WIDTH_PADDING, MAX_WIDTH)
+            self.ws.column_dimensions[get_column_letter(col_num)].width = width
+        for row in source():
+            self.ws.append(row)
@@ -0,0 +1,142 @@
+"""
+Фоновый запуск экспорта отчётов.
+
+Каждый формат (JSON, Excel, Word, PDF) выполняется отдельной задачей в
+пуле потоков, поэтому интерфейс не замирает на время сохранения.
+Прогресс и итог передаются обратно в UI-поток через Clock.
+
+Отмена кооперативная: экспорт вызывает check_cancelled() между
+страницами и перед записью файла, и задача отменённого пакета
+прерывается, не оставив файла.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Пакет, задачу которого выполняет текущий поток пула
+_current = threading.local()
+
+
+class ExportCancelled(Exception):
+    """Задача прервана отменой пакета"""
+
+
+def check_cancelled():
+    """Прервать экспорт, если его пакет отменён (вне пакета ничего не делает)"""
+    batch = getattr(_current, 'batch', None)
+    if batch is not None and batch.is_cancelled():
+        raise ExportCancelled('Отменено')
+
+
+def _schedule_on_ui(callback, *args):
+    from kivy.clock import Clock
+    Clock.schedule_once(lambda dt: callback(*args), 0)
+
+
+class ExportBatch:
+    """Набор задач экспорта одного запуска; поддерживает отмену"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.results = {}
+        self.futures = {}
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        return len(self.names)
+
+    @property
+    def done(self):
+        return len(self.results)
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Отменить пакет: не начатые задачи не запускаются, запущенные
+        прерываются на ближайшем check_cancelled()"""
+        self._cancel.set()
+        for future in self.futures.values():
+            future.cancel()
+
+
+class ExportJobRunner:
+    """Пул потоков для задач экспорта.
+
+    Задача — функция без аргументов, возвращающая (result, error), как
+    save_to_json / save_to_excel_without_dialog. on_progress(name, result,
+    error, batch) вызывается после каждой задачи, on_done(batch) — один раз
+    в конце; оба в UI-потоке.
+    """
+
+    def __init__(self, max_workers=4, schedule=_schedule_on_ui):
+        self.max_workers = max_workers
+        self.schedule = schedule
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='export')
+        return self._executor
+
+    def submit(self, jobs, on_progress=None, on_done=None):
+        """Запустить задачи [(name, func)] параллельно и вернуть ExportBatch"""
+        batch = ExportBatch(name for name, _ in jobs)
+        if not jobs:
+            if on_done:
+                self.schedule(on_done, batch)
+            return batch
+
+        def run(name, func):
+            if batch.is_cancelled():
+                return None, 'Отменено'
+            _current.batch = batch
+            try:
+                outcome = func()
+            except ExportCancelled:
+                return None, 'Отменено'
+            except Exception as e:
+                return None, f"{name}: {str(e)}\n{traceback.format_exc()}"
+            finally:
+                _current.batch = None
+            return (None, 'Отменено') if batch.is_cancelled() else outcome
+
+        def finished(name, future):
+            if future.cancelled():
+                outcome = (None, 'Отменено')
+            else:
+                outcome = future.result()
+            with batch._lock:
+                batch.results[name] = outcome
+                last = batch.done == batch.total
+            if on_progress and not batch.is_cancelled():
+                self.schedule(on_progress, name, outcome[0], outcome[1], batch)
+            if last and on_done:
+                self.schedule(on_done, batch)
+
+        pool = self._pool()
+        for name, func in jobs:
+            future = pool.submit(run, name, func)
+            batch.futures[name] = future
+            future.add_done_callback(lambda f, n=name: finished(n, f))
+        return batch
+
+    def shutdown(self, wait=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_runner = None
+
+
+def get_runner():
+    """Общий для приложения пул экспорта"""
+    global _runner
+    if _runner is None:
+        _runner = ExportJobRunner()
+    return _runner
@@ -75,3 +75,67 @@ def calculate_avg_height_from_dbh(height_data):
 def calculate_michaelis_formula(c, b, d):
     h = d ** 2 / (c + b * d + d ** 2)
     return h * 10 if h else 0
+
+
+# Векторные версии для расчёта по целому столбцу площадок.
+# numpy импортируется только при первом вызове.
+
+def _np():
+    import numpy as np
+    return np
+
+
+def calculate_area_ha_array(radius_m):
+    np = _np()
+    radius_m = np.asarray(radius_m, dtype=float)
+    return np.pi * (radius_m ** 2) / 10000
+
+
+def calculate_density_array(radius_m, count):
+    np = _np()
+    area_ha, count = np.broadcast_arrays(calculate_area_ha_array(radius_m),
+                                         np.asarray(count, dtype=float))
+    return np.divide(count, area_ha, out=np.zeros(area_ha.shape), where=area_ha > 0)
+
+
+def calculate_stock_array(avg_diameter_cm, avg_height_m, density, form_factor=0.5):
+    np = _np()
+    avg_diameter_cm = np.asarray(avg_diameter_cm, dtype=float)
+    avg_height_m = np.asarray(avg_height_m, dtype=float)
+    density = np.asarray(density, dtype=float)
+    volume_per_tree = (np.pi * (avg_diameter_cm / 200) ** 2) * avg_height_m * form_factor
+    return volume_per_tree * density
+
+
+def calculate_intensity_array(current_density, target_density):
+    np = _np()
+    current, target = np.broadcast_arrays(np.asarray(current_density, dtype=float),
+                                          np.asarray(target_density, dtype=float))
+    result = np.zeros(current.shape)
+    np.divide(current - target, current, out=result, where=current > 0)
+    result *= 100
+    return np.maximum(result, 0, out=result)
+
+
+def calculate_basal_area_array(diameters_cm):
+    """1-D массив — сумма по деревьям (как calculate_basal_area),
+    2-D (площадки × деревья, пустые места NaN) — сумма по каждой площадке"""
+    np = _np()
+    diameters_cm = np.asarray(diameters_cm, dtype=float)
+    areas = np.pi * (diameters_cm / 200) ** 2
+    if diameters_cm.ndim <= 1:
+        return float(np.nansum(areas))
+    return np.nansum(areas, axis=-1)
+
+
+def calculate_michaelis_formula_array(c, b, d):
+    """Нулевой знаменатель хотя бы в одной строке — ZeroDivisionError,
+    как у calculate_michaelis_formula, а не NaN/inf в результате"""
+    np = _np()
+    c = np.asarray(c, dtype=float)
+    b = np.asarray(b, dtype=float)
+    d = np.asarray(d, dtype=float)
+    denominator = c + b * d + d ** 2
+    if np.any(denominator == 0):
+        raise ZeroDivisionError('float division by zero')
+    return d ** 2 / denominator * 10
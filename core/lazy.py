@@ -0,0 +1,86 @@
+"""
+Отложенный импорт тяжёлых модулей (pandas, openpyxl, python-docx, reportlab).
+
+lazy_import('pandas') возвращает заглушку модуля; настоящий импорт
+выполняется при первом обращении к её атрибуту, то есть при первом
+экспорте или загрузке файла, а не при запуске приложения. Время каждого
+такого импорта запоминается и доступно через import_report().
+"""
+import importlib
+import sys
+import threading
+import time
+import types
+
+
+# Модули, которых не должно быть в памяти к показу главного меню
+HEAVY_MODULES = ('pandas', 'openpyxl', 'docx', 'reportlab', 'matplotlib', 'numpy')
+# Бюджет холодного старта до главного меню, секунды (телефон среднего класса)
+STARTUP_BUDGET = 3.0
+
+
+_timings = {}
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Модуль, который импортируется при первом обращении к атрибуту"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _timings[self.__name__] = time.perf_counter() - start
+                    self.__dict__['_module'] = module
+        return module
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'загружен' if self.is_loaded else 'не загружен'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """Модуль name: уже импортированный — сразу, иначе отложенная заглушка"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def import_report():
+    """[(модуль, секунды)] отложенных импортов, самые долгие первыми"""
+    with _lock:
+        return sorted(_timings.items(), key=lambda item: item[1], reverse=True)
+
+
+def loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def report_startup(started_at, budget=STARTUP_BUDGET):
+    """Вывести время запуска относительно бюджета и загруженные тяжёлые модули"""
+    elapsed = time.perf_counter() - started_at
+    status = 'в пределах бюджета' if elapsed <= budget else 'БЮДЖЕТ ПРЕВЫШЕН'
+    print(f"[startup] {elapsed:.2f} с до главного меню (бюджет {budget:.1f} с) — {status}")
+    heavy = loaded_heavy_modules()
+    if heavy:
+        print(f"[startup] при запуске загружены: {', '.join(heavy)}")
+    return elapsed
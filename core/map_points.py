@@ -0,0 +1,260 @@
+"""
+Точки карты: участки и площадки с пространственным индексом.
+
+Координаты участков хранятся в section_coords, координаты площадок — в
+столбцах lat, lon таблицы molodniki_data (core/plot_geo.py). R-tree
+каждого слоя (поддерживается триггерами) отвечает на запрос «что
+попадает в видимую область карты» без просмотра всей таблицы. Если
+SQLite собран без R-tree, тот же запрос выполняется по обычному индексу
+(lat, lon).
+
+Для мелких масштабов таблица кластеров слоя хранит по строке на ячейку
+сетки CLUSTER_CELL x CLUSTER_CELL пикселей карты каждого масштаба:
+число точек и суммы координат. Триггеры обновляют её при сохранении,
+поэтому clusters_in_bbox() читает только видимые ячейки, сколько бы
+точек ни было в базе. Ключи кластеров не зависят от видимой области, и
+при панорамировании маркеры обновляются по разнице, а не создаются
+заново.
+"""
+import json
+import math
+import os
+
+from core.database import DB_NAME, get_connection
+
+
+# Прежнее хранилище координат (экран карты до версии 5 схемы)
+COORDS_FILE = 'sections_coords.json'
+TILE_SIZE = 256
+# Ячейка кластера, пиксели карты; начиная с CLUSTER_MAX_ZOOM точки не объединяются
+CLUSTER_CELL = 64
+CLUSTER_MAX_ZOOM = 16
+
+# (вид точки, таблица, R-tree, таблица кластеров, столбец ключа маркера)
+LAYERS = (
+    ('section', 'section_coords', 'section_coords_rtree', 'section_clusters', 'section_number'),
+    ('plot', 'molodniki_data', 'plot_coords_rtree', 'plot_clusters', 'id'),
+)
+
+
+def rtree_available(cursor):
+    try:
+        cursor.execute('CREATE VIRTUAL TABLE temp._rtree_probe USING rtree(id, x0, x1)')
+        cursor.execute('DROP TABLE temp._rtree_probe')
+        return True
+    except Exception:
+        return False
+
+
+def _has_table(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def create_point_clusters(cursor, table, clusters):
+    """Таблица ячеек кластеров точек table по масштабам и триггеры её обновления.
+
+    В table нужны id, lat, lon, x, y; строки без lat не учитываются.
+    sum_id при count = 1 — id единственной точки ячейки.
+    """
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS {clusters} (
+                    zoom INTEGER,
+                    cx INTEGER,
+                    cy INTEGER,
+                    count INTEGER,
+                    sum_lat REAL,
+                    sum_lon REAL,
+                    sum_id INTEGER,
+                    PRIMARY KEY (zoom, cx, cy)) WITHOUT ROWID''')
+    cursor.execute('CREATE TABLE IF NOT EXISTS cluster_zooms (zoom INTEGER PRIMARY KEY)')
+    cursor.execute('DELETE FROM cluster_zooms')
+    cursor.executemany('INSERT INTO cluster_zooms VALUES (?)', [(z,) for z in range(CLUSTER_MAX_ZOOM)])
+
+    cells = TILE_SIZE // CLUSTER_CELL
+    cell = (f'CAST({{p}}.x * ({cells} << z.zoom) AS INTEGER), '
+            f'CAST({{p}}.y * ({cells} << z.zoom) AS INTEGER)')
+    add = (f'INSERT INTO {clusters} SELECT z.zoom, {cell.format(p="NEW")}, 1, NEW.lat, NEW.lon, NEW.id '
+           f'FROM cluster_zooms z WHERE NEW.lat IS NOT NULL '
+           f'ON CONFLICT (zoom, cx, cy) DO UPDATE SET count = count + 1, '
+           f'sum_lat = sum_lat + excluded.sum_lat, sum_lon = sum_lon + excluded.sum_lon, '
+           f'sum_id = sum_id + excluded.sum_id;')
+    remove = (f'UPDATE {clusters} SET count = count - 1, sum_lat = sum_lat - OLD.lat, '
+              f'sum_lon = sum_lon - OLD.lon, sum_id = sum_id - OLD.id '
+              f'WHERE OLD.lat IS NOT NULL '
+              f'AND (zoom, cx, cy) IN (SELECT z.zoom, {cell.format(p="OLD")} FROM cluster_zooms z); '
+              f'DELETE FROM {clusters} WHERE count <= 0;')
+    moved = 'WHEN OLD.lat IS NOT NEW.lat OR OLD.lon IS NOT NEW.lon'
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {clusters}_ai AFTER INSERT ON {table} BEGIN {add} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {clusters}_ad AFTER DELETE ON {table} BEGIN {remove} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {clusters}_au AFTER UPDATE OF lat, lon ON {table} {moved} '
+                   f'BEGIN {remove} {add} END')
+
+    cursor.execute(f'DELETE FROM {clusters}')
+    cursor.execute(f'INSERT INTO {clusters} SELECT z.zoom, {cell.format(p="c")}, '
+                   f'COUNT(*), SUM(c.lat), SUM(c.lon), SUM(c.id) '
+                   f'FROM {table} c, cluster_zooms z WHERE c.lat IS NOT NULL GROUP BY 1, 2, 3')
+
+
+def create_point_index(cursor, table, rtree, triggers):
+    """R-tree rtree по lat, lon таблицы table, триггеры {triggers}_ai/ad/au.
+
+    Без R-tree в SQLite создаётся обычный индекс (lat, lon) и
+    возвращается False.
+    """
+    if not rtree_available(cursor):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_latlon ON {table} (lat, lon)')
+        return False
+    cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} USING rtree(id, min_lat, max_lat, min_lon, max_lon)')
+    insert = (f'INSERT OR REPLACE INTO {rtree} SELECT NEW.id, NEW.lat, NEW.lat, NEW.lon, NEW.lon '
+              f'WHERE NEW.lat IS NOT NULL;')
+    delete = f'DELETE FROM {rtree} WHERE id = OLD.id;'
+    moved = 'WHEN OLD.lat IS NOT NEW.lat OR OLD.lon IS NOT NEW.lon'
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {triggers}_ai AFTER INSERT ON {table} BEGIN {insert} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {triggers}_ad AFTER DELETE ON {table} BEGIN {delete} END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {triggers}_au AFTER UPDATE OF lat, lon ON {table} {moved} '
+                   f'BEGIN {delete} {insert} END')
+    cursor.execute(f'DELETE FROM {rtree}')
+    cursor.execute(f'INSERT INTO {rtree} SELECT id, lat, lat, lon, lon FROM {table} WHERE lat IS NOT NULL')
+    return True
+
+
+def create_coords_schema(cursor):
+    """Таблица координат участков, кластеры и R-tree (если доступен)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS section_coords (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    section_number TEXT UNIQUE,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    x REAL NOT NULL,  -- веб-Меркатор, 0..1
+                    y REAL NOT NULL,
+                    label TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    create_point_clusters(cursor, 'section_coords', 'section_clusters')
+    return create_point_index(cursor, 'section_coords', 'section_coords_rtree', 'section_coords')
+
+
+def mercator(lat, lon):
+    """Точка в координатах веб-Меркатора: x, y от 0 до 1 (y — вниз)"""
+    lat = max(min(lat, 85.0511), -85.0511)
+    sin_lat = math.sin(math.radians(lat))
+    return (lon + 180.0) / 360.0, 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+
+
+def _coords_row(section, lat, lon, label):
+    x, y = mercator(lat, lon)
+    return section, lat, lon, x, y, label or section
+
+
+def import_coords_file(cursor, path=COORDS_FILE):
+    """Перенести координаты из sections_coords.json; вернуть число участков"""
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except Exception:
+        return 0
+    rows = []
+    for section, coords in saved.items():
+        try:
+            rows.append(_coords_row(str(section), float(coords['lat']), float(coords['lon']),
+                                    coords.get('label')))
+        except (KeyError, TypeError, ValueError):
+            continue
+    cursor.executemany('INSERT OR IGNORE INTO section_coords (section_number, lat, lon, x, y, label) '
+                       'VALUES (?, ?, ?, ?, ?, ?)', rows)
+    return len(rows)
+
+
+def save_section_coords(section, lat, lon, label=None, db_path=DB_NAME):
+    conn = get_connection(db_path)
+    conn.execute('''
+        INSERT INTO section_coords (section_number, lat, lon, x, y, label) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(section_number) DO UPDATE SET
+            lat = excluded.lat, lon = excluded.lon, x = excluded.x, y = excluded.y,
+            label = excluded.label, updated_at = CURRENT_TIMESTAMP
+    ''', _coords_row(section, lat, lon, label))
+    conn.commit()
+
+
+def count_points(db_path=DB_NAME):
+    """Число точек на карте во всех слоях"""
+    cursor = get_connection(db_path).cursor()
+    total = 0
+    for kind, table, rtree, clusters, key in LAYERS:
+        if _has_table(cursor, clusters):
+            total += cursor.execute(f'SELECT COUNT(*) FROM {table} WHERE lat IS NOT NULL').fetchone()[0]
+    return total
+
+
+def bbox_query(cursor, table, rtree, columns, tail=''):
+    """SELECT по прямоугольнику :south, :west, :north, :east (алиас таблицы c):
+    через R-tree или по индексу (lat, lon)"""
+    if _has_table(cursor, rtree):
+        return (f'SELECT {columns} FROM {rtree} r JOIN {table} c ON c.id = r.id '
+                f'WHERE r.min_lat <= :north AND r.max_lat >= :south '
+                f'AND r.min_lon <= :east AND r.max_lon >= :west {tail}')
+    return (f'SELECT {columns} FROM {table} c '
+            f'WHERE c.lat BETWEEN :south AND :north AND c.lon BETWEEN :west AND :east {tail}')
+
+
+def points_in_bbox(south, west, north, east, db_path=DB_NAME):
+    """Участки в прямоугольнике: список (section_number, lat, lon, label)"""
+    cursor = get_connection(db_path).cursor()
+    cursor.execute(bbox_query(cursor, 'section_coords', 'section_coords_rtree',
+                              'c.section_number, c.lat, c.lon, c.label'),
+                   {'south': south, 'west': west, 'north': north, 'east': east})
+    return cursor.fetchall()
+
+
+def clusters_in_bbox(south, west, north, east, zoom, db_path=DB_NAME):
+    """Участки и площадки в прямоугольнике, объединённые по ячейкам кластеров.
+
+    Возвращает словарь ключ маркера -> (lat, lon, count): одиночная
+    точка получает ключ ('section', section_number) или ('plot', id
+    площадки), группа — ('cluster', zoom, cx, cy) со средними
+    координатами точек ячейки.
+    """
+    cursor = get_connection(db_path).cursor()
+    layers = [layer for layer in LAYERS if _has_table(cursor, layer[3])]
+    zoom = max(int(zoom), 0)
+    result = {}
+    if zoom >= CLUSTER_MAX_ZOOM:
+        params = {'south': south, 'west': west, 'north': north, 'east': east}
+        for kind, table, rtree, clusters, key in layers:
+            cursor.execute(bbox_query(cursor, table, rtree, f'c.{key}, c.lat, c.lon'), params)
+            for point, lat, lon in cursor.fetchall():
+                result[(kind, point)] = (lat, lon, 1)
+        return result
+
+    cells = (TILE_SIZE // CLUSTER_CELL) << zoom
+    x0, y0 = mercator(north, west)
+    x1, y1 = mercator(south, east)
+    window = (zoom, int(x0 * cells), int(x1 * cells), int(y0 * cells), int(y1 * cells))
+    merged = {}
+    for kind, table, rtree, clusters, key in layers:
+        cursor.execute(f'''
+            SELECT cx, cy, count, sum_lat, sum_lon, sum_id FROM {clusters}
+            WHERE zoom = ? AND cx BETWEEN ? AND ? AND cy BETWEEN ? AND ?
+        ''', window)
+        for cx, cy, count, sum_lat, sum_lon, sum_id in cursor.fetchall():
+            cell = merged.setdefault((cx, cy), [0, 0.0, 0.0, None])
+            cell[0] += count
+            cell[1] += sum_lat
+            cell[2] += sum_lon
+            cell[3] = (kind, sum_id)
+
+    singles = {}
+    for (cx, cy), (count, sum_lat, sum_lon, last) in merged.items():
+        if count == 1:
+            singles.setdefault(last[0], []).append(last[1])
+        else:
+            result[('cluster', zoom, cx, cy)] = (sum_lat / count, sum_lon / count, count)
+    for kind, table, rtree, clusters, key in layers:
+        ids = singles.get(kind)
+        if ids:
+            cursor.execute(f'SELECT {key}, lat, lon FROM {table} '
+                           f'WHERE id IN ({", ".join("?" * len(ids))})', ids)
+            for point, lat, lon in cursor.fetchall():
+                result[(kind, point)] = (lat, lon, 1)
+    return result
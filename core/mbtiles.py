@@ -0,0 +1,211 @@
+"""
+Офлайн-тайлы карты в файле MBTiles (SQLite).
+
+MBTiles хранит тайлы в таблице tiles с нумерацией строк TMS (снизу
+вверх) — так же нумерует тайлы MapView, поэтому запрос идёт без
+пересчёта. Каждый поток получает своё соединение с файлом.
+
+prefetch() заранее скачивает тайлы, покрывающие участки лесничества, и
+дописывает их в файл; уже скачанные тайлы повторно не запрашиваются.
+Адрес тайлов задаётся явно: массовая загрузка разрешена не всеми
+источниками, а tile.openstreetmap.org её прямо запрещает.
+"""
+import math
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from core.database import DB_NAME, get_connection
+from core.map_points import mercator
+
+
+OFFLINE_TILES = 'offline_tiles.mbtiles'
+# Правила этих серверов запрещают массовое скачивание тайлов
+FORBIDDEN_HOSTS = ('tile.openstreetmap.org',)
+USER_AGENT = 'ForestApp tile prefetch'
+# Запас вокруг участков лесничества, метры
+PADDING_M = 500
+BATCH = 200
+
+
+class MBTiles:
+    def __init__(self, path=OFFLINE_TILES):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def create(self, name='ForestApp'):
+        conn = self.connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS tiles (
+                        zoom_level INTEGER,
+                        tile_column INTEGER,
+                        tile_row INTEGER,
+                        tile_data BLOB,
+                        PRIMARY KEY (zoom_level, tile_column, tile_row))''')
+        conn.executemany('INSERT OR IGNORE INTO metadata VALUES (?, ?)',
+                         [('name', name), ('format', 'png'), ('type', 'baselayer'), ('version', '1')])
+        conn.commit()
+
+    def metadata(self):
+        return dict(self.connection().execute('SELECT name, value FROM metadata'))
+
+    def set_metadata(self, **values):
+        conn = self.connection()
+        conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                         [(key, str(value)) for key, value in values.items()])
+        conn.commit()
+
+    def get_tile(self, zoom, column, row):
+        """PNG тайла (row в нумерации TMS) или None"""
+        found = self.connection().execute(
+            'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+            (zoom, column, row)).fetchone()
+        return found[0] if found else None
+
+    def existing(self, zoom):
+        """Уже сохранённые тайлы масштаба zoom: множество (column, row)"""
+        return set(self.connection().execute(
+            'SELECT tile_column, tile_row FROM tiles WHERE zoom_level = ?', (zoom,)))
+
+    def put_tiles(self, tiles):
+        """tiles — (zoom, column, row TMS, png)"""
+        conn = self.connection()
+        conn.executemany('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)', tiles)
+        conn.commit()
+
+    def zoom_range(self):
+        return self.connection().execute('SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles').fetchone()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def tms_row(zoom, y):
+    """Строка XYZ (сверху вниз) -> TMS (снизу вверх) и обратно"""
+    return (1 << zoom) - 1 - y
+
+
+def tiles_for_bbox(south, west, north, east, zoom):
+    """Тайлы XYZ (x, y) масштаба zoom, покрывающие прямоугольник"""
+    n = 1 << zoom
+    x0, y0 = mercator(north, west)
+    x1, y1 = mercator(south, east)
+    for x in range(max(int(x0 * n), 0), min(int(x1 * n), n - 1) + 1):
+        for y in range(max(int(y0 * n), 0), min(int(y1 * n), n - 1) + 1):
+            yield x, y
+
+
+def forestry_bbox(forestry, padding_m=PADDING_M, db_path=DB_NAME):
+    """Прямоугольник (south, west, north, east) вокруг участков лесничества
+    с координатами или None"""
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('''
+        SELECT MIN(c.lat), MIN(c.lon), MAX(c.lat), MAX(c.lon)
+        FROM section_coords c
+        WHERE c.section_number IN (
+            SELECT section_number FROM sections WHERE forestry = :f OR district_forestry = :f
+            UNION SELECT section_number FROM molodniki_sections WHERE forestry = :f OR district_forestry = :f)
+    ''', {'f': forestry})
+    south, west, north, east = cursor.fetchone()
+    if south is None:
+        return None
+    lat_pad = padding_m / 111320.0
+    lon_pad = padding_m / (111320.0 * max(math.cos(math.radians((south + north) / 2)), 0.01))
+    return south - lat_pad, west - lon_pad, north + lat_pad, east + lon_pad
+
+
+def list_forestries(db_path=DB_NAME):
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('''
+        SELECT forestry FROM sections WHERE forestry IS NOT NULL AND forestry != ''
+        UNION SELECT forestry FROM molodniki_sections WHERE forestry IS NOT NULL AND forestry != ''
+        ORDER BY 1
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def download_tile(url, timeout=20):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def prefetch_allowed(url):
+    """Можно ли скачивать тайлы с url заранее (не сервер из FORBIDDEN_HOSTS)"""
+    host = (urllib.parse.urlsplit(url).hostname or '').lower()
+    return not any(host == forbidden or host.endswith('.' + forbidden) for forbidden in FORBIDDEN_HOSTS)
+
+
+def plan_prefetch(tiles, bbox, zooms):
+    """Недостающие тайлы: список (zoom, x, y XYZ)"""
+    missing = []
+    for zoom in zooms:
+        have = tiles.existing(zoom)
+        missing.extend((zoom, x, y) for x, y in tiles_for_bbox(*bbox, zoom)
+                       if (x, tms_row(zoom, y)) not in have)
+    return missing
+
+
+def prefetch(tiles, bbox, zooms, url, workers=2, fetch=download_tile, progress=None):
+    """Скачать недостающие тайлы bbox на масштабах zooms в MBTiles.
+
+    url — шаблон адреса с {z}, {x}, {y} сервера, разрешающего загрузку
+    тайлов для работы без сети. Возвращает (скачано, ошибок).
+    progress(done, total) вызывается по мере загрузки.
+    """
+    if not prefetch_allowed(url):
+        raise ValueError(f'{urllib.parse.urlsplit(url).hostname} не разрешает массовую загрузку тайлов')
+    tiles.create()
+    missing = plan_prefetch(tiles, bbox, zooms)
+    total = len(missing)
+    done = failed = 0
+
+    def load(tile):
+        zoom, x, y = tile
+        try:
+            return zoom, x, tms_row(zoom, y), fetch(url.format(z=zoom, x=x, y=y))
+        except Exception:
+            return None
+
+    # Пачками: в памяти не больше BATCH скачанных тайлов
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, total, BATCH):
+            loaded = list(pool.map(load, missing[start:start + BATCH]))
+            ok = [tile for tile in loaded if tile is not None]
+            failed += len(loaded) - len(ok)
+            done += len(loaded)
+            tiles.put_tiles(ok)
+            if progress:
+                progress(done, total)
+
+    _update_bounds(tiles, bbox)
+    return total - failed, failed
+
+
+def _update_bounds(tiles, bbox):
+    """minzoom, maxzoom и bounds (объединение со скачанными ранее)"""
+    south, west, north, east = bbox
+    previous = tiles.metadata().get('bounds')
+    if previous:
+        try:
+            w, s, e, n = (float(v) for v in previous.split(','))
+            south, west, north, east = min(south, s), min(west, w), max(north, n), max(east, e)
+        except ValueError:
+            pass
+    low, high = tiles.zoom_range()
+    if low is not None:
+        tiles.set_metadata(minzoom=low, maxzoom=high, bounds=f'{west},{south},{east},{north}',
+                           updated=time.strftime('%Y-%m-%d %H:%M'))
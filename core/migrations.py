@@ -0,0 +1,243 @@
+"""
+Версии схемы forest_data.db.
+
+Номер версии хранится в PRAGMA user_version. migrate() сравнивает его
+с числом миграций и выполняет только недостающие, каждую в своей
+транзакции вместе с обновлением user_version. Для актуальной базы это
+одно чтение PRAGMA без DDL. Новая миграция — функция, добавленная в
+конец MIGRATIONS; уже выпущенные миграции не меняются.
+"""
+import threading
+
+from core.database import DB_NAME, get_connection
+from core.map_points import create_coords_schema, import_coords_file
+from core.molodniki_breeds import backfill_breeds, create_breed_schema
+from core.plot_geo import create_plot_coords_schema
+from core.search import create_search_index, create_search_triggers, has_search_index
+from core.section_stats import create_stats_table, refresh_all_stats
+
+
+_lock = threading.Lock()
+
+
+def _columns(cursor, table):
+    return {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_columns(cursor, table, columns):
+    """Добавить столбцы, которых нет в таблице (старые базы)"""
+    existing = _columns(cursor, table)
+    for definition in columns:
+        if definition.split()[0] not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {definition}')
+
+
+def _base_schema(cursor):
+    """1: единая схема из setup_database экранов и init_database"""
+    # Перечётная ведомость
+    cursor.execute('''CREATE TABLE IF NOT EXISTS sections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    section_number TEXT UNIQUE,
+                    quarter TEXT,
+                    plot TEXT,
+                    forestry TEXT,
+                    district_forestry TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    # В базах main_modern таблица создавалась без created_at
+    _add_columns(cursor, 'sections', ['created_at TIMESTAMP'])
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS trees (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tree_number INTEGER,
+                    species TEXT,
+                    age TEXT,
+                    count TEXT,
+                    diameter REAL,
+                    height REAL,
+                    condition TEXT,
+                    model TEXT,
+                    notes TEXT,
+                    section_id INTEGER,
+                    FOREIGN KEY(section_id) REFERENCES sections(id))''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS suggestions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    column_index INTEGER,
+                    value TEXT,
+                    UNIQUE(column_index, value))''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestions ON suggestions (column_index, value)')
+
+    # Участки молодняков: объединение столбцов main.py, main_modern и main_legacy
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_sections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    section_number TEXT)''')
+    _add_columns(cursor, 'molodniki_sections', [
+        'quarter TEXT', 'plot TEXT', 'forestry TEXT', 'district_forestry TEXT',
+        'radius REAL DEFAULT 5.64', 'plot_area TEXT', 'forest_type TEXT',
+        'care_queue TEXT', 'characteristics TEXT', 'care_date TEXT',
+        'technology TEXT', 'forest_purpose TEXT', 'created_at TIMESTAMP',
+    ])
+    # INSERT OR REPLACE по номеру участка плодил дубли: остаётся последняя запись
+    cursor.execute('''DELETE FROM molodniki_sections
+                      WHERE section_number IS NOT NULL
+                        AND id NOT IN (SELECT MAX(id) FROM molodniki_sections
+                                       WHERE section_number IS NOT NULL GROUP BY section_number)''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_molodniki_sections_number '
+                   'ON molodniki_sections (section_number)')
+
+    # Молодняки: площадки, породы, итоги, настройки
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_data (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    page_number INTEGER,
+                    row_index INTEGER,
+                    nn INTEGER,
+                    gps_point TEXT,
+                    predmet_uhoda TEXT,
+                    radius REAL DEFAULT 5.64,
+                    primechanie TEXT,
+                    section_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    poroda TEXT DEFAULT '')''')
+    _add_columns(cursor, 'molodniki_data', ["poroda TEXT DEFAULT ''", 'radius REAL DEFAULT 5.64'])
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_data_page ON molodniki_data (page_number, row_index)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_data_section ON molodniki_data (section_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_data_section_page '
+                   'ON molodniki_data (section_name, page_number, row_index)')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_breeds (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    molodniki_data_id INTEGER,
+                    breed_name TEXT,
+                    breed_type TEXT, -- 'coniferous' или 'deciduous'
+                    do_05 INTEGER DEFAULT 0,
+                    _05_15 INTEGER DEFAULT 0,
+                    bolee_15 INTEGER DEFAULT 0,
+                    density INTEGER DEFAULT 0,
+                    height REAL DEFAULT 0.0,
+                    diameter REAL DEFAULT 0.0,
+                    age INTEGER DEFAULT 0,
+                    composition_coefficient REAL DEFAULT 0.0,
+                    FOREIGN KEY(molodniki_data_id) REFERENCES molodniki_data(id) ON DELETE CASCADE)''')
+    _add_columns(cursor, 'molodniki_breeds', ['diameter REAL DEFAULT 0.0',
+                                              'composition_coefficient REAL DEFAULT 0.0'])
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_totals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    page_number INTEGER,
+                    section_name TEXT,
+                    total_composition TEXT,
+                    total_area REAL DEFAULT 0.0,
+                    avg_age REAL DEFAULT 0.0,
+                    avg_density REAL DEFAULT 0.0,
+                    avg_height REAL DEFAULT 0.0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_totals_page ON molodniki_totals (page_number, section_name)')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    section_name TEXT UNIQUE,
+                    radius REAL DEFAULT 5.64,
+                    plot_area REAL DEFAULT 0.0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_settings_section ON molodniki_settings (section_name)')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_suggestions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    column_index INTEGER,
+                    value TEXT,
+                    UNIQUE(column_index, value))''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_suggestions ON molodniki_suggestions (column_index, value)')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS custom_breeds (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    breed_name TEXT UNIQUE,
+                    breed_type TEXT, -- 'coniferous' или 'deciduous'
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_custom_breeds ON custom_breeds (breed_type)')
+
+
+def _breed_views(cursor):
+    """2: индексы и представления molodniki_breeds, породы из JSON"""
+    create_breed_schema(cursor)
+    backfill_breeds(cursor)
+
+
+def _search_index(cursor):
+    """3: полнотекстовый индекс search_index и триггеры (если есть FTS5)"""
+    create_search_index(cursor)
+
+
+def _section_stats(cursor):
+    """4: сводка по участкам для дашборда"""
+    create_stats_table(cursor)
+    refresh_all_stats(cursor)
+
+
+def _section_coords(cursor):
+    """5: координаты участков с R-tree вместо sections_coords.json"""
+    create_coords_schema(cursor)
+    import_coords_file(cursor)
+
+
+def _plot_coords(cursor):
+    """6: координаты площадок из gps_point, R-tree и кластеры площадок"""
+    # Триггеры поиска — только на столбцы документа, иначе запись координат
+    # переписывала бы документы площадок
+    if has_search_index(cursor):
+        create_search_triggers(cursor, replace=True)
+    create_plot_coords_schema(cursor)
+
+
+def _section_radius(cursor):
+    """7: густота пород по радиусу участка из molodniki_settings"""
+    create_breed_schema(cursor, replace=True)
+    refresh_all_stats(cursor)
+
+
+# Порядок менять нельзя: номер миграции = её позиция + 1
+MIGRATIONS = [
+    _base_schema,
+    _breed_views,
+    _search_index,
+    _section_stats,
+    _section_coords,
+    _plot_coords,
+    _section_radius,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(db_path=DB_NAME):
+    return get_connection(db_path).execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db_path=DB_NAME):
+    """Довести схему db_path до SCHEMA_VERSION; вернуть число применённых миграций"""
+    conn = get_connection(db_path)
+    if schema_version(db_path) >= SCHEMA_VERSION:
+        return 0
+
+    applied = 0
+    with _lock:
+        # Прежний setup_database тоже фиксировал начатую транзакцию
+        if conn.in_transaction:
+            conn.commit()
+        while True:
+            # Версия перечитывается под блокировкой записи: другой поток
+            # или процесс мог уже обновить базу
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = schema_version(db_path)
+                if version >= SCHEMA_VERSION:
+                    conn.rollback()
+                    break
+                MIGRATIONS[version](conn.cursor())
+                conn.execute(f'PRAGMA user_version = {version + 1}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied += 1
+    return applied
@@ -0,0 +1,171 @@
+"""
+Породы площадок молодняков в таблице molodniki_breeds.
+
+Для статистики и запросов molodniki_breeds — основной источник:
+по строке на породу площадки, составные индексы и представления с
+группировкой на стороне SQLite (по участку и по всем участкам сразу).
+JSON в molodniki_data.poroda остаётся текстом ячейки «Порода» для окна
+ввода; при сохранении строки пород пересобираются из него в той же
+транзакции.
+"""
+from core.database import DB_NAME, get_connection
+from core.plot_store import BreedRecord, parse_breeds_text
+
+
+DEFAULT_RADIUS = 5.64
+
+SCHEMA = (
+    # Породы площадки (соединение с molodniki_data) и группировка по породе
+    'DROP INDEX IF EXISTS idx_molodniki_breeds',
+    'CREATE INDEX IF NOT EXISTS idx_molodniki_breeds_data '
+    'ON molodniki_breeds (molodniki_data_id, breed_type, breed_name)',
+    'CREATE INDEX IF NOT EXISTS idx_molodniki_breeds_name '
+    'ON molodniki_breeds (breed_name, breed_type, molodniki_data_id)',
+
+    # Одна строка на породу площадки с густотой на гектар и высотой,
+    # посчитанными так же, как в меню «Итого»: радиус площадки — радиус
+    # участка из molodniki_settings (molodniki_data.radius заполняется из
+    # столбца «Тип Леса» и для расчёта не годится)
+    """CREATE VIEW IF NOT EXISTS molodniki_breed_plots AS
+       SELECT d.section_name, d.page_number, d.row_index, d.id AS molodniki_data_id,
+              b.breed_name, b.breed_type, b.do_05, b._05_15, b.bolee_15,
+              b.height, b.diameter, b.age,
+              CASE WHEN b.breed_type = 'coniferous'
+                   THEN b.do_05 + b._05_15 + b.bolee_15 ELSE b.density END AS trees,
+              CASE WHEN b.breed_type = 'coniferous'
+                   THEN b.do_05 + b._05_15 + b.bolee_15 ELSE b.density END
+                   * 10000.0 / (3.14159 * COALESCE(NULLIF(CAST(s.radius AS REAL), 0), 5.64)
+                                        * COALESCE(NULLIF(CAST(s.radius AS REAL), 0), 5.64)) AS density_ha,
+              CASE WHEN b.breed_type != 'coniferous' THEN b.height
+                   WHEN b.bolee_15 > 0 THEN 2.0
+                   WHEN b._05_15 > 0 THEN 1.0
+                   WHEN b.do_05 > 0 THEN 0.3
+                   ELSE b.height END AS zone_height
+       FROM molodniki_breeds b
+       JOIN molodniki_data d ON d.id = b.molodniki_data_id
+       LEFT JOIN molodniki_settings s ON s.section_name = d.section_name
+       WHERE b.breed_name IS NOT NULL AND b.breed_name != ''""",
+
+    # Порода на участке: средние по площадкам, где она встречается
+    '''CREATE VIEW IF NOT EXISTS molodniki_breed_stats AS
+       SELECT section_name, breed_name, breed_type,
+              COUNT(*) AS plots,
+              SUM(trees) AS trees,
+              AVG(density_ha) AS avg_density_ha,
+              AVG(NULLIF(zone_height, 0)) AS avg_height,
+              AVG(NULLIF(age, 0)) AS avg_age,
+              AVG(NULLIF(diameter, 0)) AS avg_diameter,
+              SUM(do_05) AS do_05, SUM(_05_15) AS _05_15, SUM(bolee_15) AS bolee_15
+       FROM molodniki_breed_plots
+       GROUP BY section_name, breed_name, breed_type''',
+
+    # Порода по всем участкам
+    '''CREATE VIEW IF NOT EXISTS molodniki_breed_totals AS
+       SELECT breed_name, breed_type,
+              COUNT(DISTINCT section_name) AS sections,
+              COUNT(*) AS plots,
+              SUM(trees) AS trees,
+              AVG(density_ha) AS avg_density_ha,
+              AVG(NULLIF(zone_height, 0)) AS avg_height,
+              AVG(NULLIF(age, 0)) AS avg_age,
+              AVG(NULLIF(diameter, 0)) AS avg_diameter
+       FROM molodniki_breed_plots
+       GROUP BY breed_name, breed_type''',
+)
+
+
+# Зависимые представления раньше тех, из которых они читают
+VIEWS = ('molodniki_breed_totals', 'molodniki_breed_stats', 'molodniki_breed_plots')
+
+
+def create_breed_schema(cursor, replace=False):
+    """Индексы и представления по molodniki_breeds (таблицы уже созданы);
+    replace — пересоздать существующие представления"""
+    if replace:
+        for view in VIEWS:
+            cursor.execute(f'DROP VIEW IF EXISTS {view}')
+    for statement in SCHEMA:
+        cursor.execute(statement)
+
+
+def breed_rows(row_id, radius, breeds):
+    """Строки molodniki_breeds для пород одной площадки"""
+    area = 3.14159 * (radius ** 2)
+    rows = []
+    for breed_info in breeds:
+        density = int(breed_info.density or 0)
+        rows.append((
+            row_id,
+            breed_info.name,
+            breed_info.type,
+            int(breed_info.do_05 or 0),
+            int(breed_info._05_15 or 0),
+            int(breed_info.bolee_15 or 0),
+            density,
+            float(breed_info.height or 0.0),
+            float(breed_info.diameter or 0.0),
+            int(breed_info.age or 0),
+            (density * area) / 10000 if density and radius else 0.0,
+        ))
+    return rows
+
+
+def insert_breed_rows(cursor, rows):
+    if rows:
+        cursor.executemany('''
+            INSERT INTO molodniki_breeds
+            (molodniki_data_id, breed_name, breed_type, do_05, _05_15, bolee_15,
+             density, height, diameter, age, composition_coefficient)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+
+def backfill_breeds(cursor):
+    """Дописать породы площадкам, у которых есть JSON, но нет строк в
+    molodniki_breeds, и убрать породы удалённых площадок.
+
+    Возвращает число дописанных площадок.
+    """
+    cursor.execute('''
+        DELETE FROM molodniki_breeds
+        WHERE NOT EXISTS (SELECT 1 FROM molodniki_data d WHERE d.id = molodniki_breeds.molodniki_data_id)
+    ''')
+    cursor.execute('''
+        SELECT d.id, d.poroda, d.radius FROM molodniki_data d
+        WHERE d.poroda IS NOT NULL AND d.poroda != ''
+          AND NOT EXISTS (SELECT 1 FROM molodniki_breeds b WHERE b.molodniki_data_id = d.id)
+    ''')
+    rows = []
+    filled = 0
+    for row_id, poroda, radius in cursor.fetchall():
+        breeds = [BreedRecord.from_dict(b) for b in parse_breeds_text(poroda) if isinstance(b, dict)]
+        if breeds:
+            rows.extend(breed_rows(row_id, float(radius or DEFAULT_RADIUS), breeds))
+            filled += 1
+    insert_breed_rows(cursor, rows)
+    return filled
+
+
+def _query(sql, params=(), db_path=DB_NAME):
+    cursor = get_connection(db_path).cursor()
+    cursor.execute(sql, params)
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def section_breed_stats(section, db_path=DB_NAME):
+    """Породы участка: площадки, густота на га, средние высота, возраст, диаметр"""
+    return _query('SELECT * FROM molodniki_breed_stats WHERE section_name = ? ORDER BY plots DESC, breed_name',
+                  (section,), db_path)
+
+
+def breed_stats_by_section(db_path=DB_NAME):
+    """То же по всем участкам сразу, одним запросом"""
+    return _query('SELECT * FROM molodniki_breed_stats ORDER BY section_name, plots DESC, breed_name',
+                  db_path=db_path)
+
+
+def breed_totals(db_path=DB_NAME):
+    """Породы по всем участкам: число участков и площадок, средние"""
+    return _query('SELECT * FROM molodniki_breed_totals ORDER BY plots DESC, breed_name', db_path=db_path)
+
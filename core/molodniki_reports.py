@@ -0,0 +1,677 @@
+"""
+Расчёт итогов и экспорт отчётов участка молодняков без интерфейса.
+
+MolodnikiReports не зависит от Kivy: ему нужны только page_data,
+plot_store, адрес участка (current_section, current_quarter, ...),
+project_data и reports_dir. Его наследует экран молодняков, а пакетная
+выгрузка (batch_reports.py) использует напрямую.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+
+from core.export_jobs import check_cancelled
+from core.lazy import lazy_import
+from core.timing import timed
+
+
+# Нужен только при экспорте в Excel
+openpyxl = lazy_import('openpyxl')
+
+logger = logging.getLogger(__name__)
+
+
+REPORT_HEADERS = [
+    '№ППР', 'GPS точка', 'Предмет ухода', 'Порода', 'Густота', 'До 0.5м', '0.5-1.5м', '>1.5м', 'Высота', 'Возраст', 'Примечания', 'Тип Леса'
+]
+
+
+def default_project_data():
+    """Пустые данные проекта ухода (адрес, детали, имя документа)"""
+    return {
+        'address': {
+            'quarter': '',
+            'plot': '',
+            'forestry': '',
+            'district_forestry': '',
+            'radius': '5.64',
+            'plot_area': ''
+        },
+        'details': {
+            'care_queue': '',
+            'characteristics': '',
+            'care_date': '',
+            'technology': '',
+            'forest_purpose': ''
+        },
+        'document_name': 'Проект'
+    }
+
+
+class MolodnikiReports:
+    """Итоги и отчёты (JSON, Excel, Word, PDF) по данным участка"""
+
+    @timed('totals.get_total_data_from_db')
+    def get_total_data_from_db(self):
+        """Получает итоговые данные из рассчитанных данных меню Итого"""
+        try:
+            # Используем рассчитанные данные из меню Итого вместо данных из БД
+            # Получаем данные аналогично методу show_total_summary_popup
+
+            default_radius = float(self.current_radius) if self.current_radius else 5.64
+            plot_area_ha = 3.14159 * (default_radius ** 2) / 10000
+
+            # Словарь для сбора данных по породам
+            breeds_data = {}
+
+            # Площадки с уже разобранными породами (без повторного json.loads)
+            plots = list(self.plot_store.iter_plots(self.page_data))
+
+            # Обрабатываем все страницы
+            for plot in plots:
+                for breed_info in plot.breeds:
+                    breed_name = breed_info.name
+                    if not breed_name:
+                        continue
+
+                    breed_type = breed_info.type
+                    density = 0
+                    height = None
+                    age = None
+
+                    # Расчет густоты и высоты в зависимости от типа породы
+                    if breed_type == 'coniferous':
+                        do_05 = breed_info.do_05
+                        _05_15 = breed_info._05_15
+                        bolee_15 = breed_info.bolee_15
+                        density = (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
+
+                        # Для хвойных пород высота определяется по градациям или средняя
+                        height = breed_info.zone_height
+                    else:
+                        # Для лиственных пород - обычная плотность и средняя высота
+                        density = breed_info.density / plot_area_ha if plot_area_ha > 0 else 0
+                        height = breed_info.height or 0
+
+                    age = breed_info.age or 0
+                    diameter = breed_info.diameter or 0
+
+                    # Сбор данных по породе
+                    if breed_name not in breeds_data:
+                        breeds_data[breed_name] = {
+                            'type': breed_type,
+                            'plots': [],
+                            'coniferous_zones': {'do_05': 0, '05_15': 0, 'bolee_15': 0} if breed_type == 'coniferous' else None,
+                            'diameters': []
+                        }
+
+                    # Добавляем данные
+                    plot_data = {
+                        'density': density,
+                        'height': height,
+                        'age': age,
+                        'diameter': diameter  # ✅ ДОБАВЛЕНО: сохраняем диаметр в plot_data
+                    }
+
+                    if breed_type == 'coniferous':
+                        plot_data.update({
+                            'do_05_density': do_05 / plot_area_ha if plot_area_ha > 0 else 0,
+                            '05_15_density': _05_15 / plot_area_ha if plot_area_ha > 0 else 0,
+                            'bolee_15_density': bolee_15 / plot_area_ha if plot_area_ha > 0 else 0
+                        })
+
+                    breeds_data[breed_name]['plots'].append(plot_data)
+                    breeds_data[breed_name]['diameters'].append(diameter)
+
+                    if breed_type == 'coniferous':
+                        breeds_data[breed_name]['coniferous_zones']['do_05'] += plot_data['do_05_density']
+                        breeds_data[breed_name]['coniferous_zones']['05_15'] += plot_data['05_15_density']
+                        breeds_data[breed_name]['coniferous_zones']['bolee_15'] += plot_data['bolee_15_density']
+
+            # Расчет коэффициента состава на основе СРЕДНЕЙ густоты пород
+            total_densities = {}
+            total_density_all = 0  # Общая густота всех пород (сумма средних)
+            
+            for breed_name, data in breeds_data.items():
+                if data['plots']:
+                    # Рассчитываем СРЕДНЮЮ густоту породы (сумма плотностей / кол-во площадок)
+                    if data['plots'][0].get('type') == 'coniferous':
+                        # Для хвойных суммируем густоту по градациям и делим на кол-во площадок
+                        total_density = sum(
+                            (p.get('do_05_density', 0) + p.get('05_15_density', 0) + p.get('bolee_15_density', 0))
+                            for p in data['plots']
+                        ) / len(data['plots'])
+                    else:
+                        # Для лиственных обычная средняя густота
+                        total_density = sum(p.get('density', 0) for p in data['plots']) / len(data['plots'])
+                    
+                    total_density_all += total_density
+                    if total_density > 0:
+                        total_densities[breed_name] = total_density
+
+            # Расчет коэффициентов состава
+            composition_text = ""
+            if total_densities:
+                composition_parts = []
+
+                # Сортируем по убыванию плотности
+                for breed_name, density in sorted(total_densities.items(), key=lambda x: x[1], reverse=True):
+                    breed_letter = self.get_breed_letter(breed_name)
+                    # Просто добавляем букву, коэффициент будет рассчитан ниже
+                    composition_parts.append(f"0{breed_letter}")
+
+                # Корректировка чтобы сумма равнялась 10 (метод наибольшего остатка)
+                # Сначала рассчитываем точные коэффициенты
+                exact_coeffs = []
+                for breed_name, density in sorted(total_densities.items(), key=lambda x: x[1], reverse=True):
+                    exact_coeff = (density / total_density_all * 10) if total_density_all > 0 else 1
+                    exact_coeffs.append(exact_coeff)
+                
+                # Округляем вниз
+                coeffs_floor = [int(coeff) for coeff in exact_coeffs]
+                # Считаем остатки
+                remainders = [(exact_coeffs[i] - coeffs_floor[i], i) for i in range(len(exact_coeffs))]
+                # Сортируем по убыванию остатков
+                remainders.sort(reverse=True)
+                
+                # Распределяем единицы начиная с наибольших остатков
+                coeffs = coeffs_floor[:]
+                total = sum(coeffs)
+                i = 0
+                while total < 10 and i < len(remainders):
+                    idx = remainders[i][1]
+                    coeffs[idx] += 1
+                    total += 1
+                    i += 1
+                
+                # Обновляем composition_parts
+                sorted_breeds = sorted(total_densities.items(), key=lambda x: x[1], reverse=True)
+                composition_parts = []
+                for i, (breed_name, _) in enumerate(sorted_breeds):
+                    if i < len(coeffs):
+                        breed_letter = self.get_breed_letter(breed_name)
+                        composition_parts.append(f"{coeffs[i]}{breed_letter}")
+
+                composition_text = ''.join(composition_parts) + "Др"
+
+            # Расчет предмета ухода и интенсивности
+            care_data = []
+            total_density_all_plots = 0
+            total_remaining_density = 0
+            plot_count_with_care = 0
+
+            for plot in plots:
+                # Густота площадки (шт/га) по всем породам
+                plot_density = 0
+                for breed_info in plot.breeds:
+                    plot_density += breed_info.trees_count / plot_area_ha if plot_area_ha > 0 else 0
+
+                if plot_density > 0:
+                    total_density_all_plots += plot_density
+
+                if plot.predmet_uhoda:
+                    care_text = plot.predmet_uhoda.strip()
+                    if care_text:
+                        if plot_density > 0:
+                            remaining_density = self.parse_care_subject_density(care_text)
+                            if remaining_density > 0:
+                                care_data.append({
+                                    'care_text': care_text,
+                                    'plot_density': plot_density,
+                                    'remaining_density': remaining_density
+                                })
+                                total_remaining_density += remaining_density
+                                plot_count_with_care += 1
+
+            # Расчет среднего предмета ухода
+            care_subject = ""
+            intensity = 25.0  # По умолчанию
+
+            if care_data:
+                care_breed_totals = {}
+                care_plot_count = 0
+
+                for item in care_data:
+                    care_text = item['care_text']
+                    breed_densities = self.parse_care_subject_by_breeds(care_text)
+                    for breed, density in breed_densities.items():
+                        if breed not in care_breed_totals:
+                            care_breed_totals[breed] = 0
+                        care_breed_totals[breed] += density
+                    care_plot_count += 1
+
+                if care_breed_totals and care_plot_count > 0:
+                    avg_care_parts = []
+                    for breed, total_density in sorted(care_breed_totals.items()):
+                        avg_density = total_density / care_plot_count
+                        avg_care_parts.append(f"{avg_density * 1000:.0f}шт/га{breed}")
+                    care_subject = ''.join(avg_care_parts)
+
+                    # Расчет интенсивности
+                    if plot_count_with_care > 0:
+                        avg_remaining_density = total_remaining_density / plot_count_with_care
+                        # Используем среднюю густоту по площадкам для расчёта интенсивности
+                        num_plots = sum(1 for plot in plots if plot.is_filled)
+                        avg_overall_density_for_intensity = total_density_all_plots / num_plots if num_plots > 0 else 0
+
+                        if avg_overall_density_for_intensity > 0:
+                            intensity = ((avg_overall_density_for_intensity - avg_remaining_density) / avg_overall_density_for_intensity) * 100
+                            logger.debug("Интенсивность: %.1f - %.0f / %.1f = %.1f%%", avg_overall_density_for_intensity,
+                                         avg_remaining_density, avg_overall_density_for_intensity, intensity)
+
+            # Расчет средних значений по участку (ОБЩАЯ густота, высота, диаметр, возраст)
+            # ВАЖНО: Считаем по ПЛОЩАДКАМ, а не по породам!
+            # 1. Для каждой площадки: суммируем густоту по всем породам
+            # 2. Для каждой площадки: средние высота/диаметр/возраст по породам
+            # 3. Среднее по всем площадкам
+            
+            # Сначала собираем данные по площадкам из исходных строк
+            plot_data_list = []  # Список данных по каждой площадке
+            
+            for plot in plots:
+                if not plot.breeds:
+                    continue
+
+                # Данные по этой площадке
+                plot_total_density = 0
+                plot_height_sum = 0
+                plot_height_count = 0
+                plot_diameter_sum = 0
+                plot_diameter_count = 0
+                plot_age_sum = 0
+                plot_age_count = 0
+                    
+                for breed_info in plot.breeds:
+                    # Расчёт густоты
+                    density = breed_info.trees_count / plot_area_ha if plot_area_ha > 0 else 0
+
+                    # Высота для хвойных по градациям
+                    if breed_info.is_coniferous:
+                        height = breed_info.zone_height
+                    else:
+                        height = breed_info.height or 0
+
+                    diameter = breed_info.diameter or 0
+                    age = breed_info.age or 0
+
+                    # Суммируем по площадке
+                    plot_total_density += density
+                    if height > 0:
+                        plot_height_sum += height
+                        plot_height_count += 1
+                    if diameter > 0:
+                        plot_diameter_sum += diameter
+                        plot_diameter_count += 1
+                    if age > 0:
+                        plot_age_sum += age
+                        plot_age_count += 1
+
+                # Сохраняем данные площадки
+                plot_data_list.append({
+                    'density': plot_total_density,
+                    'height': plot_height_sum / plot_height_count if plot_height_count > 0 else 0,
+                    'diameter': plot_diameter_sum / plot_diameter_count if plot_diameter_count > 0 else 0,
+                    'age': plot_age_sum / plot_age_count if plot_age_count > 0 else 0
+                })
+
+            # Рассчитываем средние по ВСЕМ ПЛОЩАДКАМ
+            num_plots = len(plot_data_list)
+            
+            if num_plots > 0:
+                avg_overall_density = sum(p['density'] for p in plot_data_list) / num_plots
+                avg_overall_height = sum(p['height'] for p in plot_data_list) / num_plots
+                avg_overall_diameter = sum(p['diameter'] for p in plot_data_list) / num_plots
+                avg_overall_age = sum(p['age'] for p in plot_data_list) / num_plots
+            else:
+                avg_overall_density = 0
+                avg_overall_height = 0
+                avg_overall_diameter = 0
+                avg_overall_age = 0
+
+            # Формируем итоговые данные
+            total_data = {
+                'page_number': self.current_page,
+                'section_name': self.current_section or '',
+                'total_composition': composition_text,
+                'avg_age': avg_overall_age,
+                'avg_density': avg_overall_density,
+                'avg_height': avg_overall_height,
+                'avg_diameter': avg_overall_diameter,  # РАССЧИТЫВАЕМ!
+                'total_plots': sum(1 for plot in plots if plot.is_filled),
+                'composition': composition_text,
+                'care_subject': care_subject,
+                'intensity': intensity if intensity > 0 else 25,  # Если не рассчитана, по умолчанию 25%
+                'breeds': []
+            }
+
+            # Добавляем данные по породам
+            for breed_name, data in breeds_data.items():
+                if data['plots']:
+                    avg_density = sum(p['density'] for p in data['plots']) / len(data['plots'])
+                    avg_height = sum(p['height'] for p in data['plots'] if p['height'] > 0) / len([p for p in data['plots'] if p['height'] > 0]) if any(p['height'] > 0 for p in data['plots']) else 0
+                    avg_age = sum(p['age'] for p in data['plots'] if p['age'] > 0) / len([p for p in data['plots'] if p['age'] > 0]) if any(p['age'] > 0 for p in data['plots']) else 0
+                    avg_diameter = sum(p.get('diameter', 0) for p in data['plots'] if p.get('diameter', 0) > 0) / len([p for p in data['plots'] if p.get('diameter', 0) > 0]) if any(p.get('diameter', 0) > 0 for p in data['plots']) else 0
+
+                    breed_data = {
+                        'name': breed_name,
+                        'type': data['type'],
+                        'density': avg_density,
+                        'height': avg_height,
+                        'age': avg_age,
+                        'diameter': avg_diameter  # ДОБАВЛЯЕМ ДИАМЕТР!
+                    }
+
+                    if data['type'] == 'coniferous':
+                        zones = data.get('coniferous_zones', {})
+                        breed_data.update({
+                            'do_05': zones.get('do_05', 0) / len(data['plots']) if data['plots'] else 0,
+                            '_05_15': zones.get('05_15', 0) / len(data['plots']) if data['plots'] else 0,
+                            'bolee_15': zones.get('bolee_15', 0) / len(data['plots']) if data['plots'] else 0
+                        })
+
+                    total_data['breeds'].append(breed_data)
+
+            return total_data
+
+        except Exception as e:
+            print(f"Ошибка получения данных из меню Итого: {e}")
+            import traceback
+            traceback.print_exc()
+            return {}
+
+    @timed('totals.calculate_section_totals')
+    def calculate_section_totals(self):
+        """Расчет итогов по всему разделу (все страницы)
+
+        Суммы ведутся инкрементально в plot_store.totals: при изменении
+        площадки вычитается её старый вклад и добавляется новый.
+        """
+        current_radius = float(self.current_radius) if self.current_radius else 5.64
+        plot_area_m2 = 3.14159 * (current_radius ** 2)  # Площадь пробной площади в м²
+        return self.plot_store.totals.snapshot(plot_area_m2)
+
+    def parse_care_subject_density(self, care_text):
+        """Парсит предмет ухода и возвращает оставляемую густоту на гектар"""
+        if not care_text:
+            return 0
+
+        care_text = care_text.strip().upper()
+
+        # Регулярное выражение для поиска чисел и букв
+        # Примеры: "3С", "2Б1С", "1Е0.5С" и т.д.
+        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
+
+        if not matches:
+            return 0
+
+        total_density = 0
+        for number_str, breed_code in matches:
+            try:
+                density = float(number_str)
+                total_density += density
+            except ValueError:
+                continue
+
+        # Предмет ухода показывает сколько деревьев оставить на гектар
+        # Например, "3С" значит оставить 3000 сосен на гектар
+        return total_density * 1000  # Умножаем на 1000, так как числа обычно означают тысячи деревьев
+
+    def parse_care_subject_by_breeds(self, care_text):
+        """Парсит предмет ухода и возвращает словарь {порода: густота в тыс. шт/га}"""
+        if not care_text:
+            return {}
+
+        care_text = care_text.strip().upper()
+
+        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
+
+        if not matches:
+            return {}
+
+        breed_densities = {}
+        for number_str, breed_code in matches:
+            try:
+                density = float(number_str)
+                if breed_code not in breed_densities:
+                    breed_densities[breed_code] = 0
+                breed_densities[breed_code] += density
+            except ValueError:
+                continue
+
+        return breed_densities
+
+    def get_breed_letter(self, breed_name):
+        """Получение первой буквы для коэффициента состава породы"""
+        breed_letters = {
+            'Сосна': 'С',
+            'Ель': 'Е',
+            'Пихта': 'П',
+            'Кедр': 'К',
+            'Лиственница': 'Л',
+            'Берёза': 'Б',
+            'Осина': 'Ос',
+            'Ольха чёрная': 'ОЧ',
+            'Ольха серая': 'ОС',
+            'Ива': 'И',
+            'Ива кустарниковая': 'ИК'
+        }
+
+        for full_name, letter in breed_letters.items():
+            if full_name.lower() in breed_name.lower():
+                return letter
+
+        # Возвращаем первую букву имени породы, если не найдено
+        return breed_name[0].upper() if breed_name else 'Н'
+
+    @timed('export.json')
+    def save_to_json(self, instance=None, total_data=None):
+        """Сохранение данных в JSON формате"""
+        # Получаем итоговые данные (total_data) из меню Итого
+        if total_data is None:
+            total_data = self.get_total_data_from_db()
+
+        data = {
+            'page_data': self.page_data,
+            'section': self.current_section,
+            'quarter': self.current_quarter,
+            'plot': self.current_plot,
+            'forestry': self.current_forestry,
+            'radius': self.current_radius,
+            'project_data': self.project_data,  # Данные проекта
+            'total_data': total_data,  # ✅ ДОБАВЛЕНО: итоговые данные с породами
+            'export_date': datetime.datetime.now().isoformat()
+        }
+
+        timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
+        document_name = self.project_data.get('document_name', 'Проект')
+        # Очень короткое имя файла на основе названия проекта (макс 10 символов)
+        short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
+        filename = f"{short_name}_{self.current_section}_{timestamp}.json"
+        full_path = os.path.join(self.reports_dir, filename)
+
+        try:
+            check_cancelled()
+            with open(full_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            return f"JSON: {filename}", None
+        except Exception as e:
+            return None, f"Ошибка сохранения JSON: {str(e)}"
+
+    def report_address_text(self):
+        """Адрес участка одной строкой для заголовка отчёта"""
+        address_parts = []
+        if self.current_quarter:
+            address_parts.append(f"Квартал: {self.current_quarter}")
+        if self.current_plot:
+            address_parts.append(f"Выдел: {self.current_plot}")
+        if self.current_forestry:
+            address_parts.append(f"Лесничество: {self.current_forestry}")
+        if self.current_radius:
+            address_parts.append(f"Радиус: {self.current_radius} м")
+
+        return " | ".join(address_parts) if address_parts else "Адрес не указан"
+
+    def iter_report_rows(self):
+        """Строки ведомости для отчётов: по строке на каждую породу площадки"""
+        for page in sorted(self.page_data.keys()):
+            # Отмена фоновой выгрузки — между страницами
+            check_cancelled()
+            for row in self.page_data[page]:
+                if not any(cell for cell in row[:3] if cell):  # Проверяем, что основные столбцы не пустые
+                    continue
+                try:
+                    breeds_data = json.loads(row[3]) if row[3] else []
+                except (json.JSONDecodeError, TypeError):
+                    breeds_data = []
+
+                if isinstance(breeds_data, list) and breeds_data:
+                    for breed_info in breeds_data:
+                        if isinstance(breed_info, dict):
+                            breed_name = breed_info.get('name', 'Неизвестная')
+                            density = breed_info.get('density', '')
+                            height = breed_info.get('height', '')
+                            age = breed_info.get('age', '')
+
+                            # Инициализируем градации
+                            do_05 = ''
+                            _05_15 = ''
+                            bolee_15 = ''
+
+                            if breed_info.get('type') == 'coniferous':
+                                # Для хвойных заполняем градации
+                                do_05 = str(breed_info.get('do_05', ''))
+                                _05_15 = str(breed_info.get('05_15', ''))
+                                bolee_15 = str(breed_info.get('bolee_15', ''))
+                                # Густота оставляем пустой для хвойных
+                                density = ''
+
+                            yield [
+                                row[0],  # №ППР
+                                row[1],  # GPS точка
+                                row[2],  # Предмет ухода
+                                breed_name,  # Порода
+                                str(density) if density else '',  # Густота
+                                do_05,  # До 0.5м
+                                _05_15,  # 0.5-1.5м
+                                bolee_15,  # >1.5м
+                                str(height) if height else '',  # Высота
+                                str(age) if age else '',  # Возраст
+                                row[4],  # Примечания
+                                row[5],  # Тип Леса
+                            ]
+                else:
+                    # Если нет пород, добавить строку без данных
+                    yield [row[0], row[1], row[2], '', '', '', '', '', '', '', row[4], row[5]]
+
+    @timed('export.excel')
+    def save_to_excel_without_dialog(self):
+        """Сохранение в Excel без диалога (потоковая запись)"""
+        from core.excel_stream import new_workbook, StreamingSheet
+
+        timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
+        document_name = self.project_data.get('document_name', 'Проект')
+        # Очень короткое имя файла на основе названия проекта (макс 10 символов)
+        short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
+        filename = f"{short_name}_{self.current_section}_{timestamp}.xlsx"
+        full_path = os.path.join(self.reports_dir, filename)
+
+        try:
+            wb = new_workbook()
+            sheet = StreamingSheet(wb, "Молодняки")
+
+            address_text = self.report_address_text()
+
+            # Расчет площади перечета
+            current_radius = float(self.current_radius) if self.current_radius else 5.64
+            plot_area_m2 = 3.14159 * (current_radius ** 2)
+            plot_area_ha = plot_area_m2 / 10000
+            plot_count = len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)])
+            total_plot_area_ha = plot_count * plot_area_ha
+
+            def rows():
+                yield [sheet.cell(f"Адрес: {address_text}", font=openpyxl.styles.Font(bold=True, size=12))]
+                yield [sheet.cell(f"Площадь перечета: {total_plot_area_ha:.4f} га ({total_plot_area_ha*10000:.0f} м²) - {plot_count} площадок по {plot_area_ha:.4f} га каждая",
+                                  font=openpyxl.styles.Font(bold=True, size=10))]
+                yield sheet.header(REPORT_HEADERS)
+                yield from self.iter_report_rows()
+
+            sheet.write(rows)
+
+            check_cancelled()
+            wb.save(full_path)
+            return f"Excel: {filename}", None
+        except Exception as e:
+            return None, f"Ошибка сохранения Excel: {str(e)}"
+
+    @timed('export.word')
+    def save_to_word_without_dialog(self):
+        """Сохранение в Word без диалога"""
+        try:
+            from docx import Document
+
+            timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
+            document_name = self.project_data.get('document_name', 'Проект')
+            # Очень короткое имя файла на основе названия проекта (макс 10 символов)
+            short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
+            filename = f"{short_name}_{self.current_section}_{timestamp}.docx"
+            full_path = os.path.join(self.reports_dir, filename)
+
+            doc = Document()
+            doc.add_heading(f'Расширенный отчет по молоднякам - Участок {self.current_section}', 0)
+
+            # Расчет площади перечета
+            current_radius = float(self.current_radius) if self.current_radius else 5.64
+            plot_area_m2 = 3.14159 * (current_radius ** 2)
+            plot_area_ha = plot_area_m2 / 10000
+            plot_count = len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)])
+            total_plot_area_ha = plot_count * plot_area_ha
+
+            # Добавляем информацию о площади перечета
+            doc.add_paragraph(f"Площадь перечета: {total_plot_area_ha:.4f} га ({total_plot_area_ha*10000:.0f} м²) - {plot_count} площадок по {plot_area_ha:.4f} га каждая")
+
+            table = doc.add_table(rows=1, cols=len(REPORT_HEADERS))
+            table.style = 'Table Grid'
+
+            hdr_cells = table.rows[0].cells
+            for i, header in enumerate(REPORT_HEADERS):
+                hdr_cells[i].text = header
+
+            # Те же строки, что в Excel и PDF; отмена проверяется в итераторе
+            for report_row in self.iter_report_rows():
+                row_cells = table.add_row().cells
+                for i, value in enumerate(report_row):
+                    row_cells[i].text = str(value) if value else ""
+
+            check_cancelled()
+            doc.save(full_path)
+            return f"Word: {filename}", None
+        except ImportError:
+            return None, "Для сохранения в Word установите библиотеку python-docx: pip install python-docx"
+        except Exception as e:
+            return None, f"Ошибка сохранения Word: {str(e)}"
+
+    @timed('export.pdf')
+    def save_to_pdf_without_dialog(self, total_data=None):
+        """Сохранение ведомости и итогов в PDF без диалога"""
+        try:
+            from core.pdf_export import export_molodniki_to_pdf
+
+            if total_data is None:
+                total_data = self.get_total_data_from_db()
+
+            timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
+            document_name = self.project_data.get('document_name', 'Проект')
+            # Очень короткое имя файла на основе названия проекта (макс 10 символов)
+            short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
+            filename = f"{short_name}_{self.current_section}_{timestamp}.pdf"
+            full_path = os.path.join(self.reports_dir, filename)
+
+            export_molodniki_to_pdf(full_path, self.current_section, f"Адрес: {self.report_address_text()}",
+                                    REPORT_HEADERS, self.iter_report_rows(), total_data)
+            return f"PDF: {filename}", None
+        except ImportError:
+            return None, "Для сохранения в PDF установите библиотеку reportlab: pip install reportlab"
+        except Exception as e:
+            return None, f"Ошибка сохранения PDF: {str(e)}"
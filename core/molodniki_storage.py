@@ -0,0 +1,239 @@
+"""
+Хранение участка молодняков в SQLite без интерфейса.
+
+MolodnikiStorage обновляет схему базы, загружает участок, сохраняет
+страницу (только изменившиеся строки) и настройки участка. Нужны
+атрибуты db_name, current_section, current_page, page_data, plot_store,
+dirty_rows, current_radius, plot_area_input и методы show_success,
+show_error, load_page_data; их даёт экран молодняков или
+HeadlessSection из batch_reports.py.
+"""
+from core.database import get_connection
+from core.migrations import migrate
+from core.molodniki_breeds import breed_rows, insert_breed_rows
+from core.plot_geo import plot_coords
+from core.section_stats import refresh_section_stats
+from core.timing import timed
+
+
+class MolodnikiStorage:
+    """Схема БД молодняков, загрузка участка и сохранение страницы"""
+
+    @timed('db.setup_database')
+    def setup_database(self):
+        """Довести схему базы до текущей версии (core/migrations.py)"""
+        migrate(self.db_name)
+
+    @timed('db.load_existing_data')
+    def load_existing_data(self):
+        """Загружаем существующие данные из базы данных"""
+        conn = get_connection(self.db_name)
+        cursor = conn.cursor()
+        # Сохранённое состояние строк читается заново вместе с участком
+        self.dirty_rows.reset()
+
+        try:
+            # Загружаем настройки участка
+            cursor.execute('''
+                SELECT radius, plot_area FROM molodniki_settings
+                WHERE section_name = ?
+            ''', (self.current_section,))
+
+            settings_row = cursor.fetchone()
+            if settings_row:
+                self.current_radius = str(settings_row[0]) if settings_row[0] else "5.64"
+                self.plot_area_input = str(settings_row[1]) if settings_row[1] else ""
+
+            # Весь участок одним запросом; строки идут по страницам подряд
+            cursor.execute('''
+                SELECT id, page_number, row_index, nn, gps_point, predmet_uhoda, poroda, primechanie, radius
+                FROM molodniki_data
+                WHERE section_name = ?
+                ORDER BY page_number, row_index, id
+            ''', (self.current_section,))
+
+            page_numbers = []
+            page_data = None
+            saved_rows = None
+            for row_id, page_num, row_idx, *cells in cursor:
+                if not page_numbers or page_num != page_numbers[-1]:
+                    if page_numbers:
+                        self._store_loaded_page(page_numbers[-1], page_data, saved_rows)
+                    page_numbers.append(page_num)
+                    page_data = []
+                    saved_rows = {}
+
+                while len(page_data) <= row_idx:
+                    page_data.append(['', '', '', '', '', ''])
+                page_data[row_idx] = [str(cell) if cell is not None else '' for cell in cells]
+                saved_rows.setdefault(row_idx, []).append((row_id, page_data[row_idx]))
+
+            if page_numbers:
+                self._store_loaded_page(page_numbers[-1], page_data, saved_rows)
+                self.plot_store.rebuild(self.page_data)
+                self.current_page = min(page_numbers)
+                self.load_page_data()
+
+        except Exception as e:
+            print(f"Error loading existing data: {e}")
+            self.show_error(f"Ошибка загрузки данных из базы: {str(e)}")
+        finally:
+            conn.close()
+
+    def replace_page_data(self, page_data):
+        """Заменить данные участка целиком (загрузка из JSON или Excel, очистка).
+
+        plot_store пересобирается, а dirty_rows сбрасывается: иначе итоги
+        и сохранение опирались бы на прежние строки.
+        """
+        self.page_data.clear()
+        self.page_data.update(page_data)
+        self.plot_store.rebuild(self.page_data)
+        self.dirty_rows.reset()
+
+    def _store_loaded_page(self, page_num, page_data, saved_rows):
+        """Положить прочитанную из БД страницу в page_data и dirty_rows"""
+        self.page_data[page_num] = page_data
+        # Дубли строк в БД вычищаются при первом сохранении страницы
+        if all(len(entries) == 1 for entries in saved_rows.values()):
+            self.dirty_rows.load_page(self.current_section, page_num,
+                                      {idx: entries[0] for idx, entries in saved_rows.items()})
+
+    @timed('db.save_current_page')
+    def save_current_page(self, instance=None):
+        """Сохраняем текущую страницу в базу данных
+
+        Пишутся только строки, изменившиеся с прошлого сохранения
+        (self.dirty_rows); породы изменённых строк записываются пакетно.
+        """
+        self.plot_store.sync_page(self.page_data, self.current_page)
+
+        conn = get_connection(self.db_name)
+        cursor = conn.cursor()
+        section = self.current_section
+        page = self.current_page
+
+        try:
+            if not self.dirty_rows.has_page(section, page):
+                # Состояние страницы в БД ещё неизвестно — читаем его один раз
+                cursor.execute('''
+                    SELECT id, row_index, nn, gps_point, predmet_uhoda, poroda, primechanie, radius
+                    FROM molodniki_data
+                    WHERE page_number = ? AND section_name = ?
+                    ORDER BY id
+                ''', (page, section))
+                saved_rows = {}
+                duplicate_ids = []
+                for row_id, row_idx, *cells in cursor.fetchall():
+                    if row_idx in saved_rows:
+                        duplicate_ids.append((row_id,))
+                        continue
+                    saved_rows[row_idx] = (row_id, [str(c) if c is not None else '' for c in cells])
+                if duplicate_ids:
+                    cursor.executemany('DELETE FROM molodniki_breeds WHERE molodniki_data_id = ?', duplicate_ids)
+                    cursor.executemany('DELETE FROM molodniki_data WHERE id = ?', duplicate_ids)
+                self.dirty_rows.load_page(section, page, saved_rows)
+
+            upserts, deletes = self.dirty_rows.diff(section, page, self.page_data.get(page, []))
+
+            if deletes:
+                # id из dirty_rows удаляются только вместе со своим участком и
+                # страницей: после восстановления базы id могли занять чужие строки
+                delete_ids = [(row_id, section, page) for _, row_id in deletes]
+                cursor.executemany('''
+                    DELETE FROM molodniki_breeds WHERE molodniki_data_id IN (
+                        SELECT id FROM molodniki_data WHERE id = ? AND section_name = ? AND page_number = ?)
+                ''', delete_ids)
+                cursor.executemany('DELETE FROM molodniki_data WHERE id = ? AND section_name = ? AND page_number = ?',
+                                   delete_ids)
+
+            saved = []
+            breed_owner_ids = []
+            new_breeds = []
+            for row_idx, row_data, row_id, old_cells in upserts:
+                radius = 5.64
+                try:
+                    if row_data[5]:
+                        radius = float(row_data[5])
+                except (ValueError, IndexError):
+                    pass
+
+                values = (
+                    row_data[0] or None,
+                    row_data[1] or None,
+                    row_data[2] or None,
+                    row_data[3] or None,
+                    row_data[4] or None,
+                    radius,
+                ) + plot_coords(row_data[1])
+                if row_id is not None:
+                    cursor.execute('''
+                        UPDATE molodniki_data
+                        SET nn = ?, gps_point = ?, predmet_uhoda = ?, poroda = ?, primechanie = ?, radius = ?,
+                            lat = ?, lon = ?, x = ?, y = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ? AND section_name = ? AND page_number = ? AND row_index = ?
+                    ''', values + (row_id, section, page, row_idx))
+                    if cursor.rowcount == 0:
+                        # Строки с этим id на странице больше нет — записываем заново
+                        row_id, old_cells = None, None
+                if row_id is None:
+                    cursor.execute('''
+                        INSERT INTO molodniki_data
+                        (nn, gps_point, predmet_uhoda, poroda, primechanie, radius, lat, lon, x, y,
+                         page_number, row_index, section_name)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', values + (page, row_idx, section))
+                    row_id = cursor.lastrowid
+                saved.append((row_idx, row_id, row_data))
+
+                # Породы переписываем только если изменились порода или радиус
+                if old_cells is not None and old_cells[3] == row_data[3] and old_cells[5:6] == row_data[5:6]:
+                    continue
+                if old_cells is not None:
+                    breed_owner_ids.append((row_id,))
+
+                plot = self.plot_store.update_row(page, row_idx, row_data)
+                new_breeds.extend(breed_rows(row_id, radius, plot.breeds))
+
+            if breed_owner_ids:
+                cursor.executemany('DELETE FROM molodniki_breeds WHERE molodniki_data_id = ?', breed_owner_ids)
+            insert_breed_rows(cursor, new_breeds)
+            if upserts or deletes:
+                refresh_section_stats(cursor, section)
+
+            conn.commit()
+
+            for row_idx, _ in deletes:
+                self.dirty_rows.mark_deleted(section, page, row_idx)
+            for row_idx, row_id, row_data in saved:
+                self.dirty_rows.mark_saved(section, page, row_idx, row_id, row_data)
+
+            self.show_success("Страница сохранена в базу данных!")
+            success = True
+
+        except Exception as e:
+            conn.rollback()
+            self.show_error(f"Ошибка сохранения: {str(e)}")
+            success = False
+        finally:
+            conn.close()
+
+        return success
+
+    def save_settings_to_db(self):
+        """Сохранить настройки участка в базу данных.
+
+        Густота пород считается по радиусу из molodniki_settings, поэтому
+        сводка участка пересчитывается в той же транзакции.
+        """
+        conn = get_connection(self.db_name)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO molodniki_settings (section_name, radius, plot_area, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (self.current_section, self.current_radius, self.plot_area_input))
+        refresh_section_stats(cursor, self.current_section)
+
+        conn.commit()
+        conn.close()
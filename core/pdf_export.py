@@ -100,3 +100,104 @@ def export_table_to_pdf(screen, filename=None):
         return filename
     except Exception as e:
         raise e
+
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'fonts', 'Roboto-Medium.ttf')
+
+
+def _cyrillic_font():
+    """Шрифт с кириллицей из fonts/; Helvetica, если файла нет"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    if 'Roboto' in pdfmetrics.getRegisteredFontNames():
+        return 'Roboto'
+    if not os.path.exists(FONT_PATH):
+        return 'Helvetica'
+    pdfmetrics.registerFont(TTFont('Roboto', FONT_PATH))
+    return 'Roboto'
+
+
+def export_molodniki_to_pdf(filename, section, address_text, headers, rows, total_data=None):
+    """Ведомость молодняков и итоги по участку в PDF (альбомный A4)"""
+    font = _cyrillic_font()
+    doc = SimpleDocTemplate(filename, pagesize=landscape(A4),
+                            leftMargin=1*cm, rightMargin=1*cm, topMargin=1*cm, bottomMargin=1*cm)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    title_style = ParagraphStyle('MolTitle', parent=styles['Title'], fontName=font,
+                                 fontSize=16, spaceAfter=8, alignment=TA_CENTER,
+                                 textColor=colors.HexColor('#2E7D32'))
+    heading_style = ParagraphStyle('MolHeading', parent=styles['Heading2'], fontName=font,
+                                   fontSize=12, spaceAfter=8, spaceBefore=12,
+                                   textColor=colors.HexColor('#1565C0'))
+    normal_style = ParagraphStyle('MolNormal', parent=styles['Normal'], fontName=font,
+                                  fontSize=9, spaceAfter=4, alignment=TA_LEFT)
+
+    elements.append(Paragraph(f'Молодняки — Участок {section}', title_style))
+    elements.append(Paragraph(address_text, normal_style))
+    elements.append(Spacer(1, 4*mm))
+
+    data_table = [list(headers)]
+    for row in rows:
+        data_table.append([str(c) if c else '' for c in row])
+    if len(data_table) > 1:
+        t = Table(data_table, colWidths=[(27.7 / len(headers))*cm] * len(headers), repeatRows=1)
+        t.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E7D32')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5F5')]),
+        ]))
+        elements.append(t)
+
+    if total_data:
+        elements.append(PageBreak())
+        elements.append(Paragraph('Итоги по участку', heading_style))
+        summary_data = [
+            ['Показатель', 'Значение'],
+            ['Состав', total_data.get('composition', '') or '-'],
+            ['Площадок', str(total_data.get('total_plots', 0))],
+            ['Средняя густота', f'{total_data.get("avg_density", 0):.0f} шт/га'],
+            ['Средняя высота', f'{total_data.get("avg_height", 0):.1f} м'],
+            ['Средний диаметр', f'{total_data.get("avg_diameter", 0):.1f} см'],
+            ['Средний возраст', f'{total_data.get("avg_age", 0):.0f} лет'],
+            ['Предмет ухода', total_data.get('care_subject', '') or '-'],
+            ['Интенсивность', f'{total_data.get("intensity", 0):.1f} %'],
+        ]
+        summary_table = Table(summary_data, colWidths=[6*cm, 8*cm])
+        summary_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1565C0')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        elements.append(summary_table)
+
+        breeds = total_data.get('breeds', [])
+        if breeds:
+            elements.append(Paragraph('По породам', heading_style))
+            breeds_data = [['Порода', 'Густота, шт/га', 'H ср, м', 'D ср, см', 'Возраст, лет']]
+            for breed in breeds:
+                breeds_data.append([breed['name'], f'{breed["density"]:.0f}', f'{breed["height"]:.1f}',
+                                    f'{breed.get("diameter", 0):.1f}', f'{breed["age"]:.0f}'])
+            breeds_table = Table(breeds_data, colWidths=[4*cm, 3.5*cm, 3*cm, 3*cm, 3*cm])
+            breeds_table.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), font),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E7D32')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ]))
+            elements.append(breeds_table)
+
+    doc.build(elements)
+    return filename
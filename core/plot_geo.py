@@ -0,0 +1,156 @@
+"""
+Координаты площадок молодняков.
+
+Текст ячейки «GPS точка» разбирается при сохранении строки в числовые
+lat, lon (и x, y веб-Меркатора для кластеров карты) в molodniki_data.
+R-tree plot_coords_rtree и таблица plot_clusters поддерживаются
+триггерами (core/map_points.py), поэтому поиск ближайших площадок и
+площадок в радиусе просматривает только точки рядом с заданной.
+"""
+import math
+import re
+
+from core.database import DB_NAME, get_connection
+from core.map_points import bbox_query, create_point_clusters, create_point_index, mercator
+
+
+EARTH_RADIUS_M = 6371008.8
+# Начальный радиус поиска ближайших площадок, м; растёт в SEARCH_GROWTH раз
+SEARCH_START_M = 250
+SEARCH_GROWTH = 4
+
+# Полушария: латиница и кириллица (С, Ю, В, З)
+HEMISPHERES = str.maketrans({'С': 'N', 'Ю': 'S', 'В': 'E', 'З': 'W'})
+_PART = (r"([NSEW])?\s*(-)?(\d{1,3}(?:[.,]\d+)?)\s*"
+         r"(?:°\s*(?:(\d{1,2}(?:[.,]\d+)?)\s*'\s*(?:(\d{1,2}(?:[.,]\d+)?)\s*\")?)?)?\s*([NSEW])?")
+GPS_RE = re.compile(rf'^\s*{_PART}\s*[,;\s]\s*{_PART}\s*$')
+COORD_MARK_RE = re.compile(r'[°NSEW]|\d[.,]\d')
+
+
+def _number(text):
+    return float(text.replace(',', '.')) if text else 0.0
+
+
+def _coordinate(groups):
+    before, minus, degrees, minutes, seconds, after = groups
+    value = _number(degrees) + _number(minutes) / 60 + _number(seconds) / 3600
+    hemisphere = before or after
+    if minus or hemisphere in ('S', 'W'):
+        value = -value
+    return value, hemisphere
+
+
+def parse_gps(text):
+    """(lat, lon) из текста ячейки или None.
+
+    Понимает десятичные градусы («55.7558, 37.6173», «55,7558 37,6173»),
+    градусы с минутами и градусы-минуты-секунды («55°45′30″N 37°37′E»),
+    полушария латиницей или кириллицей до или после числа.
+    """
+    if not text:
+        return None
+    normalized = (str(text).upper().translate(HEMISPHERES)
+                  .replace('º', '°').replace('′', "'").replace('’', "'")
+                  .replace('″', '"').replace('”', '"').replace("''", '"'))
+    match = GPS_RE.match(normalized)
+    # «12 3» — скорее номера, чем координаты
+    if not match or not COORD_MARK_RE.search(normalized):
+        return None
+    (first, first_hemisphere), (second, second_hemisphere) = \
+        _coordinate(match.groups()[:6]), _coordinate(match.groups()[6:])
+    if first_hemisphere in ('E', 'W') or second_hemisphere in ('N', 'S'):
+        first, second = second, first
+    if abs(first) > 90 or abs(second) > 180:
+        return None
+    return first, second
+
+
+def plot_coords(gps_text):
+    """lat, lon, x, y для строки molodniki_data (None, если точка не разобрана)"""
+    point = parse_gps(gps_text)
+    if point is None:
+        return None, None, None, None
+    return point + mercator(*point)
+
+
+def create_plot_coords_schema(cursor):
+    """Столбцы координат площадок, их заполнение, R-tree и кластеры"""
+    existing = {row[1] for row in cursor.execute('PRAGMA table_info(molodniki_data)')}
+    for column in ('lat', 'lon', 'x', 'y'):
+        if column not in existing:
+            cursor.execute(f'ALTER TABLE molodniki_data ADD COLUMN {column} REAL')
+    cursor.execute("SELECT id, gps_point FROM molodniki_data WHERE gps_point IS NOT NULL AND gps_point != ''")
+    rows = [plot_coords(gps) + (row_id,) for row_id, gps in cursor.fetchall()]
+    cursor.executemany('UPDATE molodniki_data SET lat = ?, lon = ?, x = ?, y = ? WHERE id = ?', rows)
+    create_point_clusters(cursor, 'molodniki_data', 'plot_clusters')
+    create_point_index(cursor, 'molodniki_data', 'plot_coords_rtree', 'plot_coords')
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу (гаверсинус), метры"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _bbox(lat, lon, radius_m):
+    """Прямоугольник, содержащий круг radius_m вокруг точки"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    cos_lat = min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+    dlon = dlat / cos_lat if cos_lat > 1e-6 else 360.0
+    if south <= -90.0 or north >= 90.0 or lon - dlon < -180.0 or lon + dlon > 180.0:
+        # Полюс или линия перемены дат: по долготе без ограничения
+        return south, -180.0, north, 180.0
+    return south, lon - dlon, north, lon + dlon
+
+
+COLUMNS = ('id', 'section_name', 'page_number', 'row_index', 'nn', 'gps_point', 'lat', 'lon')
+
+
+def _candidates(cursor, lat, lon, radius_m, section, unfinished):
+    south, west, north, east = _bbox(lat, lon, radius_m)
+    tail = ''
+    params = {'south': south, 'west': west, 'north': north, 'east': east}
+    if section is not None:
+        tail += 'AND c.section_name = :section '
+        params['section'] = section
+    if unfinished:
+        # Незаполненная площадка — без пород
+        tail += 'AND NOT EXISTS (SELECT 1 FROM molodniki_breeds b WHERE b.molodniki_data_id = c.id) '
+    cursor.execute(bbox_query(cursor, 'molodniki_data', 'plot_coords_rtree',
+                              ', '.join(f'c.{column}' for column in COLUMNS), tail), params)
+    found = []
+    for row in cursor.fetchall():
+        plot = dict(zip(COLUMNS, row))
+        plot['distance_m'] = distance_m(lat, lon, plot['lat'], plot['lon'])
+        if plot['distance_m'] <= radius_m:
+            found.append(plot)
+    found.sort(key=lambda plot: plot['distance_m'])
+    return found
+
+
+def plots_within(lat, lon, radius_m, section=None, unfinished=False, limit=None, db_path=DB_NAME):
+    """Площадки не дальше radius_m метров, ближние первыми.
+
+    Словари с id, section_name, page_number, row_index, nn, gps_point,
+    lat, lon, distance_m. unfinished — только площадки без пород.
+    """
+    found = _candidates(get_connection(db_path).cursor(), lat, lon, radius_m, section, unfinished)
+    return found[:limit] if limit else found
+
+
+def nearest_plots(lat, lon, k=1, section=None, unfinished=False, db_path=DB_NAME):
+    """k ближайших площадок (как plots_within).
+
+    Радиус поиска растёт от SEARCH_START_M, пока в круге не окажется k
+    площадок: все площадки ближе найденной k-й тоже лежат в этом круге.
+    """
+    cursor = get_connection(db_path).cursor()
+    radius = SEARCH_START_M
+    while True:
+        found = _candidates(cursor, lat, lon, radius, section, unfinished)
+        if len(found) >= k or radius >= math.pi * EARTH_RADIUS_M:
+            return found[:k]
+        radius *= SEARCH_GROWTH
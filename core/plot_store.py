@@ -0,0 +1,204 @@
+"""
+Типизированное хранилище площадок молодняков.
+
+JSON пород из столбца «Порода» разбирается один раз на строку и
+хранится рядом с page_data; повторный разбор выполняется только
+при изменении ячеек строки.
+"""
+import json
+import re
+
+from core.section_totals import SectionTotals
+
+
+COMPOSITION_RE = re.compile(r'(\d+)([А-ЯA-Z])')
+
+
+def to_number(value):
+    """Привести значение из JSON к числу (int/float), иначе 0"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = value.strip().replace(',', '.')
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def parse_breeds_text(breeds_text):
+    """Разобрать JSON пород в список словарей (как parse_breeds_data)"""
+    if not breeds_text or not isinstance(breeds_text, str):
+        return []
+    try:
+        if breeds_text.startswith('['):
+            parsed = json.loads(breeds_text)
+            return parsed if isinstance(parsed, list) else []
+        elif breeds_text.startswith('{'):
+            return [json.loads(breeds_text)]
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return []
+
+
+def parse_composition(text):
+    """Разобрать состав вида «7С3Б» в словарь {буква: коэффициент}"""
+    composition = {}
+    if isinstance(text, str):
+        for count, breed in COMPOSITION_RE.findall(text.upper()):
+            composition[breed] = int(count)
+    return composition
+
+
+class BreedRecord:
+    """Одна порода на площадке с уже приведёнными к числам значениями"""
+    __slots__ = ('name', 'type', 'do_05', '_05_15', 'bolee_15',
+                 'density', 'height', 'diameter', 'age')
+
+    def __init__(self, name='', type='deciduous', do_05=0, _05_15=0, bolee_15=0,
+                 density=0, height=0, diameter=0, age=0):
+        self.name = name
+        self.type = type
+        self.do_05 = do_05
+        self._05_15 = _05_15
+        self.bolee_15 = bolee_15
+        self.density = density
+        self.height = height
+        self.diameter = diameter
+        self.age = age
+
+    @classmethod
+    def from_dict(cls, breed_info):
+        return cls(
+            name=str(breed_info.get('name', '') or '').strip(),
+            type=breed_info.get('type', 'deciduous') or 'deciduous',
+            do_05=to_number(breed_info.get('do_05', 0)),
+            _05_15=to_number(breed_info.get('05_15', 0)),
+            bolee_15=to_number(breed_info.get('bolee_15', 0)),
+            density=to_number(breed_info.get('density', 0)),
+            height=to_number(breed_info.get('height', 0)),
+            diameter=to_number(breed_info.get('diameter', 0)),
+            age=to_number(breed_info.get('age', 0)),
+        )
+
+    @property
+    def is_coniferous(self):
+        return self.type == 'coniferous'
+
+    @property
+    def zones_total(self):
+        """Сумма деревьев по градациям высоты (для хвойных)"""
+        return self.do_05 + self._05_15 + self.bolee_15
+
+    @property
+    def trees_count(self):
+        """Количество деревьев на площадке: градации у хвойных, густота у лиственных"""
+        return self.zones_total if self.is_coniferous else self.density
+
+    @property
+    def zone_height(self):
+        """Высота хвойных по старшей заполненной градации"""
+        if self.bolee_15 > 0:
+            return 2.0
+        if self._05_15 > 0:
+            return 1.0
+        if self.do_05 > 0:
+            return 0.3
+        return self.height or 0
+
+
+class PlotRecord:
+    """Строка page_data (площадка) с разобранными породами и составом"""
+    __slots__ = ('cells', 'nn', 'gps_point', 'predmet_uhoda', 'poroda',
+                 'primechanie', 'radius', 'breeds', 'composition', 'is_filled')
+
+    def __init__(self, cells):
+        cells = tuple(cells) + ('',) * (6 - len(cells))
+        self.cells = cells
+        self.nn, self.gps_point, self.predmet_uhoda, self.poroda, self.primechanie, self.radius = cells[:6]
+        self.breeds = tuple(
+            BreedRecord.from_dict(b) for b in parse_breeds_text(self.poroda)
+            if isinstance(b, dict)
+        )
+        self.composition = parse_composition(self.predmet_uhoda) if self.predmet_uhoda else {}
+        self.is_filled = any(cell for cell in cells[:3] if cell)
+
+    @property
+    def radius_value(self):
+        """Радиус площадки из шестого столбца или None"""
+        value = to_number(self.radius) if self.radius else 0
+        return float(value) if value else None
+
+
+class PlotStore:
+    """Кэш PlotRecord по ключу (страница, строка), синхронизируемый с page_data.
+
+    Каждое изменение записи передаётся в SectionTotals, поэтому итоги
+    по участку всегда актуальны без обхода всех площадок.
+    """
+
+    def __init__(self):
+        self._plots = {}
+        self.totals = SectionTotals()
+
+    def __len__(self):
+        return len(self._plots)
+
+    def clear(self):
+        self._plots.clear()
+        self.totals.reset()
+
+    def rebuild(self, page_data):
+        """Полностью пересобрать хранилище по page_data (загрузка участка)"""
+        self.clear()
+        for page_num, rows in page_data.items():
+            for row_idx, row in enumerate(rows):
+                record = PlotRecord(row)
+                self._plots[(page_num, row_idx)] = record
+                self.totals.add(record)
+
+    def update_row(self, page_num, row_idx, row):
+        """Обновить запись строки; JSON разбирается только если ячейки изменились"""
+        key = (page_num, row_idx)
+        old = self._plots.get(key)
+        if old is not None and old.cells == tuple(row):
+            return old
+        record = PlotRecord(row)
+        self._plots[key] = record
+        self.totals.replace(old, record)
+        return record
+
+    def sync_page(self, page_data, page_num):
+        """Синхронизировать одну страницу; строки за её концом удаляются"""
+        rows = page_data.get(page_num, ())
+        for row_idx, row in enumerate(rows):
+            self.update_row(page_num, row_idx, row)
+        row_idx = len(rows)
+        while self.remove_row(page_num, row_idx) is not None:
+            row_idx += 1
+
+    def remove_row(self, page_num, row_idx):
+        record = self._plots.pop((page_num, row_idx), None)
+        if record is not None:
+            self.totals.remove(record)
+        return record
+
+    def get(self, page_num, row_idx):
+        return self._plots.get((page_num, row_idx))
+
+    def iter_page(self, page_data, page_num):
+        """Записи одной страницы в порядке строк"""
+        for row_idx, row in enumerate(page_data.get(page_num, ())):
+            yield self.update_row(page_num, row_idx, row)
+
+    def iter_plots(self, page_data):
+        """Записи всех площадок в порядке page_data"""
+        for page_num, rows in page_data.items():
+            for row_idx, row in enumerate(rows):
+                yield self.update_row(page_num, row_idx, row)
@@ -0,0 +1,115 @@
+"""
+Оверлей с замерами core.timing поверх любого экрана.
+
+F12 — показать/скрыть (при первом показе замеры включаются),
+F11 — сохранить замеры в timings_*.json. На планшете без клавиатуры то
+же делает пункт «Замеры» бокового меню. Файл пишется в timings_dir():
+на Android это общая папка Documents/ForestApp, откуда его можно
+отправить, на компьютере — reports.
+"""
+import os
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.uix.label import Label
+from kivy.utils import platform
+
+from core import timing
+
+
+KEY_TOGGLE = 293  # F12
+KEY_DUMP = 292    # F11
+REFRESH_INTERVAL = 1.0
+SHARED_SUBDIR = os.path.join('Documents', 'ForestApp')
+
+
+def timings_dir():
+    """Папка для файлов замеров, доступная пользователю"""
+    if platform == 'android':
+        try:
+            from android.storage import primary_external_storage_path
+            return os.path.join(primary_external_storage_path(), SHARED_SUBDIR)
+        except ImportError:
+            pass
+    return 'reports'
+
+
+class ProfilerOverlay(Label):
+    """Полупрозрачная таблица замеров в верхней части окна"""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            font_name='RobotoMono-Regular',
+            font_size=dp(10),
+            halign='left',
+            valign='top',
+            size_hint=(1, None),
+            height=dp(220),
+            padding=(dp(6), dp(6)),
+            color=(1, 1, 1, 1),
+            **kwargs,
+        )
+        self._event = None
+        with self.canvas.before:
+            Color(0, 0, 0, 0.7)
+            self._bg = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_bg, size=self._update_bg)
+
+    def _update_bg(self, *args):
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+        self.text_size = (self.width - dp(12), self.height - dp(12))
+
+    @property
+    def visible(self):
+        return self.parent is not None
+
+    def show(self):
+        if self.visible:
+            return
+        timing.enable()
+        self.y = Window.height - self.height
+        Window.add_widget(self)
+        self.refresh()
+        self._event = Clock.schedule_interval(self.refresh, REFRESH_INTERVAL)
+
+    def hide(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if self.visible:
+            Window.remove_widget(self)
+
+    def toggle(self):
+        self.hide() if self.visible else self.show()
+
+    def refresh(self, *args):
+        self.y = Window.height - self.height
+        lines = timing.report_lines()
+        if len(lines) == 1:
+            lines.append('пока нет замеров')
+        self.text = '\n'.join(lines)
+
+    def dump(self):
+        path = timing.dump(directory=timings_dir())
+        print(f"[timing] замеры сохранены: {path}")
+        return path
+
+
+def install():
+    """Повесить горячие клавиши оверлея на окно; вернуть оверлей"""
+    overlay = ProfilerOverlay()
+
+    def on_key_down(window, key, *args):
+        if key == KEY_TOGGLE:
+            overlay.toggle()
+            return True
+        if key == KEY_DUMP:
+            overlay.dump()
+            return True
+        return False
+
+    Window.bind(on_key_down=on_key_down)
+    return overlay
@@ -0,0 +1,195 @@
+"""
+Полнотекстовый поиск (FTS5) по участкам, площадкам, породам и деревьям.
+
+Индекс search_index заполняется миграцией и поддерживается триггерами
+на исходных таблицах, поэтому любое сохранение (экран молодняков,
+перечётная ведомость, окно участка) сразу попадает в поиск. rowid
+документа — id исходной строки * 8 + код вида, так что триггер
+удаляет старый документ по rowid, без просмотра индекса.
+
+search('сосна 12') ищет по префиксам всех слов, ранжирует по bm25 и
+возвращает фрагменты с подсветкой. Если SQLite собран без FTS5,
+выполняется прежний поиск LIKE по номерам участков.
+"""
+from core.database import DB_NAME, get_connection
+
+
+# Код вида документа в rowid и подпись в результатах
+KINDS = {
+    'section': (1, 'Участок'),
+    'molodniki_section': (2, 'Участок молодняков'),
+    'plot': (3, 'Площадка'),
+    'breed': (4, 'Порода'),
+    'tree': (5, 'Дерево'),
+}
+ROWID_STEP = 8
+HIGHLIGHT = ('\x01', '\x02')
+
+
+# Участок и номер площадки для документа породы
+BREED_PLOT = ("(SELECT COALESCE(d.section_name, '') || ' ' || COALESCE(d.nn, '') "
+              "FROM molodniki_data d WHERE d.id = {p}molodniki_data_id)")
+
+# (вид, таблица, столбцы name, столбцы или SQL-выражение details)
+SOURCES = (
+    ('section', 'sections', ('section_number',),
+     ('quarter', 'plot', 'forestry', 'district_forestry')),
+    ('molodniki_section', 'molodniki_sections', ('section_number',),
+     ('quarter', 'plot', 'forestry', 'district_forestry', 'forest_type', 'characteristics')),
+    ('plot', 'molodniki_data', ('nn',),
+     ('section_name', 'gps_point', 'predmet_uhoda', 'primechanie')),
+    ('breed', 'molodniki_breeds', ('breed_name',), BREED_PLOT),
+    ('tree', 'trees', ('species',),
+     ('tree_number', 'condition', 'model', 'notes')),
+)
+
+
+def _text(columns, prefix=''):
+    """Текст документа из столбцов; ё приводится к е (unicode61 её не снимает)"""
+    if isinstance(columns, str):
+        joined = columns.format(p=prefix)
+    else:
+        joined = " || ' ' || ".join(f"COALESCE({prefix}{c}, '')" for c in columns)
+    return f"replace(replace({joined}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def fts5_available(cursor):
+    try:
+        cursor.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+        cursor.execute('DROP TABLE temp._fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+def create_search_index(cursor):
+    """Таблица индекса, триггеры синхронизации и начальное заполнение.
+
+    Возвращает False, если FTS5 недоступен (индекс не создаётся).
+    """
+    if not fts5_available(cursor):
+        return False
+    cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    kind UNINDEXED, source_id UNINDEXED, name, details,
+                    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')''')
+    create_search_triggers(cursor)
+    rebuild_search_index(cursor)
+    return True
+
+
+def _watched(name, details):
+    """Столбцы, изменение которых меняет документ"""
+    if isinstance(details, str):
+        return name + ('molodniki_data_id',)
+    return name + details
+
+
+def create_search_triggers(cursor, replace=False):
+    """Триггеры синхронизации индекса; replace — пересоздать существующие.
+
+    Триггер обновления срабатывает только на столбцы документа, так что
+    запись служебных столбцов (координаты, updated_at) индекс не трогает.
+    """
+    for kind, table, name, details in SOURCES:
+        code = KINDS[kind][0]
+        insert = (f"INSERT INTO search_index (rowid, kind, source_id, name, details) "
+                  f"VALUES (NEW.id * {ROWID_STEP} + {code}, '{kind}', NEW.id, "
+                  f"{_text(name, 'NEW.')}, {_text(details, 'NEW.')});")
+        delete = f"DELETE FROM search_index WHERE rowid = OLD.id * {ROWID_STEP} + {code};"
+        if replace:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS search_{table}_{suffix}')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} '
+                       f'BEGIN {insert} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} '
+                       f'BEGIN {delete} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS search_{table}_au '
+                       f'AFTER UPDATE OF {", ".join(_watched(name, details))} ON {table} '
+                       f'BEGIN {delete} {insert} END')
+
+
+def rebuild_search_index(cursor):
+    """Заново заполнить индекс из исходных таблиц"""
+    cursor.execute('DELETE FROM search_index')
+    for kind, table, name, details in SOURCES:
+        code = KINDS[kind][0]
+        cursor.execute(f"INSERT INTO search_index (rowid, kind, source_id, name, details) "
+                       f"SELECT id * {ROWID_STEP} + {code}, '{kind}', id, "
+                       f"{_text(name, table + '.')}, {_text(details, table + '.')} FROM {table}")
+
+
+def has_search_index(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    return cursor.fetchone() is not None
+
+
+def build_match(query):
+    """Запрос FTS5: каждое слово — фраза с поиском по префиксу, слова через AND"""
+    words = query.replace('ё', 'е').replace('Ё', 'Е').replace('"', ' ').split()
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search(query, limit=50, db_path=DB_NAME):
+    """Найти query; список словарей kind, source_id, label, title, snippet.
+
+    В snippet совпадения обрамлены символами HIGHLIGHT.
+    """
+    match = build_match(query)
+    if not match:
+        return []
+    cursor = get_connection(db_path).cursor()
+    if not has_search_index(cursor):
+        return _like_search(cursor, query, limit)
+
+    cursor.execute(f'''
+        SELECT kind, source_id, snippet(search_index, -1, ?, ?, '…', 10)
+        FROM search_index
+        WHERE search_index MATCH ?
+        ORDER BY bm25(search_index, 0.0, 0.0, 4.0, 1.0)
+        LIMIT ?
+    ''', (HIGHLIGHT[0], HIGHLIGHT[1], match, limit))
+    hits = [{'kind': kind, 'source_id': source_id, 'label': KINDS[kind][1], 'snippet': snippet}
+            for kind, source_id, snippet in cursor.fetchall()]
+    _add_titles(cursor, hits)
+    return hits
+
+
+def _add_titles(cursor, hits):
+    """Заголовок результата: где находится найденное"""
+    by_kind = {}
+    for hit in hits:
+        by_kind.setdefault(hit['kind'], []).append(hit)
+
+    queries = {
+        'section': "SELECT id, 'Участок ' || section_number FROM sections",
+        'molodniki_section': "SELECT id, 'Участок молодняков ' || section_number FROM molodniki_sections",
+        'plot': ("SELECT id, 'Участок ' || COALESCE(section_name, '?') || ', стр. ' || COALESCE(page_number, '?')"
+                 " || ', площадка ' || COALESCE(nn, row_index + 1) FROM molodniki_data"),
+        'breed': ("SELECT b.id, b.breed_name || ' — участок ' || COALESCE(d.section_name, '?') || ', стр. '"
+                  " || COALESCE(d.page_number, '?') || ', площадка ' || COALESCE(d.nn, d.row_index + 1)"
+                  " FROM molodniki_breeds b LEFT JOIN molodniki_data d ON d.id = b.molodniki_data_id"),
+        'tree': ("SELECT t.id, COALESCE(t.species, '') || ', дерево № ' || COALESCE(t.tree_number, '?')"
+                 " || ', участок ' || COALESCE(s.section_number, '?')"
+                 " FROM trees t LEFT JOIN sections s ON s.id = t.section_id"),
+    }
+    for kind, kind_hits in by_kind.items():
+        ids = [hit['source_id'] for hit in kind_hits]
+        alias = 'b.' if kind == 'breed' else 't.' if kind == 'tree' else ''
+        placeholders = ', '.join('?' * len(ids))
+        cursor.execute(f'{queries[kind]} WHERE {alias}id IN ({placeholders})', ids)
+        titles = dict(cursor.fetchall())
+        for hit in kind_hits:
+            hit['title'] = titles.get(hit['source_id'], hit['label'])
+
+
+def _like_search(cursor, query, limit):
+    """Поиск без FTS5: номер участка по подстроке"""
+    hits = []
+    for kind, table in (('section', 'sections'), ('molodniki_section', 'molodniki_sections')):
+        cursor.execute(f"SELECT id, section_number FROM {table} WHERE section_number LIKE ? LIMIT ?",
+                       (f'%{query}%', limit))
+        for source_id, number in cursor.fetchall():
+            label = KINDS[kind][1]
+            hits.append({'kind': kind, 'source_id': source_id, 'label': label,
+                         'title': f'{label} {number}', 'snippet': str(number)})
+    return hits[:limit]
@@ -0,0 +1,137 @@
+"""
+Сводка по участкам молодняков для дашборда.
+
+molodniki_section_stats хранит по строке на участок: площадки, деревья,
+среднюю густоту, площадь, число площадок по породам и гистограммы
+возраста и высоты. Строка пересчитывается одним проходом по
+представлению molodniki_breed_plots (core/molodniki_breeds.py) при
+сохранении страницы или настроек этого участка; дашборд только читает
+готовые строки.
+"""
+import json
+
+from core.database import DB_NAME, get_connection
+
+
+# Ширина корзин гистограмм: возраст, лет; высота, м
+AGE_BUCKET = 5
+HEIGHT_BUCKET = 0.5
+
+
+def create_stats_table(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_section_stats (
+                    section_name TEXT PRIMARY KEY,
+                    plots INTEGER DEFAULT 0,
+                    trees INTEGER DEFAULT 0,
+                    avg_density_ha REAL DEFAULT 0.0,
+                    area_ha REAL DEFAULT 0.0,
+                    species TEXT DEFAULT '{}',     -- {порода: площадок}
+                    age_hist TEXT DEFAULT '{}',    -- {начало корзины: пород на площадках}
+                    height_hist TEXT DEFAULT '{}',
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+
+def _bucket(value, width):
+    """Начало корзины гистограммы как ключ JSON"""
+    start = int(value / width) * width
+    return str(start if isinstance(width, int) else float(start))
+
+
+def refresh_section_stats(cursor, section):
+    """Пересчитать строку участка (в транзакции вызывающего кода).
+
+    Породы участка читаются одним проходом по molodniki_breed_plots.
+    """
+    cursor.execute('''
+        SELECT molodniki_data_id, breed_name, trees, density_ha, age, zone_height
+        FROM molodniki_breed_plots
+        WHERE section_name = ?
+    ''', (section,))
+    plot_density = {}
+    trees = 0
+    species = {}
+    seen = set()
+    age_hist = {}
+    height_hist = {}
+    for plot_id, breed, breed_trees, density, age, height in cursor:
+        plot_density[plot_id] = plot_density.get(plot_id, 0.0) + (density or 0.0)
+        trees += breed_trees or 0
+        # Порода считается один раз на площадку
+        if (plot_id, breed) not in seen:
+            seen.add((plot_id, breed))
+            species[breed] = species.get(breed, 0) + 1
+        if age and age > 0:
+            key = _bucket(age, AGE_BUCKET)
+            age_hist[key] = age_hist.get(key, 0) + 1
+        if height and height > 0:
+            key = _bucket(height, HEIGHT_BUCKET)
+            height_hist[key] = height_hist.get(key, 0) + 1
+
+    cursor.execute('SELECT plot_area FROM molodniki_settings WHERE section_name = ?', (section,))
+    row = cursor.fetchone()
+    try:
+        area = float(row[0]) if row and row[0] else 0.0
+    except (TypeError, ValueError):
+        area = 0.0
+
+    plots = len(plot_density)
+    if not plots and not area:
+        cursor.execute('DELETE FROM molodniki_section_stats WHERE section_name = ?', (section,))
+        return
+
+    def ordered(histogram):
+        return dict(sorted(histogram.items(), key=lambda item: float(item[0])))
+
+    cursor.execute('''
+        INSERT OR REPLACE INTO molodniki_section_stats
+        (section_name, plots, trees, avg_density_ha, area_ha, species, age_hist, height_hist, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ''', (
+        section, plots, trees, sum(plot_density.values()) / plots if plots else 0.0, area,
+        json.dumps(dict(sorted(species.items(), key=lambda item: (-item[1], item[0]))), ensure_ascii=False),
+        json.dumps(ordered(age_hist)),
+        json.dumps(ordered(height_hist)),
+    ))
+
+
+def refresh_all_stats(cursor):
+    """Пересчитать все участки (миграция, восстановление)"""
+    cursor.execute('DELETE FROM molodniki_section_stats')
+    cursor.execute('''
+        SELECT section_name FROM molodniki_data WHERE section_name IS NOT NULL
+        UNION SELECT section_name FROM molodniki_settings WHERE section_name IS NOT NULL
+    ''')
+    for (section,) in cursor.fetchall():
+        refresh_section_stats(cursor, section)
+
+
+def _merge(target, counts):
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + count
+
+
+def dashboard_summary(db_path=DB_NAME):
+    """Сводка по всем участкам из готовых строк molodniki_section_stats"""
+    summary = {
+        'sections': [], 'total_plots': 0, 'total_trees': 0, 'total_area': 0.0,
+        'avg_density_ha': 0.0, 'species_counts': {}, 'age_hist': {}, 'height_hist': {},
+    }
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('''
+        SELECT section_name, plots, trees, avg_density_ha, area_ha, species, age_hist, height_hist
+        FROM molodniki_section_stats ORDER BY section_name
+    ''')
+    density_sum = 0.0
+    for section, plots, trees, density, area, species, ages, heights in cursor.fetchall():
+        summary['sections'].append(section)
+        summary['total_plots'] += plots
+        summary['total_trees'] += trees
+        summary['total_area'] += area
+        density_sum += density * plots
+        _merge(summary['species_counts'], json.loads(species))
+        _merge(summary['age_hist'], json.loads(ages))
+        _merge(summary['height_hist'], json.loads(heights))
+    if summary['total_plots']:
+        # Средняя по всем площадкам, а не по участкам
+        summary['avg_density_ha'] = density_sum / summary['total_plots']
+    return summary
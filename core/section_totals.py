@@ -0,0 +1,142 @@
+"""
+Инкрементальные итоги по участку молодняков.
+
+Хранит накопленные суммы и счётчики по всем площадкам; изменение одной
+площадки вычитает её старый вклад и добавляет новый, без пересчёта
+всего участка.
+"""
+
+
+class SectionTotals:
+    """Накопленные суммы для строки итогов (состав, градации хвойных, лиственные)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.filled_plots = 0
+        # Состав из предмета ухода: буква -> [сумма коэффициентов, кол-во площадок]
+        self.composition = {}
+        # Хвойные: суммы исходных количеств по градациям на одну запись породы
+        self.coniferous_count = 0
+        self.coniferous_do_05 = 0
+        self.coniferous_05_15 = 0
+        self.coniferous_bolee_15 = 0
+        self.coniferous_height_sum = 0.0
+        self.coniferous_height_count = 0
+        self.coniferous_age_sum = 0.0
+        self.coniferous_age_count = 0
+        # Лиственные: суммы средних по площадкам
+        self.deciduous_plots = 0
+        self.deciduous_density_sum = 0.0
+        self.deciduous_height_sum = 0.0
+        self.deciduous_age_sum = 0.0
+
+    def add(self, plot):
+        self._apply(plot, 1)
+
+    def remove(self, plot):
+        self._apply(plot, -1)
+
+    def replace(self, old_plot, new_plot):
+        """Заменить вклад площадки: вычесть старый, добавить новый"""
+        if old_plot is not None:
+            self._apply(old_plot, -1)
+        if new_plot is not None:
+            self._apply(new_plot, 1)
+
+    def _apply(self, plot, sign):
+        if plot.is_filled:
+            self.filled_plots += sign
+
+        for breed, count in plot.composition.items():
+            entry = self.composition.setdefault(breed, [0, 0])
+            entry[0] += sign * count
+            entry[1] += sign
+            if entry[1] <= 0:
+                del self.composition[breed]
+
+        deciduous_density = 0
+        deciduous_heights = []
+        deciduous_ages = []
+        for breed_info in plot.breeds:
+            if breed_info.is_coniferous:
+                self.coniferous_count += sign
+                self.coniferous_do_05 += sign * breed_info.do_05
+                self.coniferous_05_15 += sign * breed_info._05_15
+                self.coniferous_bolee_15 += sign * breed_info.bolee_15
+                if breed_info.height > 0:
+                    self.coniferous_height_sum += sign * breed_info.height
+                    self.coniferous_height_count += sign
+                if breed_info.age > 0:
+                    self.coniferous_age_sum += sign * breed_info.age
+                    self.coniferous_age_count += sign
+            elif breed_info.type == 'deciduous':
+                deciduous_density += breed_info.density
+                if breed_info.height > 0:
+                    deciduous_heights.append(breed_info.height)
+                if breed_info.age > 0:
+                    deciduous_ages.append(breed_info.age)
+
+        if deciduous_heights or deciduous_ages:
+            self.deciduous_plots += sign
+            self.deciduous_density_sum += sign * deciduous_density
+            if deciduous_heights:
+                self.deciduous_height_sum += sign * sum(deciduous_heights) / len(deciduous_heights)
+            if deciduous_ages:
+                self.deciduous_age_sum += sign * sum(deciduous_ages) / len(deciduous_ages)
+
+        if self.coniferous_count == 0:
+            # Сбрасываем накопленную погрешность float при пустых суммах
+            self.coniferous_height_sum = self.coniferous_age_sum = 0.0
+        if self.deciduous_plots == 0:
+            self.deciduous_density_sum = self.deciduous_height_sum = self.deciduous_age_sum = 0.0
+
+    def composition_text(self):
+        text = ""
+        for breed in sorted(self.composition.keys()):
+            total, count = self.composition[breed]
+            avg = total / count if count else 0
+            if avg > 0:
+                text += f"{int(avg)}{breed}"
+        return text
+
+    def forestry_formulas_text(self, plot_area_m2):
+        """Текст средних по хвойным (на га) и лиственным для столбца «Порода»"""
+        text = ""
+        if self.coniferous_count > 0:
+            scale = 10000 / plot_area_m2 if plot_area_m2 > 0 else 0
+            count = self.coniferous_count
+            gradiations = [
+                f"до 0.5м: {self.coniferous_do_05 * scale / count:.1f} шт/га",
+                f"0.5-1.5м: {self.coniferous_05_15 * scale / count:.1f} шт/га",
+                f">1.5м: {self.coniferous_bolee_15 * scale / count:.1f} шт/га",
+            ]
+            text += "Хвойные: " + ", ".join(gradiations)
+            if self.coniferous_height_count > 0:
+                text += f", высота: {self.coniferous_height_sum / self.coniferous_height_count:.1f}м"
+            if self.coniferous_age_count > 0:
+                text += f", возраст: {self.coniferous_age_sum / self.coniferous_age_count:.1f} лет"
+
+        if self.deciduous_plots > 0:
+            if text:
+                text += "; "
+            text += "Лиственные: "
+            avg_density = self.deciduous_density_sum / self.deciduous_plots
+            avg_height = self.deciduous_height_sum / self.deciduous_plots
+            avg_age = self.deciduous_age_sum / self.deciduous_plots
+            if avg_density > 0:
+                text += f"густота: {avg_density:.1f} шт/га "
+            if avg_height > 0:
+                text += f"высота: {avg_height:.1f}м "
+            if avg_age > 0:
+                text += f"возраст: {avg_age:.1f} лет"
+        return text
+
+    def snapshot(self, plot_area_m2):
+        """Итоги в формате calculate_section_totals"""
+        return {
+            'composition_text': self.composition_text(),
+            'forestry_formulas_text': self.forestry_formulas_text(plot_area_m2),
+            'total_plots': self.filled_plots,
+        }
@@ -0,0 +1,132 @@
+"""
+Префиксный индекс подсказок автодополнения.
+
+Таблицы suggestions / molodniki_suggestions читаются один раз в
+отсортированные списки по столбцам; поиск по префиксу идёт бинарным
+поиском в памяти. Новые значения сразу попадают в индекс, а в базу
+записываются пакетом.
+"""
+import atexit
+import bisect
+import heapq
+import itertools
+import sqlite3
+import threading
+
+from core.database import DB_NAME, get_connection
+
+
+# Сколько новых значений копится до записи в базу
+BATCH_SIZE = 20
+
+
+class SuggestionIndex:
+    """Отсортированные значения подсказок по номеру столбца"""
+
+    def __init__(self, table, db_path=DB_NAME):
+        self.table = table
+        self.db_path = db_path
+        self._columns = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _load(self):
+        columns = {}
+        try:
+            cursor = get_connection(self.db_path).cursor()
+            cursor.execute(f'SELECT column_index, value FROM {self.table}')
+            for col_index, value in cursor:
+                if value:
+                    columns.setdefault(col_index, set()).add(value)
+        except sqlite3.OperationalError:
+            # Таблица ещё не создана — индекс начинается пустым
+            pass
+        self._columns = {col: sorted(values) for col, values in columns.items()}
+
+    def _values(self, col_index):
+        if self._columns is None:
+            self._load()
+        return self._columns.setdefault(col_index, [])
+
+    def complete(self, col_index, prefix, limit=5):
+        """Лучшие limit значений с префиксом: сначала короткие, затем по алфавиту"""
+        if not prefix:
+            return []
+        with self._lock:
+            values = self._values(col_index)
+            start = bisect.bisect_left(values, prefix)
+            matches = itertools.takewhile(lambda v: v.startswith(prefix),
+                                          itertools.islice(values, start, None))
+            return heapq.nsmallest(limit, matches, key=lambda v: (len(v), v))
+
+    def add(self, col_index, value):
+        """Добавить значение в индекс; в базу оно уйдёт со следующим пакетом"""
+        if not value:
+            return
+        with self._lock:
+            values = self._values(col_index)
+            pos = bisect.bisect_left(values, value)
+            if pos < len(values) and values[pos] == value:
+                return
+            values.insert(pos, value)
+            self._pending.append((col_index, value))
+            if len(self._pending) < BATCH_SIZE:
+                return
+        self.flush()
+
+    def flush(self):
+        """Записать накопленные значения.
+
+        Соединение потока общее, поэтому запись идёт в точке сохранения:
+        вне транзакции RELEASE её фиксирует, а внутри чужой транзакции
+        значения фиксируются вместе с ней и не фиксируют её раньше времени.
+        При ошибке значения остаются в очереди до следующего flush.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        conn = get_connection(self.db_path)
+        try:
+            conn.execute('SAVEPOINT suggestions_flush')
+            try:
+                conn.executemany(
+                    f'INSERT OR IGNORE INTO {self.table} (column_index, value) VALUES (?, ?)',
+                    pending)
+            except Exception:
+                conn.execute('ROLLBACK TO suggestions_flush')
+                raise
+            finally:
+                conn.execute('RELEASE suggestions_flush')
+        except Exception as e:
+            with self._lock:
+                self._pending = pending + self._pending
+            print(f"Error saving suggestions: {e}")
+
+    def reload(self):
+        """Перечитать индекс из базы (после восстановления из копии)"""
+        with self._lock:
+            self._columns = None
+            self._pending = []
+
+
+_indexes = {}
+
+
+def get_index(table='suggestions', db_path=DB_NAME):
+    """Общий для приложения индекс подсказок таблицы table"""
+    index = _indexes.get((table, db_path))
+    if index is None:
+        index = _indexes.setdefault((table, db_path), SuggestionIndex(table, db_path))
+    return index
+
+
+@atexit.register
+def flush_all():
+    for index in list(_indexes.values()):
+        index.flush()
+
+
+def reload_all():
+    for index in list(_indexes.values()):
+        index.reload()
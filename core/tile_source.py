@@ -0,0 +1,81 @@
+"""
+Источник тайлов MapView из офлайн-файла MBTiles.
+
+Тайл ищется по порядку: в LRU уже декодированных текстур (сразу, без
+потока загрузки), в файле MBTiles (чтение и декодирование PNG в потоке
+загрузчика MapView, текстура создаётся в UI-потоке) и, если в файле его
+нет, в сети обычным загрузчиком MapView. Без сети карта работает в
+пределах скачанного prefetch_tiles.py.
+"""
+import io
+import os
+from collections import OrderedDict
+
+from kivy.core.image import Image as CoreImage
+from kivy_garden.mapview import MapSource
+from kivy_garden.mapview.downloader import Downloader
+
+from core.mbtiles import OFFLINE_TILES, MBTiles
+
+
+# Декодированных тайлов в памяти: 256x256 RGBA = 256 КБ каждый
+TEXTURE_CACHE = 192
+
+
+class OfflineMapSource(MapSource):
+    def __init__(self, path=OFFLINE_TILES, cache_size=TEXTURE_CACHE, online=True, **kwargs):
+        kwargs.setdefault('cache_key', 'offline')
+        super().__init__(**kwargs)
+        self.tiles = MBTiles(path)
+        self.cache_size = cache_size
+        self.online = online
+        self._textures = OrderedDict()
+        meta = self.tiles.metadata()
+        if 'minzoom' in meta and not online:
+            self.min_zoom = int(meta['minzoom'])
+            self.max_zoom = int(meta['maxzoom'])
+
+    def fill_tile(self, tile):
+        if tile.state == 'done':
+            return
+        key = (tile.zoom, tile.tile_x, tile.tile_y)
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+            tile.texture = texture
+            tile.state = 'done'
+            return
+        Downloader.instance(cache_dir=self.cache_dir).submit(self._load_tile, tile)
+
+    def _load_tile(self, tile):
+        # Поток загрузчика: чтение из файла и декодирование PNG
+        png = self.tiles.get_tile(tile.zoom, tile.tile_x, tile.tile_y)
+        if png is None:
+            return self._load_online, (tile,)
+        image = CoreImage(io.BytesIO(png), ext='png', nocache=True)
+        return self._load_tile_done, (tile, image)
+
+    def _load_online(self, tile):
+        if self.online:
+            super().fill_tile(tile)
+        else:
+            tile.state = 'done'
+
+    def _load_tile_done(self, tile, image):
+        texture = image.texture
+        self._textures[(tile.zoom, tile.tile_x, tile.tile_y)] = texture
+        while len(self._textures) > self.cache_size:
+            self._textures.popitem(last=False)
+        tile.texture = texture
+        tile.state = 'need-animation'
+
+
+def offline_map_source(path=OFFLINE_TILES):
+    """OfflineMapSource, если файл с тайлами есть, иначе None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return OfflineMapSource(path)
+    except Exception as e:
+        print(f"[tiles] не удалось открыть {path}: {e}")
+        return None
@@ -0,0 +1,158 @@
+"""
+Замеры времени горячих путей: база, расчёт итогов, окна, экспорт.
+
+@timed('db.save_current_page') и with span('popup.build'): ... пишут
+длительность каждого вызова в гистограмму. Пока замеры выключены,
+обёртка лишь проверяет флаг и вызывает функцию. Включаются переменной
+окружения FORESTAPP_PROFILE=1 или enable(); результаты показывает
+оверлей (core/profiler_overlay.py) и сохраняет dump() — этот файл
+бригады могут прислать с медленного планшета.
+"""
+import functools
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Верхние границы корзин гистограммы, мс; последняя корзина — всё, что дольше
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_enabled = os.environ.get('FORESTAPP_PROFILE', '') not in ('', '0')
+_lock = threading.Lock()
+_histograms = {}
+
+
+class Histogram:
+    """Число вызовов, сумма, min/max и распределение по корзинам BUCKETS_MS"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, p):
+        """Оценка p-го процентиля сверху: граница корзины, куда он попал"""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min or 0.0, 3),
+            'max_ms': round(self.max, 3),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'buckets': self.buckets[:],
+        }
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def record(name, ms):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(ms)
+
+
+def timed(name):
+    """Декоратор: время каждого вызова под именем name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(name):
+    """Контекстный менеджер: время блока под именем name"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def stats():
+    """{имя: сводка гистограммы}, отсортировано по суммарному времени"""
+    with _lock:
+        items = [(name, h.as_dict()) for name, h in _histograms.items()]
+    return dict(sorted(items, key=lambda item: item[1]['total_ms'], reverse=True))
+
+
+def report_lines():
+    """Строки таблицы для оверлея и консоли"""
+    lines = [f"{'замер':<36}{'n':>6}{'сред.':>9}{'p95':>9}{'макс.':>9}  мс"]
+    for name, s in stats().items():
+        lines.append(f"{name:<36}{s['count']:>6}{s['mean_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['max_ms']:>9.1f}")
+    return lines
+
+
+def dump(path=None, directory='reports'):
+    """Сохранить замеры в JSON и вернуть путь к файлу"""
+    if path is None:
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(directory, f'timings_{stamp}.json')
+    data = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'buckets_ms': list(BUCKETS_MS),
+        'timings': stats(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
@@ -11,7 +11,7 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.textinput import TextInput
 from kivy.properties import (NumericProperty, BooleanProperty,
                           ObjectProperty, ListProperty)
-import sqlite3
+from core.suggestions import get_index
 
 from kivymd.uix.button import MDButton, MDButtonText
 from ui_styles import Colors, Spacing, Fonts
@@ -46,18 +46,10 @@ class AutoCompleteTextInput(TextInput):
     def show_suggestions(self, instance, value):
         if not value or len(value) < 3:
             return
-        conn = sqlite3.connect('forest_data.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT value FROM suggestions
-            WHERE column_index = ? AND value LIKE ?
-            ORDER BY LENGTH(value) ASC, value ASC
-            LIMIT 1
-        ''', (self.col_index, f'{value}%'))
-        results = cursor.fetchall()
-        conn.close()
+        results = get_index('suggestions').complete(self.col_index, value)
+        self.suggestions = results
         if results:
-            self.text = results[0][0]
+            self.text = results[0]
 
     def get_table_screen(self):
         return App.get_running_app().root.get_screen('table')
@@ -154,6 +146,7 @@ class TreeDataInputPopup(Popup):
             if value:
                 self.data[col_index] = value
                 self.save_to_suggestions(col_index, value)
+        get_index('suggestions').flush()
         for col_index, value in self.data.items():
             if col_index < len(self.table_screen.inputs[self.row_index]):
                 self.table_screen.inputs[self.row_index][col_index].text = value
@@ -166,17 +159,7 @@ class TreeDataInputPopup(Popup):
         self.dismiss()
 
     def save_to_suggestions(self, col_index, value):
-        try:
-            conn = sqlite3.connect('forest_data.db')
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO suggestions (column_index, value)
-                VALUES (?, ?)
-            ''', (col_index, value))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error saving suggestion: {e}")
+        get_index('suggestions').add(col_index, value)
 
 
 class ExitConfirmPopup(Popup):
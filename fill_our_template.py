@@ -17,7 +17,9 @@ import sys
 import json
 import re
 import datetime
-from docx import Document
+import traceback
+
+from core.docx_template import load_template
 
 # БАЗА ДАННЫХ ПОРОД для предмета ухода
 BREED_DATABASE = {
@@ -57,23 +59,43 @@ BREED_TO_CODE = {
     'Рябина': 'Р'
 }
 
+DEFAULT_TEMPLATE_PATH = 'reports/Шаблон проект_наш.docx'
+
+
 class OurTemplateFiller:
-    def __init__(self, data_file=None):
-        self.document_path = 'reports/Шаблон проект_наш.docx'
+    def __init__(self, data_file=None, document_path=None, verbose=True):
+        self.document_path = document_path or DEFAULT_TEMPLATE_PATH
         self.data_file = data_file
+        self.verbose = verbose
         self.address_data = {}
         self.total_data = {}
         self.details_data = {}
         self.breeds_data = []
+        self.output_path = None
+        # Диагностика заполнения: [(уровень, сообщение)]
+        self.diagnostics = []
+
+    def log(self, level, message):
+        self.diagnostics.append((level, message))
+        if self.verbose:
+            print(f"[{level}] {message}")
 
     def load_data_from_json(self, file_path):
         """Загружаем данные из JSON файла"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+        except Exception as e:
+            self.log('ERROR', f"Ошибка загрузки данных: {e}")
+            self.log('ERROR', traceback.format_exc())
+            return False
+        return self.load_data(data.get('address_data', {}), data.get('total_data', {}))
 
-            self.address_data = data.get('address_data', {})
-            self.total_data = data.get('total_data', {})
+    def load_data(self, address_data, total_data):
+        """Загружаем данные из словарей address_data и total_data"""
+        try:
+            self.address_data = address_data or {}
+            self.total_data = total_data or {}
             self.breeds_data = self.total_data.get('breeds', [])
 
             # Извлекаем детали из total_data
@@ -87,21 +109,20 @@ class OurTemplateFiller:
                 'forest_type': self.address_data.get('forest_type', '')
             }
 
-            print(f"[OK] Данные загружены")
-            print(f"  Пород: {len(self.breeds_data)}")
+            self.log('OK', f"Данные загружены")
+            self.log('INFO', f"  Пород: {len(self.breeds_data)}")
             for breed in self.breeds_data:
-                print(f"    - {breed.get('name', 'Н/Д')}: d={breed.get('diameter', 0):.1f}, h={breed.get('height', 0):.1f}, density={breed.get('density', 0):.1f}")
-            print(f"  Коэффициент состава: {self.total_data.get('composition', 'Н/Д')}")
-            print(f"  Интенсивность: {self.total_data.get('intensity', 'Н/Д')}")
-            print(f"  Предмет ухода: {self.details_data.get('care_subject', 'Н/Д')}")
-            print(f"  Тип леса: {self.details_data.get('forest_type', 'Н/Д')}")
-            print(f"  Характеристики: {self.details_data.get('characteristics', 'Н/Д')}")
+                self.log('INFO', f"    - {breed.get('name', 'Н/Д')}: d={breed.get('diameter', 0):.1f}, h={breed.get('height', 0):.1f}, density={breed.get('density', 0):.1f}")
+            self.log('INFO', f"  Коэффициент состава: {self.total_data.get('composition', 'Н/Д')}")
+            self.log('INFO', f"  Интенсивность: {self.total_data.get('intensity', 'Н/Д')}")
+            self.log('INFO', f"  Предмет ухода: {self.details_data.get('care_subject', 'Н/Д')}")
+            self.log('INFO', f"  Тип леса: {self.details_data.get('forest_type', 'Н/Д')}")
+            self.log('INFO', f"  Характеристики: {self.details_data.get('characteristics', 'Н/Д')}")
             return True
 
         except Exception as e:
-            print(f"[ERROR] Ошибка загрузки данных: {e}")
-            import traceback
-            traceback.print_exc()
+            self.log('ERROR', f"Ошибка загрузки данных: {e}")
+            self.log('ERROR', traceback.format_exc())
             return False
 
     def format_number(self, value, default=''):
@@ -199,7 +220,7 @@ class OurTemplateFiller:
                 if breed_name:
                     result[breed_name] = density
 
-        print(f"[INFO] Распарсен предмет ухода: {result}")
+        self.log('INFO', f"Распарсен предмет ухода: {result}")
         return result
 
     def parse_characteristics(self):
@@ -242,7 +263,7 @@ class OurTemplateFiller:
         if not result['undesirable']:
             result['undesirable'] = 'деревья мешающие росту и формированию крон отобранных лучших и вспомогательных деревьев; деревья неудовлетворительного состояния'
         
-        print(f"[INFO] Распарсены характеристики: {result}")
+        self.log('INFO', f"Распарсены характеристики: {result}")
         return result
 
     def parse_care_subject_by_breeds(self, care_text):
@@ -277,7 +298,7 @@ class OurTemplateFiller:
             if breed_name:
                 result[breed_name] = coeff
 
-        print(f"[INFO] Распарсен предмет ухода по породам: {result}")
+        self.log('INFO', f"Распарсен предмет ухода по породам: {result}")
         return result
 
     def calculate_project_composition(self, breed_name, care_density_by_breed):
@@ -286,14 +307,14 @@ class OurTemplateFiller:
         Возвращает: строку вида "3С" или "2Б"
         """
         if not care_density_by_breed:
-            print(f"[DEBUG] calculate_project_composition: care_density_by_breed пуст для {breed_name}")
+            self.log('DEBUG', f"calculate_project_composition: care_density_by_breed пуст для {breed_name}")
             return ''
 
         # Рассчитываем общую густоту по предмету ухода
         total_density = sum(care_density_by_breed.values())
 
         if total_density <= 0:
-            print(f"[DEBUG] calculate_project_composition: total_density=0 для {breed_name}")
+            self.log('DEBUG', f"calculate_project_composition: total_density=0 для {breed_name}")
             return ''
 
         # Получаем код породы из названия
@@ -324,7 +345,7 @@ class OurTemplateFiller:
                     break
 
         if breed_density is None:
-            print(f"[DEBUG] calculate_project_composition: breed_density не найден для {breed_name} (код={breed_code})")
+            self.log('DEBUG', f"calculate_project_composition: breed_density не найден для {breed_name} (код={breed_code})")
             return ''  # Нет данных для этой породы в предмете ухода
 
         # Рассчитываем коэффициент состава (метод наибольшего остатка)
@@ -338,7 +359,7 @@ class OurTemplateFiller:
         if coeff < 1:
             coeff = 1
 
-        print(f"[DEBUG] calculate_project_composition: {breed_name} -> {breed_code}, density={breed_density}, total={total_density}, coeff={coeff}")
+        self.log('DEBUG', f"calculate_project_composition: {breed_name} -> {breed_code}, density={breed_density}, total={total_density}, coeff={coeff}")
         return f"{coeff}{breed_code}"
 
     def calculate_project_values(self, breed, intensity):
@@ -348,7 +369,7 @@ class OurTemplateFiller:
         height = breed.get('height', 0)
         diameter = breed.get('diameter', 0)
 
-        print(f"[DEBUG] breed={breed.get('name', 'Н/Д')}, d={diameter}, h={height}, intensity={intensity}")
+        self.log('DEBUG', f"breed={breed.get('name', 'Н/Д')}, d={diameter}, h={height}, intensity={intensity}")
 
         # После рубки остаются лучшие деревья, поэтому:
         # - высота увеличивается (мелочь убирается)
@@ -362,7 +383,7 @@ class OurTemplateFiller:
         project_height = height * growth_factor if height > 0 else 0
         project_diameter = diameter * growth_factor if diameter > 0 else 0
 
-        print(f"[DEBUG] project: d={project_diameter:.2f}, h={project_height:.2f}")
+        self.log('DEBUG', f"project: d={project_diameter:.2f}, h={project_height:.2f}")
 
         return {
             'age': age,  # Возраст не меняется
@@ -410,11 +431,12 @@ class OurTemplateFiller:
     def fill_document(self):
         """Заполняем документ данными"""
         if not os.path.exists(self.document_path):
-            print(f"[ERROR] Файл {self.document_path} не найден!")
+            self.log('ERROR', f"Файл {self.document_path} не найден!")
             return False
 
         try:
-            doc = Document(self.document_path)
+            template = load_template(self.document_path)
+            doc = template.new_document()
 
             # Получаем характеристики деревьев (парсим из details_data)
             characteristics = self.parse_characteristics()
@@ -426,7 +448,7 @@ class OurTemplateFiller:
 
             # Получаем ИНТЕНСИВНОСТЬ ИЗ МЕНЮ ИТОГО (рассчитанную)
             intensity = self.total_data.get('intensity', 25)
-            print(f"[INFO] Интенсивность рубки из меню Итого: {intensity}%")
+            self.log('INFO', f"Интенсивность рубки из меню Итого: {intensity}%")
 
             # Формируем вид рубки
             activity_name = self.total_data.get('activity_name', 'осветление')
@@ -461,9 +483,9 @@ class OurTemplateFiller:
             # Общая густота из предмета ухода (в тыс. шт/га)
             total_care_density = sum(care_density_by_breed.values())
 
-            print(f"[DEBUG] Предмет ухода: {care_subject}")
-            print(f"[DEBUG] care_density_by_breed: {care_density_by_breed}")
-            print(f"[DEBUG] total_care_density: {total_care_density}")
+            self.log('DEBUG', f"Предмет ухода: {care_subject}")
+            self.log('DEBUG', f"care_density_by_breed: {care_density_by_breed}")
+            self.log('DEBUG', f"total_care_density: {total_care_density}")
 
             # Словарь общих замен
             replacements = {
@@ -510,20 +532,8 @@ class OurTemplateFiller:
                 '{radius_info}': f"{total_plots} шт. {plot_area_m2:.0f}м²(R-{current_radius:.2f}м)",
             }
 
-            # Заполняем параграфы общими данными
-            for paragraph in doc.paragraphs:
-                for old_text, new_text in replacements.items():
-                    if old_text in paragraph.text:
-                        paragraph.text = paragraph.text.replace(old_text, str(new_text))
-
-            # Заполняем таблицы
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            for old_text, new_text in replacements.items():
-                                if old_text in paragraph.text:
-                                    paragraph.text = paragraph.text.replace(old_text, str(new_text))
+            # Заполняем параграфы и таблицы общими данными (только абзацы с плейсхолдерами)
+            template.apply(doc, replacements)
 
             # === ТЕПЕРЬ ЗАПОЛНЯЕМ ДАННЫМИ ПО ПОРОДАМ ===
             if self.breeds_data:
@@ -550,7 +560,7 @@ class OurTemplateFiller:
                         height = breed.get('height', 0)
                         diameter = breed.get('diameter', 0)
 
-                        print(f"[DEBUG] Заполняем породу: {breed_name}, d={diameter}, h={height}, density={density}")
+                        self.log('DEBUG', f"Заполняем породу: {breed_name}, d={diameter}, h={height}, density={density}")
 
                         # ИСПРАВЛЕНИЕ 6: Рассчитываем состав правильно
                         composition_isx = self.calculate_breed_composition(breed_name, density, total_density)
@@ -593,7 +603,7 @@ class OurTemplateFiller:
 
                         project_density_str = self.format_number(project_density) if project_density is not None else ''
 
-                        print(f"[DEBUG] {breed_name}: код={breed_code}, project_density={project_density}, composition_project={composition_project}")
+                        self.log('DEBUG', f"{breed_name}: код={breed_code}, project_density={project_density}, composition_project={composition_project}")
 
                         # Добавляем новую строку
                         row = breeds_table.add_row()
@@ -609,20 +619,20 @@ class OurTemplateFiller:
                         row.cells[9].text = self.format_number(density)  # ИСХОДНАЯ густота
                         row.cells[10].text = project_density_str  # ПРОЕКТНАЯ густота из предмета ухода
 
-                        print(f"[DEBUG] Заполнено: d_isx={diameter}, d_prj={project_values['diameter']:.2f}, density_prj={project_density_str}")
+                        self.log('DEBUG', f"Заполнено: d_isx={diameter}, d_prj={project_values['diameter']:.2f}, density_prj={project_density_str}")
 
             # Сохраняем документ
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
             output_path = self.document_path.replace('.docx', f'_заполненный_{timestamp}.docx')
             doc.save(output_path)
+            self.output_path = output_path
 
-            print(f"[OK] Документ заполнен и сохранён: {output_path}")
+            self.log('OK', f"Документ заполнен и сохранён: {output_path}")
             return True
 
         except Exception as e:
-            print(f"[ERROR] Ошибка при заполнении документа: {e}")
-            import traceback
-            traceback.print_exc()
+            self.log('ERROR', f"Ошибка при заполнении документа: {e}")
+            self.log('ERROR', traceback.format_exc())
             return False
 
     def run(self):
@@ -651,6 +661,20 @@ class OurTemplateFiller:
 
         return success
 
+def fill_project(address_data, total_data, document_path=None, verbose=False):
+    """Заполнить шаблон проекта ухода в текущем процессе.
+
+    Возвращает (путь к готовому документу или None, диагностика [(уровень, сообщение)]).
+    """
+    filler = OurTemplateFiller(document_path=document_path, verbose=verbose)
+    try:
+        if filler.load_data(address_data, total_data):
+            filler.fill_document()
+    except Exception as e:
+        filler.log('ERROR', f"Ошибка при заполнении документа: {e}")
+    return filler.output_path, filler.diagnostics
+
+
 def fill_document_from_json(json_file_path):
     """Функция для заполнения документа из JSON"""
     try:
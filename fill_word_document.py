@@ -9,13 +9,14 @@ import os
 import sys
 import json
 import argparse
-from docx import Document
 import sqlite3
 import datetime
 
 # Добавляем текущую директорию в путь для импорта модулей
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from core.docx_template import load_template
+
 class WordDocumentFiller:
     def __init__(self, db_name='forest_data.db', data_file=None, address_data=None, total_data=None):
         self.db_name = db_name
@@ -249,7 +250,8 @@ class WordDocumentFiller:
             print(f"Характеристики: {type(self.total_data.get('characteristics', ''))}")
             print("=" * 50)
             
-            doc = Document(self.document_path)
+            template = load_template(self.document_path)
+            doc = template.new_document()
 
             # Получаем данные из дополнительных функций
             care_queue = self.total_data.get('care_queue', 'первая')
@@ -399,20 +401,8 @@ class WordDocumentFiller:
                             self.fill_characteristics_table(table, headers)
                             break  # Прерываем цикл после обработки таблицы
 
-            # Проходим по всем параграфам и заменяем текст
-            for paragraph in doc.paragraphs:
-                for old_text, new_text in replacements.items():
-                    if old_text in paragraph.text:
-                        paragraph.text = paragraph.text.replace(old_text, str(new_text))
-
-            # Также проверяем таблицы (общие замены)
-            for table in doc.tables:
-                for row_idx, row in enumerate(table.rows):
-                    for cell_idx, cell in enumerate(row.cells):
-                        for paragraph in cell.paragraphs:
-                            for old_text, new_text in replacements.items():
-                                if old_text in paragraph.text:
-                                    paragraph.text = paragraph.text.replace(old_text, str(new_text))
+            # Заменяем текст в параграфах и таблицах (только абзацы с плейсхолдерами)
+            template.apply(doc, replacements)
 
             # Сохраняем документ
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
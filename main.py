@@ -19,20 +19,25 @@ from kivy.core.text import LabelBase
 from kivy.utils import get_color_from_hex
 from kivy.config import Config
 from kivy.core.image import Image as CoreImage
-import sqlite3
-import pandas as pd
+from core.database import get_connection
+from core.migrations import migrate
+from core.suggestions import get_index
+from core.export_jobs import check_cancelled, get_runner
+from core.lazy import lazy_import
 import os
 import datetime
 import re
 import json
 import shutil
 import glob
-from openpyxl import load_workbook, Workbook
-from tkinter import Tk, filedialog
 from molodniki_extended import ExtendedMolodnikiTableScreen
 from new_taxation_menu import TaxationPopup
 import statistics
 
+# Нужны только при экспорте/загрузке файлов
+pd = lazy_import('pandas')
+openpyxl = lazy_import('openpyxl')
+
 # Monkey patch to fix Kivy TextInput mode issue
 import kivy.uix.textinput
 
@@ -214,19 +219,11 @@ class AutoCompleteTextInput(TextInput):
         if not value or len(value) < 3:
             return
 
-        conn = sqlite3.connect('forest_data.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT value FROM suggestions
-            WHERE column_index = ? AND value LIKE ?
-            ORDER BY LENGTH(value) ASC, value ASC
-            LIMIT 1
-        ''', (self.col_index, f'{value}%'))
-        results = cursor.fetchall()
-        conn.close()
+        results = get_index('suggestions').complete(self.col_index, value)
+        self.suggestions = results
 
         if results:
-            self.text = results[0][0]
+            self.text = results[0]
 
     def get_table_screen(self):
         return App.get_running_app().root.get_screen('table')
@@ -351,17 +348,7 @@ class TreeDataInputPopup(Popup):
         self.open()
 
     def save_to_suggestions(self, col_index, value):
-        try:
-            conn = sqlite3.connect('forest_data.db')
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO suggestions (column_index, value)
-                VALUES (?, ?)
-            ''', (col_index, value))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error saving suggestion: {e}")
+        get_index('suggestions').add(col_index, value)
 
     def save_data(self, instance):
         for i, (field_name, col_index) in enumerate(self.fields):
@@ -370,6 +357,7 @@ class TreeDataInputPopup(Popup):
                 self.data[col_index] = value
                 # Save to suggestions
                 self.save_to_suggestions(col_index, value)
+        get_index('suggestions').flush()
 
         # Fill the row in the table
         for col_index, value in self.data.items():
@@ -716,7 +704,7 @@ class MainMenu(Screen):
 
     def add_section(self, instance):
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('INSERT INTO sections DEFAULT VALUES')
             conn.commit()
@@ -738,7 +726,7 @@ class MainMenu(Screen):
             return
 
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE sections
@@ -760,7 +748,7 @@ class MainMenu(Screen):
     def show_add_molodniki_section(self, instance):
         # Сначала создаем новую запись в таблице
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('INSERT INTO molodniki_sections DEFAULT VALUES')
             conn.commit()
@@ -851,7 +839,7 @@ class MainMenu(Screen):
 
     def add_molodniki_section(self, instance):
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('INSERT INTO molodniki_sections DEFAULT VALUES')
             conn.commit()
@@ -868,7 +856,7 @@ class MainMenu(Screen):
             return
 
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             # Используем INSERT OR REPLACE, чтобы создать или обновить запись с данным номером участка
             cursor.execute('''
@@ -927,7 +915,7 @@ class MainMenu(Screen):
         ).open()
 
     def show_load_popup(self, instance):
-        conn = sqlite3.connect('forest_data.db')
+        conn = get_connection('forest_data.db')
         cursor = conn.cursor()
         cursor.execute('SELECT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
         sections = cursor.fetchall()
@@ -1017,7 +1005,7 @@ class MainMenu(Screen):
         self.load_popup.dismiss()
 
     def show_load_molodniki_popup(self, instance):
-        conn = sqlite3.connect('forest_data.db')
+        conn = get_connection('forest_data.db')
         cursor = conn.cursor()
         cursor.execute('SELECT section_number FROM molodniki_sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
         sections = cursor.fetchall()
@@ -1087,8 +1075,7 @@ class MainMenu(Screen):
 
                 molodniki_screen.current_section = section_number
                 molodniki_screen.update_section_label()
-                molodniki_screen.page_data.clear()
-
+                pages = {}
                 for page_num in range(0, len(df), molodniki_screen.rows_per_page):
                     page = page_num // molodniki_screen.rows_per_page
                     page_data = df.iloc[page_num:page_num+molodniki_screen.rows_per_page].values.tolist()
@@ -1096,7 +1083,8 @@ class MainMenu(Screen):
                     for row in page_data:
                         while len(row) < 29:
                             row.append('')
-                    molodniki_screen.page_data[page] = page_data
+                    pages[page] = page_data
+                molodniki_screen.replace_page_data(pages)
 
                 molodniki_screen.current_page = 0
                 molodniki_screen.load_page_data()
@@ -1160,40 +1148,7 @@ class TableScreen(Screen):
             self.save_current_page()
 
     def setup_database(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS trees (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        tree_number INTEGER,
-                        species TEXT,
-                        age TEXT,
-                        count TEXT,
-                        diameter REAL,
-                        height REAL,
-                        condition TEXT,
-                        model TEXT,
-                        notes TEXT,
-                        section_id INTEGER,
-                        FOREIGN KEY(section_id) REFERENCES sections(id))''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS sections (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        section_number TEXT UNIQUE,
-                        quarter TEXT,
-                        plot TEXT,
-                        forestry TEXT,
-                        district_forestry TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS suggestions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        column_index INTEGER,
-                        value TEXT,
-                        UNIQUE(column_index, value))''')
-        
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestions ON suggestions (column_index, value)')
-        conn.commit()
-        conn.close()
+        migrate(self.db_name)
 
     def create_ui(self):
         main_layout = BoxLayout(orientation='horizontal', padding=10, spacing=10)
@@ -1432,17 +1387,7 @@ class TableScreen(Screen):
 
 
     def save_suggestion(self, col_index, value):
-        try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO suggestions (column_index, value)
-                VALUES (?, ?)
-            ''', (col_index, value))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error saving suggestion: {e}")
+        get_index('suggestions').add(col_index, value)
 
 
 
@@ -1591,42 +1536,46 @@ class TableScreen(Screen):
                 self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
                 return
 
-        try:
-            # Расчет итогов
-            totals_data = self.calculate_totals()
-            print(f"Totals calculated: {totals_data}")  # Debug
-
-            # Сохранение в JSON
-            result, error = self.save_to_json(totals_data)
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(f"JSON: {error}")
-
-            # Сохранение в Excel
-            result, error = self.save_to_excel_without_dialog(totals_data)
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(f"Excel: {error}")
-
-            # Сохранение в Word
-            result, error = self.save_to_word_without_dialog(totals_data)
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(f"Word: {error}")
+        # Расчет итогов
+        totals_data = self.calculate_totals()
+        jobs = [
+            ('JSON', lambda: self.save_to_json(totals_data)),
+            ('Excel', lambda: self.save_to_excel_without_dialog(totals_data)),
+            ('Word', lambda: self.save_to_word_without_dialog(totals_data)),
+        ]
 
-        except Exception as e:
-            import traceback
-            error_messages.append(f"Общая ошибка: {str(e)}\n{traceback.format_exc()}")
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        progress_label = Label(text=f"Сохранение: 0 из {len(jobs)}", font_name='Roboto')
+        cancel_btn = Button(text='Отмена', size_hint_y=None, height=50, font_name='Roboto')
+        content.add_widget(progress_label)
+        content.add_widget(cancel_btn)
+        progress_popup = Popup(title='', separator_height=0, content=content,
+                               size_hint=(0.6, 0.3), auto_dismiss=False)
+
+        def on_progress(name, result, error, batch):
+            progress_label.text = f"Сохранение: {batch.done} из {batch.total} ({name})"
+
+        def on_done(batch):
+            progress_popup.dismiss()
+            if batch.is_cancelled():
+                self.show_error("Сохранение отменено")
+                return
+            for name in batch.names:
+                result, error = batch.results[name]
+                if result:
+                    success_messages.append(result)
+                else:
+                    error_messages.append(f"{name}: {error}")
+            if success_messages:
+                self.save_popup.dismiss()
+                self.show_success("Файлы сохранены:\n" + "\n".join(success_messages))
+            if error_messages:
+                self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
+                # Не закрываем popup, чтобы пользователь видел ошибки
 
-        if success_messages:
-            self.save_popup.dismiss()
-            self.show_success("Файлы сохранены:\n" + "\n".join(success_messages))
-        if error_messages:
-            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
-            # Не закрываем popup, чтобы пользователь видел ошибки
+        batch = get_runner().submit(jobs, on_progress=on_progress, on_done=on_done)
+        cancel_btn.bind(on_press=lambda x: batch.cancel())
+        progress_popup.open()
 
     def save_to_json(self, totals_data=None):
         """Сохранение данных в JSON формате"""
@@ -1644,6 +1593,7 @@ class TableScreen(Screen):
         full_path = os.path.join(self.reports_dir, filename)
 
         try:
+            check_cancelled()
             with open(full_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             return f"JSON: {filename}", None
@@ -1651,102 +1601,66 @@ class TableScreen(Screen):
             return None, f"Ошибка сохранения JSON: {str(e)}"
 
     def save_to_excel_without_dialog(self, totals_data=None):
-        """Сохранение в Excel без диалога"""
+        """Сохранение в Excel без диалога (потоковая запись)"""
+        from core.excel_stream import new_workbook, StreamingSheet
+
         filename = f"Перечетная_ведомость_{self.current_section}_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M')}.xlsx"
         full_path = os.path.join(self.reports_dir, filename)
 
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Перечетная ведомость"
-
-            # Заголовок
-            ws['A1'] = f'ПЕРЕЧЕТНАЯ ВЕДОМОСТЬ - УЧАСТОК {self.current_section}'
-            ws['A1'].font = openpyxl.styles.Font(bold=True, size=14)
-            ws.merge_cells('A1:I1')
-
-            # Данные
-            all_data = []
-            for page in sorted(self.page_data.keys()):
-                all_data.extend(self.page_data[page])
-
-            # Заголовки столбцов
-            for col_num, header in enumerate(self.column_names, 1):
-                cell = ws.cell(row=3, column=col_num, value=header)
-                cell.font = openpyxl.styles.Font(bold=True)
-                cell.fill = openpyxl.styles.PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-
-            # Данные
-            for row_num, row_data in enumerate(all_data, 4):
-                for col_num, cell_value in enumerate(row_data, 1):
-                    ws.cell(row=row_num, column=col_num, value=cell_value)
-
-            # Автоподбор ширины столбцов
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            wb = new_workbook()
+            sheet = StreamingSheet(wb, "Перечетная ведомость")
+            sheet.merge('A1:I1')
+
+            def rows():
+                # Заголовок
+                yield [sheet.cell(f'ПЕРЕЧЕТНАЯ ВЕДОМОСТЬ - УЧАСТОК {self.current_section}',
+                                  font=openpyxl.styles.Font(bold=True, size=14))]
+                yield []
+                # Заголовки столбцов
+                yield sheet.header(self.column_names)
+                # Данные
+                for page in sorted(self.page_data.keys()):
+                    check_cancelled()
+                    yield from self.page_data[page]
+
+            sheet.write(rows)
 
             # Добавляем лист с итогами, если есть данные
             if totals_data:
-                ws_totals = wb.create_sheet("Итоги")
-                ws_totals['A1'] = f'ИТОГИ ПО ПЕРЕЧЕТНОЙ ВЕДОМОСТИ - УЧАСТОК {self.current_section}'
-                ws_totals['A1'].font = openpyxl.styles.Font(bold=True, size=14)
-                ws_totals.merge_cells('A1:D1')
-
-                # Общие итоги
-                ws_totals['A3'] = 'Общие показатели:'
-                ws_totals['A3'].font = openpyxl.styles.Font(bold=True)
-                ws_totals['A4'] = 'Всего деревьев:'
-                ws_totals['B4'] = totals_data.get('total_trees', 0)
-                ws_totals['A5'] = 'Средний диаметр (см):'
-                ws_totals['B5'] = round(totals_data.get('avg_diameter', 0), 1)
-                ws_totals['A6'] = 'Средняя высота (м):'
-                ws_totals['B6'] = round(totals_data.get('avg_height', 0), 1)
-
-                # Распределение по породам
-                species_summary = totals_data.get('species_summary', {})
-                if species_summary:
-                    ws_totals['A8'] = 'Распределение по породам:'
-                    ws_totals['A8'].font = openpyxl.styles.Font(bold=True)
-
-                    row_num = 9
-                    for species, data in sorted(species_summary.items()):
-                        ws_totals[f'A{row_num}'] = f'Порода: {species}'
-                        ws_totals[f'A{row_num}'].font = openpyxl.styles.Font(bold=True)
-                        ws_totals[f'B{row_num}'] = f'Количество: {data["count"]}'
-
-                        diameters = data['diameters']
-                        heights = data['heights']
-                        if diameters:
-                            avg_d = sum(diameters) / len(diameters)
-                            ws_totals[f'C{row_num}'] = f'Ср. диаметр: {avg_d:.1f} см'
-                        if heights:
-                            avg_h = sum(heights) / len(heights)
-                            ws_totals[f'D{row_num}'] = f'Ср. высота: {avg_h:.1f} м'
-
-                        row_num += 1
-
-                    # Автоподбор ширины для листа итогов
-                    for column in ws_totals.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        ws_totals.column_dimensions[column_letter].width = adjusted_width
-
+                totals = StreamingSheet(wb, "Итоги")
+                totals.merge('A1:D1')
+                bold = openpyxl.styles.Font(bold=True)
+
+                def total_rows():
+                    yield [totals.cell(f'ИТОГИ ПО ПЕРЕЧЕТНОЙ ВЕДОМОСТИ - УЧАСТОК {self.current_section}',
+                                       font=openpyxl.styles.Font(bold=True, size=14))]
+                    yield []
+                    # Общие итоги
+                    yield [totals.cell('Общие показатели:', font=bold)]
+                    yield ['Всего деревьев:', totals_data.get('total_trees', 0)]
+                    yield ['Средний диаметр (см):', round(totals_data.get('avg_diameter', 0), 1)]
+                    yield ['Средняя высота (м):', round(totals_data.get('avg_height', 0), 1)]
+
+                    # Распределение по породам
+                    species_summary = totals_data.get('species_summary', {})
+                    if species_summary:
+                        yield []
+                        yield [totals.cell('Распределение по породам:', font=bold)]
+                        for species, data in sorted(species_summary.items()):
+                            row = [totals.cell(f'Порода: {species}', font=bold),
+                                   f'Количество: {data["count"]}', None, None]
+                            diameters = data['diameters']
+                            heights = data['heights']
+                            if diameters:
+                                row[2] = f'Ср. диаметр: {sum(diameters) / len(diameters):.1f} см'
+                            if heights:
+                                row[3] = f'Ср. высота: {sum(heights) / len(heights):.1f} м'
+                            yield row
+
+                totals.write(total_rows)
+
+            check_cancelled()
             wb.save(full_path)
             return f"Excel: {filename}", None
         except Exception as e:
@@ -1777,6 +1691,7 @@ class TableScreen(Screen):
 
             # Данные
             for row_data in all_data:
+                check_cancelled()
                 row_cells = table.add_row().cells
                 for i, cell_value in enumerate(row_data):
                     row_cells[i].text = str(cell_value) if cell_value else ""
@@ -1828,6 +1743,7 @@ class TableScreen(Screen):
                         else:
                             row_cells[3].text = '-'
 
+            check_cancelled()
             doc.save(full_path)
             return f"Word: {filename}", None
         except ImportError:
@@ -1848,7 +1764,7 @@ class TableScreen(Screen):
             # Расчет итогов
             totals_data = self.calculate_totals()
 
-            wb = Workbook()
+            wb = openpyxl.Workbook()
             ws = wb.active
             ws.title = "Перечетная ведомость"
 
@@ -1945,7 +1861,7 @@ class TableScreen(Screen):
             self.show_error(f"Ошибка: {str(e)}")
 
     def load_section(self, instance):
-        conn = sqlite3.connect(self.db_name)
+        conn = get_connection(self.db_name)
         cursor = conn.cursor()
         cursor.execute('SELECT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
         sections = cursor.fetchall()
@@ -2333,7 +2249,7 @@ class TableScreen(Screen):
             # Получаем адресные данные из базы данных
             address_info = "Адрес не указан"
             try:
-                conn = sqlite3.connect(self.db_name)
+                conn = get_connection(self.db_name)
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT quarter, plot, forestry, district_forestry
@@ -2670,6 +2586,8 @@ class ThemeChooser(Popup):
         self.update_theme_icons()
 
     def add_theme(self, instance):
+        from tkinter import Tk, filedialog
+
         Tk().withdraw()
         file_path = filedialog.askopenfilename(
             filetypes=[("Image files", "*.jpg *.jpeg *.png")]
@@ -765,15 +765,16 @@ class MainMenu(MDScreen):
         try:
             import pandas as pd
             df = pd.read_excel(file_path)
-            screen.page_data.clear()
             section_name = os.path.splitext(os.path.basename(file_path))[0]
+            pages = {}
             for page_num in range(0, len(df), screen.rows_per_page):
                 page = page_num // screen.rows_per_page
                 page_data = df.iloc[page_num:page_num+screen.rows_per_page].values.tolist()
                 for row in page_data:
                     while len(row) < 29:
                         row.append('')
-                screen.page_data[page] = page_data
+                pages[page] = page_data
+            screen.replace_page_data(pages)
             screen.current_section = section_name
             screen.current_page = 0
             screen.load_page_data()
@@ -2,6 +2,9 @@
 ForestApp - Современное приложение для учёта лесных данных
 KivyMD (Material Design) + собственная система стилей
 """
+import time
+STARTED_AT = time.perf_counter()
+
 from kivy.core.window import Window
 from kivy.config import Config
 from kivy.metrics import dp
@@ -10,9 +13,15 @@ from kivy.app import App
 from kivy.clock import Clock
 import os
 import json
-import sqlite3
+import threading
+from core.database import get_connection
+from core.migrations import migrate
+from core.search import search, HIGHLIGHT
+from core.lazy import report_startup
+from core import timing
 import glob
 from kivy.uix.textinput import TextInput
+from kivy.utils import escape_markup, get_hex_from_color
 
 Config.set('graphics', 'width', '480')
 Config.set('graphics', 'height', '854')
@@ -54,6 +63,10 @@ from new_taxation_menu import TaxationPopup
 from ui_styles import Colors, Spacing, Fonts
 from theme_manager import ThemeManager
 
+# Поиск: число результатов и пауза в наборе перед запросом, с
+SEARCH_LIMIT = 50
+SEARCH_DELAY = 0.25
+
 
 def make_raised_btn(text, **kwargs):
     icon = kwargs.pop('icon', None)
@@ -106,6 +119,7 @@ class MainMenu(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.theme_manager = ThemeManager()
+        self._backup_running = False
         Clock.schedule_once(lambda dt: self.create_ui(), 0)
 
     def create_ui(self):
@@ -458,6 +472,7 @@ class MainMenu(MDScreen):
         drawer.add_widget(make_drawer_item('backup-restore', 'Бекап', action='backup'))
         drawer.add_widget(make_drawer_item('magnify', 'Поиск', action='search'))
         drawer.add_widget(make_drawer_item('compare', 'Сравнение', action='compare'))
+        drawer.add_widget(make_drawer_item('timer-outline', 'Замеры', action='profiler'))
         drawer.add_widget(make_drawer_item('information-outline', 'О программе', action='about'))
 
         return drawer
@@ -501,6 +516,8 @@ class MainMenu(MDScreen):
             self.show_comparison_dialog()
         elif action == 'photos':
             self.show_photo_dialog()
+        elif action == 'profiler':
+            self.show_profiler_dialog()
 
     def show_success(self, message):
         snack = MDSnackbar(duration=2.5)
@@ -564,7 +581,7 @@ class MainMenu(MDScreen):
         scroll = MDScrollView(size_hint_y=None, height=dp(250))
         list_layout = MDBoxLayout(orientation='vertical', spacing=Spacing.SM, adaptive_height=True)
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT section_number, quarter, plot, forestry, district_forestry FROM sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
             rows = cursor.fetchall()
@@ -606,7 +623,7 @@ class MainMenu(MDScreen):
             self.show_error('Введите номер участка!')
             return
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('''INSERT OR REPLACE INTO sections
                 (section_number, quarter, plot, forestry, district_forestry)
@@ -626,7 +643,7 @@ class MainMenu(MDScreen):
 
     def show_load_section_dialog(self):
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
             sections = cursor.fetchall()
@@ -820,7 +837,7 @@ class MainMenu(MDScreen):
             self.show_error('Введите номер участка!')
             return
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('''INSERT OR REPLACE INTO molodniki_sections (section_number)
                 VALUES (?)''', (section_number,))
@@ -846,7 +863,7 @@ class MainMenu(MDScreen):
 
     def show_load_molodniki_dialog(self):
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT section_number FROM molodniki_sections WHERE section_number IS NOT NULL AND section_number != "" ORDER BY id DESC')
             sections = cursor.fetchall()
@@ -895,14 +912,15 @@ class MainMenu(MDScreen):
                 df = pd.read_excel(latest_file)
                 molodniki_screen.current_section = section_number
                 molodniki_screen.update_section_label()
-                molodniki_screen.page_data.clear()
+                pages = {}
                 for page_num in range(0, len(df), molodniki_screen.rows_per_page):
                     page = page_num // molodniki_screen.rows_per_page
                     page_data = df.iloc[page_num:page_num+molodniki_screen.rows_per_page].values.tolist()
                     for row in page_data:
                         while len(row) < 29:
                             row.append('')
-                    molodniki_screen.page_data[page] = page_data
+                    pages[page] = page_data
+                molodniki_screen.replace_page_data(pages)
                 molodniki_screen.current_page = 0
                 molodniki_screen.load_page_data()
                 molodniki_screen.update_pagination()
@@ -986,7 +1004,7 @@ class MainMenu(MDScreen):
         ))
 
         search_input = TextInput(
-            hint_text='Введите породу, номер участка или дерева',
+            hint_text='Порода, участок, дерево, GPS или примечание',
             multiline=False, size_hint_y=None, height=dp(44),
         )
         content.add_widget(search_input)
@@ -996,45 +1014,43 @@ class MainMenu(MDScreen):
         scroll.add_widget(results_box)
         content.add_widget(scroll)
 
-        def do_search(inst):
+        def do_search(*args):
             query = search_input.text.strip()
+            results_box.clear_widgets()
             if not query:
                 return
-            results_box.clear_widgets()
-            found = 0
             try:
-                conn = sqlite3.connect('forest_data.db')
-                cursor = conn.cursor()
-                for table in ['sections', 'molodniki_sections']:
-                    try:
-                        cursor.execute(f"SELECT * FROM {table} WHERE section_number LIKE ? LIMIT 20",
-                                       (f'%{query}%',))
-                        for row in cursor.fetchall():
-                            label = f'📁 {table}: {row[1] if len(row) > 1 else row[0]}'
-                            results_box.add_widget(MDLabel(
-                                text=label, font_size='13sp',
-                                theme_text_color='Custom', text_color=Colors.PRIMARY_LIGHT,
-                                size_hint_y=None, height=dp(24),
-                            ))
-                            found += 1
-                    except Exception:
-                        pass
-                conn.close()
-            except Exception:
-                pass
+                hits = search(query, limit=SEARCH_LIMIT)
+            except Exception as e:
+                self.show_error(f'Ошибка поиска: {str(e)}')
+                return
 
-            if found == 0:
+            for hit in hits:
+                start, end = HIGHLIGHT
+                snippet = escape_markup(hit['snippet'].strip())
+                snippet = snippet.replace(start, f'[b][color={get_hex_from_color(Colors.ACCENT)}]').replace(end, '[/color][/b]')
+                results_box.add_widget(MDLabel(
+                    text=f"{escape_markup(hit['title'])}\n[size=12sp]{snippet}[/size]",
+                    markup=True, font_size='13sp',
+                    theme_text_color='Custom', text_color=Colors.PRIMARY_LIGHT,
+                    size_hint_y=None, height=dp(44),
+                ))
+
+            if not hits:
                 results_box.add_widget(MDLabel(
                     text='Ничего не найдено', font_size='14sp',
                     theme_text_color='Hint', halign='center', size_hint_y=None, height=dp(48),
                 ))
             else:
                 results_box.add_widget(MDLabel(
-                    text=f'Найдено: {found}', font_size='12sp',
+                    text=f'Найдено: {len(hits)}', font_size='12sp',
                     theme_text_color='Custom', text_color=Colors.TEXT_DIM,
                     size_hint_y=None, height=dp(20),
                 ))
 
+        # Поиск по мере ввода: запрос уходит после паузы в наборе
+        pending = Clock.create_trigger(do_search, SEARCH_DELAY)
+        search_input.bind(text=lambda *args: pending())
         search_input.bind(on_text_validate=do_search)
         btn_row = MDBoxLayout(orientation='horizontal', spacing=Spacing.MD, size_hint_y=None, height=dp(48))
         btn_row.add_widget(make_raised_btn('Искать', icon='magnify', size_hint=(0.5, None), height=dp(48),
@@ -1062,14 +1078,36 @@ class MainMenu(MDScreen):
         content.add_widget(status_label)
 
         def do_backup(inst):
-            try:
-                path = create_backup()
-                status_label.text = f'✅ Бекап создан: {os.path.basename(path)}'
-                refresh_list()
-            except Exception as e:
-                status_label.text = f'❌ Ошибка: {str(e)}'
+            # Снимок копируется по страницам в фоне, интерфейс не блокируется;
+            # второй бекап и восстановление ждут окончания текущего
+            if self._backup_running:
+                status_label.text = '⏳ Бекап уже создаётся'
+                return
+            self._backup_running = True
+            inst.disabled = True
+            status_label.text = '⏳ Создание бекапа...'
+
+            def worker():
+                try:
+                    path = create_backup(incremental=True)
+                    message = f'✅ Бекап создан: {os.path.basename(path)}'
+                except Exception as e:
+                    path, message = None, f'❌ Ошибка: {str(e)}'
+
+                def finish(dt):
+                    self._backup_running = False
+                    inst.disabled = False
+                    status_label.text = message
+                    if path:
+                        refresh_list()
+                Clock.schedule_once(finish, 0)
+
+            threading.Thread(target=worker, daemon=True).start()
 
         def do_restore(path, name):
+            if self._backup_running:
+                status_label.text = '⏳ Дождитесь окончания бекапа'
+                return
             try:
                 restore_backup(path)
                 status_label.text = f'✅ Восстановлено из: {name}'
@@ -1129,7 +1167,7 @@ class MainMenu(MDScreen):
         ))
 
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT DISTINCT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != ""')
             sections = [row[0] for row in cursor.fetchall()]
@@ -1295,6 +1333,45 @@ class MainMenu(MDScreen):
             except Exception:
                 self.show_error('Не удалось открыть файл')
 
+    def show_profiler_dialog(self):
+        """Оверлей замеров и их сохранение без клавиатуры (F12/F11)"""
+        overlay = App.get_running_app().profiler_overlay
+        content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, adaptive_height=True)
+        content.add_widget(MDLabel(
+            text='⏱ Замеры производительности',
+            font_style='Title', role='medium', bold=True, halign='center',
+            size_hint_y=None, height=dp(36),
+        ))
+
+        switch_row = MDBoxLayout(orientation='horizontal', spacing=Spacing.MD, size_hint_y=None, height=dp(48))
+        switch_row.add_widget(MDLabel(text='Показывать замеры поверх экрана', font_size='13sp'))
+        overlay_switch = MDSwitch(active=overlay.visible)
+        overlay_switch.bind(active=lambda inst, value: overlay.show() if value else overlay.hide())
+        switch_row.add_widget(overlay_switch)
+        content.add_widget(switch_row)
+
+        def do_dump(inst):
+            if not timing.stats():
+                self.show_error('Замеров пока нет: включите их и поработайте с приложением')
+                return
+            try:
+                path = overlay.dump()
+            except OSError as e:
+                self.show_error(f'Не удалось сохранить замеры: {e}')
+                return
+            profiler_dialog.dismiss()
+            self.show_success(f'Замеры сохранены: {os.path.abspath(path)}')
+
+        btn_row = MDBoxLayout(orientation='horizontal', spacing=Spacing.MD, size_hint_y=None, height=dp(48))
+        btn_row.add_widget(make_raised_btn('Сохранить замеры', icon='content-save', size_hint=(0.5, None),
+                                           height=dp(48), on_release=do_dump))
+        btn_row.add_widget(make_outlined_btn('Закрыть', size_hint=(0.5, None), height=dp(48),
+                                             on_release=lambda x: profiler_dialog.dismiss()))
+        content.add_widget(btn_row)
+
+        profiler_dialog = MDDialog(MDDialogContentContainer(content), size_hint=(0.85, None))
+        profiler_dialog.open()
+
     def _show_about_dialog(self):
         dialog = MDDialog(
             MDDialogHeadlineText(text='🌲 Фанаты Пихты'),
@@ -1389,31 +1466,20 @@ class ForestApp(MDApp):
 
     def on_start(self):
         self.init_database()
+        # Первый кадр с главным меню
+        Clock.schedule_once(lambda dt: report_startup(STARTED_AT), 0)
+        from core.profiler_overlay import install
+        self.profiler_overlay = install()
+
+    def on_stop(self):
+        if timing.is_enabled() and timing.stats():
+            try:
+                self.profiler_overlay.dump()
+            except OSError as e:
+                print(f"[timing] не удалось сохранить замеры: {e}")
 
     def init_database(self):
-        conn = sqlite3.connect('forest_data.db')
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                section_number TEXT UNIQUE,
-                quarter TEXT, plot TEXT, forestry TEXT, district_forestry TEXT
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS molodniki_sections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, section_number TEXT
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS suggestions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                column_index INTEGER, value TEXT, UNIQUE(column_index, value)
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        migrate('forest_data.db')
 
 
 if __name__ == '__main__':
@@ -23,15 +23,16 @@ from kivy.core.text import LabelBase
 from kivy.utils import get_color_from_hex
 from kivy.core.image import Image as CoreImage
 import sqlite3
-import pandas as pd
+from core.database import get_connection
+from core.suggestions import get_index
+from core.export_jobs import get_runner
+from core.lazy import lazy_import
+from core.timing import timed
 import os
 import datetime
 import re
 import json
 import sys
-import openpyxl
-from openpyxl import Workbook
-from tkinter import Tk, filedialog
 
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.gridlayout import MDGridLayout
@@ -43,6 +44,13 @@ from kivymd.uix.appbar import MDTopAppBar, MDTopAppBarLeadingButtonContainer, MD
 from kivymd.uix.textfield import MDTextField
 
 from ui_styles import Colors, Spacing, Fonts
+from core.plot_store import PlotStore
+from core.dirty_rows import DirtyRowTracker
+from core.molodniki_reports import MolodnikiReports, default_project_data
+from core.molodniki_storage import MolodnikiStorage
+
+# Нужен только при экспорте в Excel
+openpyxl = lazy_import('openpyxl')
 
 LabelBase.register(name='Roboto',
                  fn_regular='fonts/Roboto-Medium.ttf',
@@ -140,19 +148,11 @@ class AutoCompleteTextInput(TextInput):
         if not value or len(value) < 3:
             return
 
-        conn = sqlite3.connect('forest_data.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT value FROM molodniki_suggestions
-            WHERE column_index = ? AND value LIKE ?
-            ORDER BY LENGTH(value) ASC, value ASC
-            LIMIT 1
-        ''', (self.col_index, f'{value}%'))
-        results = cursor.fetchall()
-        conn.close()
+        results = get_index('molodniki_suggestions').complete(self.col_index, value)
+        self.suggestions = results
 
         if results:
-            self.text = results[0][0]
+            self.text = results[0]
 
     def get_table_screen(self):
         return App.get_running_app().root.get_screen('molodniki')
@@ -532,6 +532,7 @@ class MolodnikiTreeDataInputPopup(Popup):
             # Показываем popup с параметрами породы, передавая название выбранной породы
             self.show_breed_details_popup(instance, breed_type, selected_breed)
 
+    @timed('popup.breed_details')
     def show_breed_details_popup(self, instance, breed_type, selected_breed=None):
         """Показать popup для управления множественными породами"""
         content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD, md_bg_color=Colors.DARK_SURFACE, adaptive_height=True)
@@ -742,6 +743,7 @@ class MolodnikiTreeDataInputPopup(Popup):
                 while len(self.table_screen.page_data[self.table_screen.current_page]) <= self.row_index:
                     self.table_screen.page_data[self.table_screen.current_page].append(['', '', '', '', '', ''])
                 self.table_screen.page_data[self.table_screen.current_page][self.row_index][3] = instance.text
+                self.table_screen.sync_plot_row(self.table_screen.current_page, self.row_index)
 
                 self.table_screen.update_plot_total(instance, instance.text)
 
@@ -821,6 +823,7 @@ class MolodnikiTreeDataInputPopup(Popup):
                 while len(self.table_screen.page_data[self.table_screen.current_page]) <= self.row_index:
                     self.table_screen.page_data[self.table_screen.current_page].append(['', '', '', '', '', ''])
                 self.table_screen.page_data[self.table_screen.current_page][self.row_index][3] = instance.text
+                self.table_screen.sync_plot_row(self.table_screen.current_page, self.row_index)
 
                 self.table_screen.update_plot_total(instance, instance.text)
 
@@ -896,6 +899,7 @@ class MolodnikiTreeDataInputPopup(Popup):
                 while len(self.table_screen.page_data[self.table_screen.current_page]) <= self.row_index:
                     self.table_screen.page_data[self.table_screen.current_page].append(['', '', '', '', '', ''])
                 self.table_screen.page_data[self.table_screen.current_page][self.row_index][3] = instance.text
+                self.table_screen.sync_plot_row(self.table_screen.current_page, self.row_index)
 
                 self.table_screen.update_plot_total(instance, instance.text)
 
@@ -1027,6 +1031,7 @@ class MolodnikiTreeDataInputPopup(Popup):
                 page_data = self.table_screen.page_data[self.table_screen.current_page]
                 if self.row_index < len(page_data):
                     page_data[self.row_index][3] = instance.text
+                    self.table_screen.sync_plot_row(self.table_screen.current_page, self.row_index)
 
             self.table_screen.update_plot_total(instance, instance.text)
 
@@ -1048,6 +1053,7 @@ class MolodnikiTreeDataInputPopup(Popup):
                 page_data = self.table_screen.page_data[self.table_screen.current_page]
                 if self.row_index < len(page_data):
                     page_data[self.row_index][3] = ''
+                    self.table_screen.sync_plot_row(self.table_screen.current_page, self.row_index)
 
             self.table_screen.update_plot_total(instance, '')
 
@@ -1208,7 +1214,7 @@ class MolodnikiTreeDataInputPopup(Popup):
 
     def save_custom_breed_to_db(self, breed_name, breed_type):
         """Сохранить новую породу в базу данных"""
-        conn = sqlite3.connect('forest_data.db')
+        conn = get_connection('forest_data.db')
         cursor = conn.cursor()
         try:
             cursor.execute('''
@@ -1225,7 +1231,7 @@ class MolodnikiTreeDataInputPopup(Popup):
 
     def load_custom_breeds(self, breed_type):
         """Загрузить пользовательские породы из базы данных"""
-        conn = sqlite3.connect('forest_data.db')
+        conn = get_connection('forest_data.db')
         cursor = conn.cursor()
         cursor.execute('''
             SELECT breed_name FROM custom_breeds
@@ -1254,7 +1260,7 @@ class MolodnikiTreeDataInputPopup(Popup):
         self.table_screen.show_success("Данные площадки молодняков сохранены!")
         self.dismiss()
 
-class ExtendedMolodnikiTableScreen(Screen):
+class ExtendedMolodnikiTableScreen(MolodnikiStorage, MolodnikiReports, Screen):
     current_page = NumericProperty(0)
     total_pages = NumericProperty(1)
     unsaved_changes = BooleanProperty(False)
@@ -1286,30 +1292,15 @@ class ExtendedMolodnikiTableScreen(Screen):
         self.db_name = 'forest_data.db'
         self.rows_per_page = 30
         self.page_data = {}
+        self.plot_store = PlotStore()
+        self.dirty_rows = DirtyRowTracker()
         self.setup_database()
         self.create_ui()
         self.load_existing_data()
         Window.bind(on_key_down=self.key_action)
 
         # Инициализация данных проекта
-        self.project_data = {
-            'address': {
-                'quarter': '',
-                'plot': '',
-                'forestry': '',
-                'district_forestry': '',
-                'radius': '5.64',
-                'plot_area': ''
-            },
-            'details': {
-                'care_queue': '',
-                'characteristics': '',
-                'care_date': '',
-                'technology': '',
-                'forest_purpose': ''
-            },
-            'document_name': 'Проект'
-        }
+        self.project_data = default_project_data()
 
         # Убираем вызов update_section_label, так как section_label больше не существует
 
@@ -1317,119 +1308,9 @@ class ExtendedMolodnikiTableScreen(Screen):
         if key == 115 and 'ctrl' in modifier:
             self.save_current_page()
 
-    def setup_database(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Создаем таблицу для хранения данных молодняков
-        cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_data (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        page_number INTEGER,
-                        row_index INTEGER,
-                        nn INTEGER,
-                        gps_point TEXT,
-                        predmet_uhoda TEXT,
-                        radius REAL DEFAULT 5.64,
-                        primechanie TEXT,
-                        section_name TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-
-        # Создаем индексы для быстрого поиска
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_data_page ON molodniki_data (page_number, row_index)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_data_section ON molodniki_data (section_name)')
-
-        # Создаем таблицу для хранения пород (множественные породы на одну запись)
-        cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_breeds (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        molodniki_data_id INTEGER,
-                        breed_name TEXT,
-                        breed_type TEXT, -- 'coniferous' или 'deciduous'
-                        do_05 INTEGER DEFAULT 0,
-                        _05_15 INTEGER DEFAULT 0,
-                        bolee_15 INTEGER DEFAULT 0,
-                        density INTEGER DEFAULT 0,
-                        height REAL DEFAULT 0.0,
-                        diameter REAL DEFAULT 0.0,
-                        age INTEGER DEFAULT 0,
-                        composition_coefficient REAL DEFAULT 0.0,
-                        FOREIGN KEY(molodniki_data_id) REFERENCES molodniki_data(id) ON DELETE CASCADE)''')
-
-        # Создаем индекс для поиска данных пород
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_breeds ON molodniki_breeds (molodniki_data_id)')
-
-        # Добавляем недостающие столбцы, если они отсутствуют
-        try:
-            cursor.execute('ALTER TABLE molodniki_breeds ADD COLUMN diameter REAL DEFAULT 0.0')
-        except sqlite3.OperationalError:
-            pass  # Столбец уже существует
-
-        try:
-            cursor.execute('ALTER TABLE molodniki_breeds ADD COLUMN composition_coefficient REAL DEFAULT 0.0')
-        except sqlite3.OperationalError:
-            pass  # Столбец уже существует
-
-        # Добавляем колонку poroda если её нет (для хранения JSON пород)
-        try:
-            cursor.execute("ALTER TABLE molodniki_data ADD COLUMN poroda TEXT DEFAULT ''")
-        except sqlite3.OperationalError:
-            pass  # Столбец уже существует
-
-        # Добавляем колонку radius если её нет
-        try:
-            cursor.execute("ALTER TABLE molodniki_data ADD COLUMN radius REAL DEFAULT 5.64")
-        except sqlite3.OperationalError:
-            pass  # Столбец уже существует
-
-        # Создаем таблицу для хранения итогов по страницам
-        cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_totals (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        page_number INTEGER,
-                        section_name TEXT,
-                        total_composition TEXT,
-                        total_area REAL DEFAULT 0.0,
-                        avg_age REAL DEFAULT 0.0,
-                        avg_density REAL DEFAULT 0.0,
-                        avg_height REAL DEFAULT 0.0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_totals_page ON molodniki_totals (page_number, section_name)')
-
-        # Создаем таблицу для хранения настроек участка
-        cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_settings (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        section_name TEXT UNIQUE,
-                        radius REAL DEFAULT 5.64,
-                        plot_area REAL DEFAULT 0.0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_settings_section ON molodniki_settings (section_name)')
-
-        # Создаем таблицу для хранения данных пород (JSON)
-        cursor.execute('''CREATE TABLE IF NOT EXISTS molodniki_suggestions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        column_index INTEGER,
-                        value TEXT,
-                        UNIQUE(column_index, value))''')
-
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_molodniki_suggestions ON molodniki_suggestions (column_index, value)')
-
-        # Создаем таблицу для хранения пользовательских пород
-        cursor.execute('''CREATE TABLE IF NOT EXISTS custom_breeds (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        breed_name TEXT UNIQUE,
-                        breed_type TEXT, -- 'coniferous' или 'deciduous'
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_custom_breeds ON custom_breeds (breed_type)')
-
-        conn.commit()
-        conn.close()
-
     def save_custom_breed_to_db(self, breed_name, breed_type):
         """Сохранить новую породу в базу данных"""
-        conn = sqlite3.connect(self.db_name)
+        conn = get_connection(self.db_name)
         cursor = conn.cursor()
         try:
             cursor.execute('''
@@ -1446,7 +1327,7 @@ class ExtendedMolodnikiTableScreen(Screen):
 
     def load_custom_breeds(self, breed_type):
         """Загрузить пользовательские породы из базы данных"""
-        conn = sqlite3.connect(self.db_name)
+        conn = get_connection(self.db_name)
         cursor = conn.cursor()
         cursor.execute('''
             SELECT breed_name FROM custom_breeds
@@ -1640,7 +1521,7 @@ class ExtendedMolodnikiTableScreen(Screen):
 
             def do_delete(instance):
                 """Выполнить удаление"""
-                conn = sqlite3.connect(self.db_name)
+                conn = get_connection(self.db_name)
                 cursor = conn.cursor()
                 for breed in breeds_to_delete:
                     cursor.execute('''
@@ -1979,6 +1860,7 @@ class ExtendedMolodnikiTableScreen(Screen):
             # Показываем popup с параметрами породы, передавая название выбранной породы
             self.show_breed_details_popup(instance, breed_type, selected_breed)
 
+    @timed('popup.breed_details')
     def show_breed_details_popup(self, instance, breed_type, selected_breed=None):
         """Показать popup для ввода параметров породы (единый поток сохранения)"""
         content = MDBoxLayout(orientation='vertical', spacing=10, padding=10, md_bg_color=Colors.DARK_SURFACE)
@@ -2675,6 +2557,8 @@ class ExtendedMolodnikiTableScreen(Screen):
 
     def save_totals_to_excel(self, breeds_data, current_radius, plot_area_ha, plot_count, total_plot_area_ha):
         """Сохранить итоговые данные в Excel на новом листе"""
+        from core.excel_stream import new_workbook, StreamingSheet
+
         timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
         document_name = self.project_data.get('document_name', 'Проект')
         # Очень короткое имя файла на основе названия проекта (макс 10 символов)
@@ -2683,22 +2567,24 @@ class ExtendedMolodnikiTableScreen(Screen):
         full_path = os.path.join(self.reports_dir, filename)
 
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Итоги"
+            wb = new_workbook()
+            sheet = StreamingSheet(wb, "Итоги")
+            section_font = openpyxl.styles.Font(bold=True, size=12)
+            rows = []
 
             # Заголовок
-            ws['A1'] = f'ИТОГИ ПО УЧАСТКУ МОЛОДНЯКОВ - {self.current_section}'
-            ws['A1'].font = openpyxl.styles.Font(bold=True, size=14)
-            ws.merge_cells('A1:E1')
+            rows.append([sheet.cell(f'ИТОГИ ПО УЧАСТКУ МОЛОДНЯКОВ - {self.current_section}',
+                                    font=openpyxl.styles.Font(bold=True, size=14))])
+            sheet.merge('A1:E1')
+            rows.append([])
 
             # Информация о радиусе
-            ws['A3'] = f'Радиус участка: {current_radius:.2f} м'
-            ws['A4'] = f'1 дерево = {10000 / (3.14159 * (current_radius ** 2)):.0f} тыс.шт./га'
+            rows.append([f'Радиус участка: {current_radius:.2f} м'])
+            rows.append([f'1 дерево = {10000 / (3.14159 * (current_radius ** 2)):.0f} тыс.шт./га'])
+            rows.append([])
 
             # Коэффициент состава
-            ws['A6'] = 'КОЭФФИЦИЕНТ СОСТАВА НАСАЖДЕНИЯ'
-            ws['A6'].font = openpyxl.styles.Font(bold=True, size=12)
+            rows.append([sheet.cell('КОЭФФИЦИЕНТ СОСТАВА НАСАЖДЕНИЯ', font=section_font)])
 
             # Расчет коэффициента состава
             total_densities = {}
@@ -2748,18 +2634,15 @@ class ExtendedMolodnikiTableScreen(Screen):
                         composition_parts.append(f"{coeffs[i]}{breed_letter}")
 
                 composition_text = ''.join(composition_parts) + "Др"
-                ws['A7'] = f"Формула состава: {composition_text}"
+                rows.append([f"Формула состава: {composition_text}"])
+            else:
+                rows.append([])
+            rows.append([])
 
             # Хвойные породы
-            row = 9
-            ws[f'A{row}'] = 'ХВОЙНЫЕ ПОРОДЫ - ВЫСОТА ПО ГРАДАЦИЯМ'
-            ws[f'A{row}'].font = openpyxl.styles.Font(bold=True, size=12)
-
-            has_coniferous = False
+            coniferous_rows = []
             for breed_name, data in sorted(breeds_data.items()):
                 if data['type'] == 'coniferous' and data['plots']:
-                    has_coniferous = True
-                    row += 1
                     zones = data.get('coniferous_zones', {})
                     # Густота по градациям = общее кол-во деревьев в градации / общая площадь всех площадок в га
                     plot_area_ha = 3.14159 * (float(current_radius) if current_radius else 1.78) ** 2 / 10000
@@ -2773,27 +2656,21 @@ class ExtendedMolodnikiTableScreen(Screen):
                     # Высота = средняя только на тех площадках, где есть порода
                     avg_height_total = sum(p['height'] for p in data['plots'] if p['height'] > 0) / len([p for p in data['plots'] if p['height'] > 0]) if any(p['height'] > 0 for p in data['plots']) else 0
 
-                    ws[f'A{row}'] = f"{breed_name}:"
-                    ws[f'B{row}'] = f"до 0.5м: {avg_do_05:.1f} шт/га"
-                    row += 1
-                    ws[f'B{row}'] = f"0.5-1.5м: {avg_05_15:.1f} шт/га"
-                    row += 1
-                    ws[f'B{row}'] = f">1.5м: {avg_bolee_15:.1f} шт/га"
-                    row += 1
-                    ws[f'B{row}'] = f"средняя высота породы: {avg_height_total:.1f}м"
-                    row += 1
+                    coniferous_rows.append([f"{breed_name}:", f"до 0.5м: {avg_do_05:.1f} шт/га"])
+                    coniferous_rows.append([None, f"0.5-1.5м: {avg_05_15:.1f} шт/га"])
+                    coniferous_rows.append([None, f">1.5м: {avg_bolee_15:.1f} шт/га"])
+                    coniferous_rows.append([None, f"средняя высота породы: {avg_height_total:.1f}м"])
+                    coniferous_rows.append([])
+
+            if coniferous_rows:
+                rows.append([sheet.cell('ХВОЙНЫЕ ПОРОДЫ - ВЫСОТА ПО ГРАДАЦИЯМ', font=section_font)])
+                rows.extend(coniferous_rows)
 
             # Лиственные породы
-            if has_coniferous:
-                row += 1
-            ws[f'A{row}'] = 'ЛИСТВЕННЫЕ ПОРОДЫ - СРЕДНИЕ ПОКАЗАТЕЛИ'
-            ws[f'A{row}'].font = openpyxl.styles.Font(bold=True, size=12)
+            rows.append([sheet.cell('ЛИСТВЕННЫЕ ПОРОДЫ - СРЕДНИЕ ПОКАЗАТЕЛИ', font=section_font)])
 
-            has_deciduous = False
             for breed_name, data in sorted(breeds_data.items()):
                 if data['type'] == 'deciduous' and data['plots']:
-                    has_deciduous = True
-                    row += 1
                     # Густота = общее количество деревьев / общая площадь всех площадок в га
                     total_trees = sum(p.get('density_raw', 0) for p in data['plots'])
                     plot_area_ha = 3.14159 * (float(current_radius) if current_radius else 1.78) ** 2 / 10000
@@ -2806,26 +2683,13 @@ class ExtendedMolodnikiTableScreen(Screen):
                     avg_ages = [p['age'] for p in data['plots'] if p['age'] > 0]
                     avg_age = sum(avg_ages) / len(avg_ages) if avg_ages else 0
 
-                    ws[f'A{row}'] = f"{breed_name}:"
-                    ws[f'B{row}'] = f"Средняя густота: {avg_density:.1f} шт/га"
-                    row += 1
-                    ws[f'B{row}'] = f"Средняя высота: {avg_height:.1f}м"
-                    row += 1
-                    ws[f'B{row}'] = f"Средний возраст: {avg_age:.1f} лет"
-                    row += 1
+                    rows.append([f"{breed_name}:", f"Средняя густота: {avg_density:.1f} шт/га"])
+                    rows.append([None, f"Средняя высота: {avg_height:.1f}м"])
+                    rows.append([None, f"Средний возраст: {avg_age:.1f} лет"])
+                    rows.append([])
 
-            # Автоподбор ширины столбцов
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            # Ширина столбцов подбирается при записи
+            sheet.write(rows)
 
             wb.save(full_path)
             self.show_success(f"Итоги сохранены в Excel: {filename}")
@@ -3282,44 +3146,6 @@ class ExtendedMolodnikiTableScreen(Screen):
             return self.plot_area_input
         return ''
 
-    def update_plot_total(self, instance, value):
-        """Обновляем итог по площадке при изменении данных"""
-        row_idx = instance.row_index
-
-        breeds_text = self.inputs[row_idx][3].text
-        breeds_data = self.parse_breeds_data(breeds_text)
-
-        if not breeds_data:
-            return
-
-        total_density = 0
-        total_height = 0.0
-        total_age = 0
-        breed_count = 0
-        breed_names = []
-
-        for breed_info in breeds_data:
-            breed_count += 1
-            breed_name = breed_info.get('name', 'Неизвестная')
-            breed_names.append(breed_name)
-
-            if breed_info.get('type') == 'coniferous':
-                coniferous_density = (breed_info.get('do_05', 0) +
-                                    breed_info.get('05_15', 0) +
-                                    breed_info.get('bolee_15', 0))
-                if coniferous_density > 0:
-                    total_density += coniferous_density
-            elif 'density' in breed_info and breed_info['density']:
-                total_density += breed_info['density']
-
-            if 'height' in breed_info and breed_info['height']:
-                total_height += breed_info['height']
-            if 'age' in breed_info and breed_info['age']:
-                total_age += breed_info['age']
-
-        # Обновляем общие итоги
-        self.update_totals()
-
     def show_care_queue_popup(self, instance):
         """Показать popup для выбора мероприятий рубки"""
         content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
@@ -3869,29 +3695,6 @@ class ExtendedMolodnikiTableScreen(Screen):
         cancel_btn.bind(on_release=popup.dismiss)
         popup.open()
 
-    def get_breed_letter(self, breed_name):
-        """Получение первой буквы для коэффициента состава породы"""
-        breed_letters = {
-            'Сосна': 'С',
-            'Ель': 'Е',
-            'Пихта': 'П',
-            'Кедр': 'К',
-            'Лиственница': 'Л',
-            'Берёза': 'Б',
-            'Осина': 'Ос',
-            'Ольха чёрная': 'ОЧ',
-            'Ольха серая': 'ОС',
-            'Ива': 'И',
-            'Ива кустарниковая': 'ИК'
-        }
-
-        for full_name, letter in breed_letters.items():
-            if full_name.lower() in breed_name.lower():
-                return letter
-
-        # Возвращаем первую букву имени породы, если не найдено
-        return breed_name[0].upper() if breed_name else 'Н'
-
     def show_error(self, message):
         content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
                               md_bg_color=Colors.DARK_SURFACE, adaptive_height=True)
@@ -4140,56 +3943,6 @@ class ExtendedMolodnikiTableScreen(Screen):
 
         popup.open()
 
-    def parse_care_subject_density(self, care_text):
-        """Парсит предмет ухода и возвращает оставляемую густоту на гектар"""
-        if not care_text:
-            return 0
-
-        care_text = care_text.strip().upper()
-
-        # Регулярное выражение для поиска чисел и букв
-        # Примеры: "3С", "2Б1С", "1Е0.5С" и т.д.
-        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
-
-        if not matches:
-            return 0
-
-        total_density = 0
-        for number_str, breed_code in matches:
-            try:
-                density = float(number_str)
-                total_density += density
-            except ValueError:
-                continue
-
-        # Предмет ухода показывает сколько деревьев оставить на гектар
-        # Например, "3С" значит оставить 3000 сосен на гектар
-        return total_density * 1000  # Умножаем на 1000, так как числа обычно означают тысячи деревьев
-
-    def parse_care_subject_by_breeds(self, care_text):
-        """Парсит предмет ухода и возвращает словарь {порода: густота в тыс. шт/га}"""
-        if not care_text:
-            return {}
-
-        care_text = care_text.strip().upper()
-
-        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
-
-        if not matches:
-            return {}
-
-        breed_densities = {}
-        for number_str, breed_code in matches:
-            try:
-                density = float(number_str)
-                if breed_code not in breed_densities:
-                    breed_densities[breed_code] = 0
-                breed_densities[breed_code] += density
-            except ValueError:
-                continue
-
-        return breed_densities
-
     def _show_open_project_popup(self, output_file, stdout_text):
         """Спросить пользователя: открыть проект в Word или Excel"""
         content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
@@ -4296,20 +4049,6 @@ class ExtendedMolodnikiTableScreen(Screen):
                 'address_data': address_data
             })
 
-            # Создаем временный JSON файл с данными для скрипта
-            import tempfile
-            import subprocess
-
-            temp_data = {
-                'address_data': address_data,
-                'total_data': total_data
-            }
-
-            # Сохраняем данные во временный файл
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
-                json.dump(temp_data, f, ensure_ascii=False, indent=2)
-                temp_file = f.name
-            
             # ОТЛАДОЧНЫЙ ВЫВОД
             print("=" * 60)
             print("ОТЛАДКА: Данные для проекта ухода")
@@ -4322,515 +4061,28 @@ class ExtendedMolodnikiTableScreen(Screen):
                 print(f"  - {breed.get('name')}: d={breed.get('diameter')}, h={breed.get('height')}, density={breed.get('density')}")
             print("=" * 60)
 
-            # Вызываем скрипт fill_our_template.py с параметром
-            script_path = os.path.join(os.path.dirname(__file__), 'fill_our_template.py')
-            result = subprocess.run([
-                sys.executable, script_path, '--data-file', temp_file
-            ], capture_output=True, text=False)
-
-            # Удаляем временный файл
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
+            # Заполняем шаблон в этом же процессе, в фоновом потоке
+            def fill_job():
+                from fill_our_template import fill_project
+                output_file, diagnostics = fill_project(address_data, total_data)
+                log_text = "\n".join(f"[{level}] {message}" for level, message in diagnostics)
+                if output_file:
+                    return (output_file, log_text), None
+                errors = [message for level, message in diagnostics if level == 'ERROR']
+                return None, "\n".join(errors) or log_text
+
+            def on_done(batch):
+                result, error = batch.results['project']
+                if result:
+                    self._show_open_project_popup(*result)
+                else:
+                    self.show_error(f"Ошибка при создании проекта ухода:\n{error}")
 
-            # Декодируем вывод с обработкой ошибок кодировки
-            def decode_output(output_bytes):
-                try:
-                    if output_bytes is None:
-                        return ""
-                    if not output_bytes:
-                        return ""
-                    return output_bytes.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        return output_bytes.decode('cp1251')
-                    except UnicodeDecodeError:
-                        return output_bytes.decode('utf-8', errors='replace')
-                except Exception:
-                    return ""
-
-            if result.returncode == 0:
-                stdout_text = decode_output(result.stdout)
-                # Извлекаем путь к файлу из вывода
-                output_file = ''
-                for line in stdout_text.split('\n'):
-                    if '[OK]' in line:
-                        output_file = line.split(':', 1)[-1].strip() if ':' in line else ''
-                        break
-                self._show_open_project_popup(output_file, stdout_text)
-            else:
-                stderr_text = decode_output(result.stderr)
-                self.show_error(f"Ошибка при создании проекта ухода:\n{stderr_text}")
+            get_runner().submit([('project', fill_job)], on_done=on_done)
 
         except Exception as e:
             self.show_error(f"Ошибка при генерации проекта ухода: {str(e)}")
 
-    def get_total_data_from_db(self):
-        """Получает итоговые данные из рассчитанных данных меню Итого"""
-        try:
-            # Используем рассчитанные данные из меню Итого вместо данных из БД
-            # Получаем данные аналогично методу show_total_summary_popup
-
-            default_radius = float(self.current_radius) if self.current_radius else 5.64
-            plot_area_ha = 3.14159 * (default_radius ** 2) / 10000
-
-            # Словарь для сбора данных по породам
-            breeds_data = {}
-
-            # Обрабатываем все страницы
-            for page_num, page_rows in self.page_data.items():
-                for row in page_rows:
-                    if len(row) < 4:
-                        continue
-
-                    # Столбец "Порода" в row[3]
-                    breeds_text = row[3]
-                    if not breeds_text:
-                        continue
-
-                    try:
-                        breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                    except json.JSONDecodeError:
-                        continue
-
-                    for breed_info in breeds_list:
-                        if not isinstance(breed_info, dict):
-                            continue
-
-                        breed_name = breed_info.get('name', '').strip()
-                        if not breed_name:
-                            continue
-
-                        breed_type = breed_info.get('type', 'deciduous')
-                        density = 0
-                        height = None
-                        age = None
-
-                        # Расчет густоты и высоты в зависимости от типа породы
-                        if breed_type == 'coniferous':
-                            do_05 = breed_info.get('do_05', 0)
-                            _05_15 = breed_info.get('05_15', 0)
-                            bolee_15 = breed_info.get('bolee_15', 0)
-                            density = (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
-
-                            # Для хвойных пород определяем высоту по градациям или среднюю
-                            if any([do_05, _05_15, bolee_15]):
-                                # Высота определяется по градациям
-                                if bolee_15 > 0:
-                                    height = 2.0  # >1.5m
-                                elif _05_15 > 0:
-                                    height = 1.0  # 0.5-1.5m
-                                elif do_05 > 0:
-                                    height = 0.3  # до 0.5m
-                                else:
-                                    height = 0.0
-                            else:
-                                height = breed_info.get('height', 0) or 0
-                        else:
-                            # Для лиственных пород - обычная плотность и средняя высота
-                            density_value = breed_info.get('density', 0)
-                            density = density_value / plot_area_ha if plot_area_ha > 0 else 0
-                            height = breed_info.get('height', 0) or 0
-
-                        age = breed_info.get('age', 0) or 0
-                        diameter = breed_info.get('diameter', 0) or 0
-
-                        # Сбор данных по породе
-                        if breed_name not in breeds_data:
-                            breeds_data[breed_name] = {
-                                'type': breed_type,
-                                'plots': [],
-                                'coniferous_zones': {'do_05': 0, '05_15': 0, 'bolee_15': 0} if breed_type == 'coniferous' else None,
-                                'diameters': []
-                            }
-
-                        # Добавляем данные
-                        plot_data = {
-                            'density': density,
-                            'height': height,
-                            'age': age,
-                            'diameter': diameter  # ✅ ДОБАВЛЕНО: сохраняем диаметр в plot_data
-                        }
-
-                        if breed_type == 'coniferous':
-                            plot_data.update({
-                                'do_05_density': do_05 / plot_area_ha if plot_area_ha > 0 else 0,
-                                '05_15_density': _05_15 / plot_area_ha if plot_area_ha > 0 else 0,
-                                'bolee_15_density': bolee_15 / plot_area_ha if plot_area_ha > 0 else 0
-                            })
-
-                        breeds_data[breed_name]['plots'].append(plot_data)
-                        breeds_data[breed_name]['diameters'].append(diameter)
-
-                        if breed_type == 'coniferous':
-                            breeds_data[breed_name]['coniferous_zones']['do_05'] += plot_data['do_05_density']
-                            breeds_data[breed_name]['coniferous_zones']['05_15'] += plot_data['05_15_density']
-                            breeds_data[breed_name]['coniferous_zones']['bolee_15'] += plot_data['bolee_15_density']
-
-            # Расчет коэффициента состава на основе СРЕДНЕЙ густоты пород
-            total_densities = {}
-            total_density_all = 0  # Общая густота всех пород (сумма средних)
-            
-            for breed_name, data in breeds_data.items():
-                if data['plots']:
-                    # Рассчитываем СРЕДНЮЮ густоту породы (сумма плотностей / кол-во площадок)
-                    if data['plots'][0].get('type') == 'coniferous':
-                        # Для хвойных суммируем густоту по градациям и делим на кол-во площадок
-                        total_density = sum(
-                            (p.get('do_05_density', 0) + p.get('05_15_density', 0) + p.get('bolee_15_density', 0))
-                            for p in data['plots']
-                        ) / len(data['plots'])
-                    else:
-                        # Для лиственных обычная средняя густота
-                        total_density = sum(p.get('density', 0) for p in data['plots']) / len(data['plots'])
-                    
-                    total_density_all += total_density
-                    if total_density > 0:
-                        total_densities[breed_name] = total_density
-
-            # Расчет коэффициентов состава
-            composition_text = ""
-            if total_densities:
-                composition_parts = []
-
-                # Сортируем по убыванию плотности
-                for breed_name, density in sorted(total_densities.items(), key=lambda x: x[1], reverse=True):
-                    breed_letter = self.get_breed_letter(breed_name)
-                    # Просто добавляем букву, коэффициент будет рассчитан ниже
-                    composition_parts.append(f"0{breed_letter}")
-
-                # Корректировка чтобы сумма равнялась 10 (метод наибольшего остатка)
-                # Сначала рассчитываем точные коэффициенты
-                exact_coeffs = []
-                for breed_name, density in sorted(total_densities.items(), key=lambda x: x[1], reverse=True):
-                    exact_coeff = (density / total_density_all * 10) if total_density_all > 0 else 1
-                    exact_coeffs.append(exact_coeff)
-                
-                # Округляем вниз
-                coeffs_floor = [int(coeff) for coeff in exact_coeffs]
-                # Считаем остатки
-                remainders = [(exact_coeffs[i] - coeffs_floor[i], i) for i in range(len(exact_coeffs))]
-                # Сортируем по убыванию остатков
-                remainders.sort(reverse=True)
-                
-                # Распределяем единицы начиная с наибольших остатков
-                coeffs = coeffs_floor[:]
-                total = sum(coeffs)
-                i = 0
-                while total < 10 and i < len(remainders):
-                    idx = remainders[i][1]
-                    coeffs[idx] += 1
-                    total += 1
-                    i += 1
-                
-                # Обновляем composition_parts
-                sorted_breeds = sorted(total_densities.items(), key=lambda x: x[1], reverse=True)
-                composition_parts = []
-                for i, (breed_name, _) in enumerate(sorted_breeds):
-                    if i < len(coeffs):
-                        breed_letter = self.get_breed_letter(breed_name)
-                        composition_parts.append(f"{coeffs[i]}{breed_letter}")
-
-                composition_text = ''.join(composition_parts) + "Др"
-
-            # Расчет предмета ухода и интенсивности
-            care_data = []
-            total_density_all_plots = 0
-            total_remaining_density = 0
-            plot_count_with_care = 0
-
-            for page_num, page_rows in self.page_data.items():
-                for row in page_rows:
-                    if len(row) >= 4 and row[3]:
-                        plot_density = 0
-                        breeds_text = row[3]
-                        if breeds_text:
-                            try:
-                                breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                                for breed_info in breeds_list:
-                                    if isinstance(breed_info, dict):
-                                        if breed_info.get('type') == 'coniferous':
-                                            do_05 = breed_info.get('do_05', 0)
-                                            _05_15 = breed_info.get('05_15', 0)
-                                            bolee_15 = breed_info.get('bolee_15', 0)
-                                            plot_density += (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
-                                        else:
-                                            density = breed_info.get('density', 0)
-                                            plot_density += density / plot_area_ha if plot_area_ha > 0 else 0
-                            except (json.JSONDecodeError, TypeError):
-                                pass
-
-                        if plot_density > 0:
-                            total_density_all_plots += plot_density
-
-                    if len(row) >= 4 and row[2]:
-                        care_text = row[2].strip()
-                        if care_text:
-                            plot_density = 0
-                            breeds_text = row[3]
-                            if breeds_text:
-                                try:
-                                    breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                                    for breed_info in breeds_list:
-                                        if isinstance(breed_info, dict):
-                                            if breed_info.get('type') == 'coniferous':
-                                                do_05 = breed_info.get('do_05', 0)
-                                                _05_15 = breed_info.get('05_15', 0)
-                                                bolee_15 = breed_info.get('bolee_15', 0)
-                                                plot_density += (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
-                                            else:
-                                                density = breed_info.get('density', 0)
-                                                plot_density += density / plot_area_ha if plot_area_ha > 0 else 0
-                                except (json.JSONDecodeError, TypeError):
-                                    pass
-
-                            if plot_density > 0:
-                                remaining_density = self.parse_care_subject_density(care_text)
-                                if remaining_density > 0:
-                                    care_data.append({
-                                        'care_text': care_text,
-                                        'plot_density': plot_density,
-                                        'remaining_density': remaining_density
-                                    })
-                                    total_remaining_density += remaining_density
-                                    plot_count_with_care += 1
-
-            # Расчет среднего предмета ухода
-            care_subject = ""
-            intensity = 25.0  # По умолчанию
-
-            if care_data:
-                care_breed_totals = {}
-                care_plot_count = 0
-
-                for item in care_data:
-                    care_text = item['care_text']
-                    breed_densities = self.parse_care_subject_by_breeds(care_text)
-                    for breed, density in breed_densities.items():
-                        if breed not in care_breed_totals:
-                            care_breed_totals[breed] = 0
-                        care_breed_totals[breed] += density
-                    care_plot_count += 1
-
-                if care_breed_totals and care_plot_count > 0:
-                    avg_care_parts = []
-                    for breed, total_density in sorted(care_breed_totals.items()):
-                        avg_density = total_density / care_plot_count
-                        avg_care_parts.append(f"{avg_density * 1000:.0f}шт/га{breed}")
-                    care_subject = ''.join(avg_care_parts)
-
-                    # Расчет интенсивности
-                    if plot_count_with_care > 0:
-                        avg_remaining_density = total_remaining_density / plot_count_with_care
-                        # Используем среднюю густоту по площадкам для расчёта интенсивности
-                        num_plots = len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)])
-                        avg_overall_density_for_intensity = total_density_all_plots / num_plots if num_plots > 0 else 0
-
-                        if avg_overall_density_for_intensity > 0:
-                            intensity = ((avg_overall_density_for_intensity - avg_remaining_density) / avg_overall_density_for_intensity) * 100
-                            print(f"[DEBUG] Интенсивность: {avg_overall_density_for_intensity:.1f} - {avg_remaining_density:.0f} / {avg_overall_density_for_intensity:.1f} = {intensity:.1f}%")
-
-            # Расчет средних значений по участку (ОБЩАЯ густота, высота, диаметр, возраст)
-            # ВАЖНО: Считаем по ПЛОЩАДКАМ, а не по породам!
-            # 1. Для каждой площадки: суммируем густоту по всем породам
-            # 2. Для каждой площадки: средние высота/диаметр/возраст по породам
-            # 3. Среднее по всем площадкам
-            
-            # Сначала собираем данные по площадкам из исходных строк
-            plot_data_list = []  # Список данных по каждой площадке
-            
-            for page_num, page_rows in self.page_data.items():
-                for row_idx, row in enumerate(page_rows):
-                    if len(row) < 4:
-                        continue
-                    
-                    breeds_text = row[3]
-                    if not breeds_text:
-                        continue
-                    
-                    # Данные по этой площадке
-                    plot_total_density = 0
-                    plot_height_sum = 0
-                    plot_height_count = 0
-                    plot_diameter_sum = 0
-                    plot_diameter_count = 0
-                    plot_age_sum = 0
-                    plot_age_count = 0
-                    
-                    try:
-                        breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                        
-                        for breed_info in breeds_list:
-                            if not isinstance(breed_info, dict):
-                                continue
-                            
-                            breed_type = breed_info.get('type', 'deciduous')
-                            
-                            # Расчёт густоты
-                            if breed_type == 'coniferous':
-                                do_05 = breed_info.get('do_05', 0)
-                                _05_15 = breed_info.get('05_15', 0)
-                                bolee_15 = breed_info.get('bolee_15', 0)
-                                total_trees = do_05 + _05_15 + bolee_15
-                                density = total_trees / plot_area_ha if plot_area_ha > 0 else 0
-                                
-                                # Высота для хвойных по градациям
-                                if bolee_15 > 0:
-                                    height = 2.0
-                                elif _05_15 > 0:
-                                    height = 1.0
-                                elif do_05 > 0:
-                                    height = 0.3
-                                else:
-                                    height = breed_info.get('height', 0) or 0
-                            else:
-                                density_value = breed_info.get('density', 0)
-                                density = density_value / plot_area_ha if plot_area_ha > 0 else 0
-                                height = breed_info.get('height', 0) or 0
-                            
-                            diameter = breed_info.get('diameter', 0) or 0
-                            age = breed_info.get('age', 0) or 0
-                            
-                            # Суммируем по площадке
-                            plot_total_density += density
-                            if height > 0:
-                                plot_height_sum += height
-                                plot_height_count += 1
-                            if diameter > 0:
-                                plot_diameter_sum += diameter
-                                plot_diameter_count += 1
-                            if age > 0:
-                                plot_age_sum += age
-                                plot_age_count += 1
-                        
-                        # Сохраняем данные площадки
-                        plot_data_list.append({
-                            'density': plot_total_density,
-                            'height': plot_height_sum / plot_height_count if plot_height_count > 0 else 0,
-                            'diameter': plot_diameter_sum / plot_diameter_count if plot_diameter_count > 0 else 0,
-                            'age': plot_age_sum / plot_age_count if plot_age_count > 0 else 0
-                        })
-                        
-                    except (json.JSONDecodeError, TypeError) as e:
-                        print(f"[WARNING] Ошибка обработки строки: {e}")
-                        continue
-            
-            # Рассчитываем средние по ВСЕМ ПЛОЩАДКАМ
-            num_plots = len(plot_data_list)
-            
-            if num_plots > 0:
-                avg_overall_density = sum(p['density'] for p in plot_data_list) / num_plots
-                avg_overall_height = sum(p['height'] for p in plot_data_list) / num_plots
-                avg_overall_diameter = sum(p['diameter'] for p in plot_data_list) / num_plots
-                avg_overall_age = sum(p['age'] for p in plot_data_list) / num_plots
-            else:
-                avg_overall_density = 0
-                avg_overall_height = 0
-                avg_overall_diameter = 0
-                avg_overall_age = 0
-
-            # Формируем итоговые данные
-            total_data = {
-                'page_number': self.current_page,
-                'section_name': self.current_section or '',
-                'total_composition': composition_text,
-                'avg_age': avg_overall_age,
-                'avg_density': avg_overall_density,
-                'avg_height': avg_overall_height,
-                'avg_diameter': avg_overall_diameter,  # РАССЧИТЫВАЕМ!
-                'total_plots': len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)]),
-                'composition': composition_text,
-                'care_subject': care_subject,
-                'intensity': intensity if intensity > 0 else 25,  # Если не рассчитана, по умолчанию 25%
-                'breeds': []
-            }
-
-            # Добавляем данные по породам
-            for breed_name, data in breeds_data.items():
-                if data['plots']:
-                    avg_density = sum(p['density'] for p in data['plots']) / len(data['plots'])
-                    avg_height = sum(p['height'] for p in data['plots'] if p['height'] > 0) / len([p for p in data['plots'] if p['height'] > 0]) if any(p['height'] > 0 for p in data['plots']) else 0
-                    avg_age = sum(p['age'] for p in data['plots'] if p['age'] > 0) / len([p for p in data['plots'] if p['age'] > 0]) if any(p['age'] > 0 for p in data['plots']) else 0
-                    avg_diameter = sum(p.get('diameter', 0) for p in data['plots'] if p.get('diameter', 0) > 0) / len([p for p in data['plots'] if p.get('diameter', 0) > 0]) if any(p.get('diameter', 0) > 0 for p in data['plots']) else 0
-
-                    breed_data = {
-                        'name': breed_name,
-                        'type': data['type'],
-                        'density': avg_density,
-                        'height': avg_height,
-                        'age': avg_age,
-                        'diameter': avg_diameter  # ДОБАВЛЯЕМ ДИАМЕТР!
-                    }
-
-                    if data['type'] == 'coniferous':
-                        zones = data.get('coniferous_zones', {})
-                        breed_data.update({
-                            'do_05': zones.get('do_05', 0) / len(data['plots']) if data['plots'] else 0,
-                            '_05_15': zones.get('05_15', 0) / len(data['plots']) if data['plots'] else 0,
-                            'bolee_15': zones.get('bolee_15', 0) / len(data['plots']) if data['plots'] else 0
-                        })
-
-                    total_data['breeds'].append(breed_data)
-
-            return total_data
-
-        except Exception as e:
-            print(f"Ошибка получения данных из меню Итого: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
-
-    def parse_care_subject_density(self, care_text):
-        """Парсит предмет ухода и возвращает оставляемую густоту на гектар"""
-        if not care_text:
-            return 0
-
-        care_text = care_text.strip().upper()
-
-        # Регулярное выражение для поиска чисел и букв
-        # Примеры: "3С", "2Б1С", "1Е0.5С" и т.д.
-        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
-
-        if not matches:
-            return 0
-
-        total_density = 0
-        for number_str, breed_code in matches:
-            try:
-                density = float(number_str)
-                total_density += density
-            except ValueError:
-                continue
-
-        # Предмет ухода показывает сколько деревьев оставить на гектар
-        # Например, "3С" значит оставить 3000 сосен на гектар
-        return total_density * 1000  # Умножаем на 1000, так как числа обычно означают тысячи деревьев
-
-    def parse_care_subject_by_breeds(self, care_text):
-        """Парсит предмет ухода и возвращает словарь {порода: густота в тыс. шт/га}"""
-        if not care_text:
-            return {}
-
-        care_text = care_text.strip().upper()
-
-        matches = re.findall(r'(\d+(?:\.\d+)?)([А-ЯA-Z]+)', care_text)
-
-        if not matches:
-            return {}
-
-        breed_densities = {}
-        for number_str, breed_code in matches:
-            try:
-                density = float(number_str)
-                if breed_code not in breed_densities:
-                    breed_densities[breed_code] = 0
-                breed_densities[breed_code] += density
-            except ValueError:
-                continue
-
-        return breed_densities
-
     def _get_current_plot_area_input(self):
         """Получить текущее значение площади участка"""
         # If stored in instance variable
@@ -4838,29 +4090,6 @@ class ExtendedMolodnikiTableScreen(Screen):
             return self.plot_area_input
         return ''
 
-    def get_breed_letter(self, breed_name):
-        """Получение первой буквы для коэффициента состава породы"""
-        breed_letters = {
-            'Сосна': 'С',
-            'Ель': 'Е',
-            'Пихта': 'П',
-            'Кедр': 'К',
-            'Лиственница': 'Л',
-            'Берёза': 'Б',
-            'Осина': 'Ос',
-            'Ольха чёрная': 'ОЧ',
-            'Ольха серая': 'ОС',
-            'Ива': 'И',
-            'Ива кустарниковая': 'ИК'
-        }
-
-        for full_name, letter in breed_letters.items():
-            if full_name.lower() in breed_name.lower():
-                return letter
-
-        # Возвращаем первую букву имени породы, если не найдено
-        return breed_name[0].upper() if breed_name else 'Н'
-
     def show_edit_plots_popup(self, instance):
         """Показать popup со списком площадок для управления породами"""
         content = MDBoxLayout(orientation='vertical', spacing=15, padding=15, md_bg_color=Colors.DARK_SURFACE)
@@ -5380,284 +4609,25 @@ class ExtendedMolodnikiTableScreen(Screen):
         """Открыть popup редактирования для выбранной площадки"""
         MolodnikiTreeDataInputPopup(self, row_index).open()
 
-    def save_to_json(self, instance=None):
-        """Сохранение данных в JSON формате"""
-        # Получаем итоговые данные (total_data) из меню Итого
-        total_data = self.get_total_data_from_db()
+    @timed('export.all_formats')
+    def save_all_formats(self, instance=None):
+        """Сохранить данные во всех форматах сразу"""
+        success_messages = []
+        error_messages = []
 
-        data = {
-            'page_data': self.page_data,
-            'section': self.current_section,
-            'quarter': self.current_quarter,
-            'plot': self.current_plot,
-            'forestry': self.current_forestry,
-            'radius': self.current_radius,
-            'project_data': self.project_data,  # Данные проекта
-            'total_data': total_data,  # ✅ ДОБАВЛЕНО: итоговые данные с породами
-            'export_date': datetime.datetime.now().isoformat()
-        }
+        # Проверка наличия данных
+        if not self.page_data:
+            error_messages.append("Нет данных для сохранения!")
+            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
+            return
 
-        timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
-        document_name = self.project_data.get('document_name', 'Проект')
-        # Очень короткое имя файла на основе названия проекта (макс 10 символов)
-        short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
-        filename = f"{short_name}_{self.current_section}_{timestamp}.json"
-        full_path = os.path.join(self.reports_dir, filename)
+        # Проверка наличия участка
+        if not self.current_section:
+            error_messages.append("Не указан номер участка!")
+            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
+            return
 
-        try:
-            with open(full_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return f"JSON: {filename}", None
-        except Exception as e:
-            return None, f"Ошибка сохранения JSON: {str(e)}"
-
-    def save_to_excel_without_dialog(self):
-        """Сохранение в Excel без диалога"""
-        timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
-        document_name = self.project_data.get('document_name', 'Проект')
-        # Очень короткое имя файла на основе названия проекта (макс 10 символов)
-        short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
-        filename = f"{short_name}_{self.current_section}_{timestamp}.xlsx"
-        full_path = os.path.join(self.reports_dir, filename)
-
-        try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Молодняки"
-
-            address_parts = []
-            if self.current_quarter:
-                address_parts.append(f"Квартал: {self.current_quarter}")
-            if self.current_plot:
-                address_parts.append(f"Выдел: {self.current_plot}")
-            if self.current_forestry:
-                address_parts.append(f"Лесничество: {self.current_forestry}")
-            if self.current_radius:
-                address_parts.append(f"Радиус: {self.current_radius} м")
-
-            address_text = " | ".join(address_parts) if address_parts else "Адрес не указан"
-            ws['A1'] = f"Адрес: {address_text}"
-            ws['A1'].font = openpyxl.styles.Font(bold=True, size=12)
-
-            # Расчет площади перечета
-            current_radius = float(self.current_radius) if self.current_radius else 5.64
-            plot_area_m2 = 3.14159 * (current_radius ** 2)
-            plot_area_ha = plot_area_m2 / 10000
-            plot_count = len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)])
-            total_plot_area_ha = plot_count * plot_area_ha
-
-            ws['A2'] = f"Площадь перечета: {total_plot_area_ha:.4f} га ({total_plot_area_ha*10000:.0f} м²) - {plot_count} площадок по {plot_area_ha:.4f} га каждая"
-            ws['A2'].font = openpyxl.styles.Font(bold=True, size=10)
-
-            ws.append([])
-
-            headers = [
-                '№ППР', 'GPS точка', 'Предмет ухода', 'Порода', 'Густота', 'До 0.5м', '0.5-1.5м', '>1.5м', 'Высота', 'Возраст', 'Примечания', 'Тип Леса'
-            ]
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=3, column=col_num, value=header)
-                cell.font = openpyxl.styles.Font(bold=True)
-                cell.fill = openpyxl.styles.PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-
-            all_data = []
-            for page in sorted(self.page_data.keys()):
-                all_data.extend(self.page_data[page])
-
-            current_row = 4
-            for row in all_data:
-                if any(cell for cell in row[:3] if cell):  # Проверяем, что основные столбцы не пустые
-                    try:
-                        breeds_data = json.loads(row[3]) if row[3] else []
-                    except (json.JSONDecodeError, TypeError):
-                        breeds_data = []
-
-                    if isinstance(breeds_data, list) and breeds_data:
-                        for breed_info in breeds_data:
-                            if isinstance(breed_info, dict):
-                                breed_name = breed_info.get('name', 'Неизвестная')
-                                density = breed_info.get('density', '')
-                                height = breed_info.get('height', '')
-                                age = breed_info.get('age', '')
-
-                                # Инициализируем градации
-                                do_05 = ''
-                                _05_15 = ''
-                                bolee_15 = ''
-
-                                if breed_info.get('type') == 'coniferous':
-                                    # Для хвойных заполняем градации
-                                    do_05 = str(breed_info.get('do_05', ''))
-                                    _05_15 = str(breed_info.get('05_15', ''))
-                                    bolee_15 = str(breed_info.get('bolee_15', ''))
-                                    # Густота оставляем пустой для хвойных
-                                    density = ''
-                                else:
-                                    # Для лиственных оставляем густоту, градации пустые
-                                    pass
-
-                                processed_row = [
-                                    row[0],  # №ППР
-                                    row[1],  # GPS точка
-                                    row[2],  # Предмет ухода
-                                    breed_name,  # Порода
-                                    str(density) if density else '',  # Густота
-                                    do_05,  # До 0.5м
-                                    _05_15,  # 0.5-1.5м
-                                    bolee_15,  # >1.5м
-                                    str(height) if height else '',  # Высота
-                                    str(age) if age else '',  # Возраст
-                                    row[4],  # Примечания
-                                    row[5],  # Тип Леса
-                                ]
-                                ws.append(processed_row)
-                                current_row += 1
-                    else:
-                        # Если нет пород, добавить строку без данных
-                        processed_row = [row[0], row[1], row[2], '', '', '', '', '', '', '', row[4], row[5]]
-                        ws.append(processed_row)
-                        current_row += 1
-
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(full_path)
-            return f"Excel: {filename}", None
-        except Exception as e:
-            return None, f"Ошибка сохранения Excel: {str(e)}"
-
-    def save_to_word_without_dialog(self):
-        """Сохранение в Word без диалога"""
-        try:
-            from docx import Document
-
-            timestamp = datetime.datetime.now().strftime('%M%S')  # Только минуты и секунды
-            document_name = self.project_data.get('document_name', 'Проект')
-            # Очень короткое имя файла на основе названия проекта (макс 10 символов)
-            short_name = document_name.replace(' ', '').replace('/', '_').replace('.', '')[:10]
-            filename = f"{short_name}_{self.current_section}_{timestamp}.docx"
-            full_path = os.path.join(self.reports_dir, filename)
-
-            doc = Document()
-            doc.add_heading(f'Расширенный отчет по молоднякам - Участок {self.current_section}', 0)
-
-            # Расчет площади перечета
-            current_radius = float(self.current_radius) if self.current_radius else 5.64
-            plot_area_m2 = 3.14159 * (current_radius ** 2)
-            plot_area_ha = plot_area_m2 / 10000
-            plot_count = len([row for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell)])
-            total_plot_area_ha = plot_count * plot_area_ha
-
-            # Добавляем информацию о площади перечета
-            doc.add_paragraph(f"Площадь перечета: {total_plot_area_ha:.4f} га ({total_plot_area_ha*10000:.0f} м²) - {plot_count} площадок по {plot_area_ha:.4f} га каждая")
-
-            all_data = []
-            for page in sorted(self.page_data.keys()):
-                all_data.extend(self.page_data[page])
-
-            table = doc.add_table(rows=1, cols=12)
-            table.style = 'Table Grid'
-
-            headers = [
-                '№ППР', 'GPS точка', 'Предмет ухода', 'Порода', 'Густота', 'До 0.5м', '0.5-1.5м', '>1.5м', 'Высота', 'Возраст', 'Примечания', 'Тип Леса'
-            ]
-            hdr_cells = table.rows[0].cells
-            for i, header in enumerate(headers):
-                hdr_cells[i].text = header
-
-            for row in all_data:
-                if any(cell for cell in row[:3] if cell):  # Проверяем, что основные столбцы не пустые
-                    try:
-                        breeds_data = json.loads(row[3]) if row[3] else []
-                    except (json.JSONDecodeError, TypeError):
-                        breeds_data = []
-
-                    if isinstance(breeds_data, list) and breeds_data:
-                        for breed_info in breeds_data:
-                            if isinstance(breed_info, dict):
-                                breed_name = breed_info.get('name', 'Неизвестная')
-                                density = breed_info.get('density', '')
-                                height = breed_info.get('height', '')
-                                age = breed_info.get('age', '')
-
-                                # Инициализируем градации
-                                do_05 = ''
-                                _05_15 = ''
-                                bolee_15 = ''
-
-                                if breed_info.get('type') == 'coniferous':
-                                    # Для хвойных заполняем градации
-                                    do_05 = str(breed_info.get('do_05', ''))
-                                    _05_15 = str(breed_info.get('05_15', ''))
-                                    bolee_15 = str(breed_info.get('bolee_15', ''))
-                                    # Густота оставляем пустой для хвойных
-                                    density = ''
-                                else:
-                                    # Для лиственных оставляем густоту, градации пустые
-                                    pass
-
-                                row_cells = table.add_row().cells
-                                row_cells[0].text = str(row[0]) if row[0] else ""  # №ППР
-                                row_cells[1].text = str(row[1]) if row[1] else ""  # GPS точка
-                                row_cells[2].text = str(row[2]) if row[2] else ""  # Предмет ухода
-                                row_cells[3].text = breed_name  # Порода
-                                row_cells[4].text = str(density) if density else ""  # Густота
-                                row_cells[5].text = do_05  # До 0.5м
-                                row_cells[6].text = _05_15  # 0.5-1.5м
-                                row_cells[7].text = bolee_15  # >1.5м
-                                row_cells[8].text = str(height) if height else ""  # Высота
-                                row_cells[9].text = str(age) if age else ""  # Возраст
-                                row_cells[10].text = str(row[4]) if row[4] else ""  # Примечания
-                                row_cells[11].text = str(row[5]) if row[5] else ""  # Тип Леса
-                    else:
-                        # Если нет пород, добавить строку без данных
-                        row_cells = table.add_row().cells
-                        row_cells[0].text = str(row[0]) if row[0] else ""
-                        row_cells[1].text = str(row[1]) if row[1] else ""
-                        row_cells[2].text = str(row[2]) if row[2] else ""
-                        row_cells[3].text = ""
-                        row_cells[4].text = ""
-                        row_cells[5].text = ""
-                        row_cells[6].text = ""
-                        row_cells[7].text = ""
-                        row_cells[8].text = ""
-                        row_cells[9].text = ""
-                        row_cells[10].text = str(row[4]) if row[4] else ""
-                        row_cells[11].text = str(row[5]) if row[5] else ""
-
-            doc.save(full_path)
-            return f"Word: {filename}", None
-        except ImportError:
-            return None, "Для сохранения в Word установите библиотеку python-docx: pip install python-docx"
-        except Exception as e:
-            return None, f"Ошибка сохранения Word: {str(e)}"
-
-    def save_all_formats(self, instance=None):
-        """Сохранить данные во всех форматах сразу"""
-        success_messages = []
-        error_messages = []
-
-        # Проверка наличия данных
-        if not self.page_data:
-            error_messages.append("Нет данных для сохранения!")
-            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
-            return
-
-        # Проверка наличия участка
-        if not self.current_section:
-            error_messages.append("Не указан номер участка!")
-            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
-            return
-
-        # Валидация радиуса
+        # Валидация радиуса
         try:
             radius = float(self.current_radius) if self.current_radius else 5.64
             if radius <= 0:
@@ -5684,36 +4654,54 @@ class ExtendedMolodnikiTableScreen(Screen):
                 self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
                 return
 
-        try:
-            # Сохранение в JSON
-            result, error = self.save_to_json()
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(error)
-
-            # Сохранение в Excel
-            result, error = self.save_to_excel_without_dialog()
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(error)
+        # Итоги считаются в UI-потоке: они читают общий plot_store
+        total_data = self.get_total_data_from_db()
+        jobs = [
+            ('JSON', lambda: self.save_to_json(total_data=total_data)),
+            ('Excel', self.save_to_excel_without_dialog),
+            ('Word', self.save_to_word_without_dialog),
+        ]
+        progress_label = MDLabel(text=f"Сохранение: 0 из {len(jobs)}", theme_text_color='Custom',
+                                 text_color=Colors.TEXT_ON_DARK, halign='center', adaptive_height=True)
+        content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
+                              md_bg_color=Colors.DARK_SURFACE, adaptive_height=True)
+        content.add_widget(progress_label)
+        cancel_btn = MDButton(style='filled', size_hint=(1, None), height=dp(48))
+        cancel_btn.add_widget(MDButtonText(text='Отмена', theme_text_color='Custom', text_color=[1,0.3,0.3,1]))
+        content.add_widget(cancel_btn)
+        progress_popup = Popup(
+            title="",
+            content=content,
+            size_hint=(0.7, None),
+            height=dp(160),
+            separator_height=0,
+            auto_dismiss=False,
+            background_color=[0,0,0,0.3],
+            overlay_color=[0,0,0,0.3]
+        )
 
-            # Сохранение в Word
-            result, error = self.save_to_word_without_dialog()
-            if result:
-                success_messages.append(result)
-            else:
-                error_messages.append(error)
+        def on_progress(name, result, error, batch):
+            progress_label.text = f"Сохранение: {batch.done} из {batch.total} ({name})"
 
-        except Exception as e:
-            import traceback
-            error_messages.append(f"Общая ошибка: {str(e)}\n{traceback.format_exc()}")
+        def on_done(batch):
+            progress_popup.dismiss()
+            if batch.is_cancelled():
+                self.show_error("Сохранение отменено")
+                return
+            for name in batch.names:
+                result, error = batch.results[name]
+                if result:
+                    success_messages.append(result)
+                else:
+                    error_messages.append(error)
+            if success_messages:
+                self.show_success("Файлы сохранены:\n" + "\n".join(success_messages))
+            if error_messages:
+                self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
 
-        if success_messages:
-            self.show_success("Файлы сохранены:\n" + "\n".join(success_messages))
-        if error_messages:
-            self.show_error("Ошибки сохранения:\n" + "\n".join(error_messages))
+        batch = get_runner().submit(jobs, on_progress=on_progress, on_done=on_done)
+        cancel_btn.bind(on_release=lambda x: batch.cancel())
+        progress_popup.open()
 
     def show_edit_breed_popup(self, instance, breed_index, breed_info):
         """Показать popup для редактирования породы"""
@@ -6071,77 +5059,12 @@ class ExtendedMolodnikiTableScreen(Screen):
                 f"Назначение лесов: {forest_purpose_val}"
             )
 
-    def load_existing_data(self):
-        """Загружаем существующие данные из базы данных"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        try:
-            # Загружаем настройки участка
-            cursor.execute('''
-                SELECT radius, plot_area FROM molodniki_settings
-                WHERE section_name = ?
-            ''', (self.current_section,))
-
-            settings_row = cursor.fetchone()
-            if settings_row:
-                self.current_radius = str(settings_row[0]) if settings_row[0] else "5.64"
-                self.plot_area_input = str(settings_row[1]) if settings_row[1] else ""
-
-            cursor.execute('''
-                SELECT DISTINCT page_number FROM molodniki_data
-                WHERE section_name = ?
-                ORDER BY page_number
-            ''', (self.current_section,))
-
-            page_numbers = [row[0] for row in cursor.fetchall()]
-
-            if page_numbers:
-                for page_num in page_numbers:
-                    cursor.execute('''
-                        SELECT row_index, nn, gps_point, predmet_uhoda, poroda, primechanie, radius
-                        FROM molodniki_data
-                        WHERE page_number = ? AND section_name = ?
-                        ORDER BY row_index
-                    ''', (page_num, self.current_section))
-
-                    page_data = []
-                    rows_data = cursor.fetchall()
-                    max_row = max((r[0] for r in rows_data), default=-1)
-
-                    for row_idx in range(max_row + 1):
-                        row_data = ['', '', '', '', '', '']
-                        page_data.append(row_data)
-
-                    for row_data in rows_data:
-                        row_idx, nn, gps_point, predmet_uhoda, poroda, primechanie, radius = row_data
-                        if row_idx < len(page_data):
-                            page_data[row_idx] = [
-                                str(nn) if nn is not None else '',
-                                str(gps_point) if gps_point is not None else '',
-                                str(predmet_uhoda) if predmet_uhoda is not None else '',
-                                str(poroda) if poroda is not None else '',
-                                str(primechanie) if primechanie is not None else '',
-                                str(radius) if radius is not None else '',
-                            ]
-
-                    self.page_data[page_num] = page_data
-
-                self.current_page = min(page_numbers)
-                self.load_page_data()
-
-        except Exception as e:
-            print(f"Error loading existing data: {e}")
-            self.show_error(f"Ошибка загрузки данных из базы: {str(e)}")
-        finally:
-            conn.close()
-
     def load_page_data(self):
         # Данные загружаются напрямую из page_data, таблица не используется
         pass
 
     def clear_table_data(self, instance=None):
-        self.page_data.clear()
+        self.replace_page_data({})
         self.show_success("Данные очищены!")
 
     def open_excel_file(self, instance):
@@ -6454,193 +5377,7 @@ class ExtendedMolodnikiTableScreen(Screen):
 
         popup.open()
 
-    def calculate_section_totals(self):
-        """Расчет итогов по всему разделу (все страницы)"""
-        breed_composition = {}
-        total_stats = {'density': [], 'height': [], 'age': []}
-        coniferous_stats = {'do_05': [], '05_15': [], 'bolee_15': [], 'height': [], 'age': []}
-
-        for page_num, page_data in self.page_data.items():
-            for row_data in page_data:
-                # row_data имеет 6 элементов: nn, gps_point, predmet_uhoda, poroda, primechanie, tip_lesa
-                if row_data[2]:  # predmet_uhoda
-                    composition = self.parse_composition(row_data[2])
-                    for breed, count in composition.items():
-                        if breed not in breed_composition:
-                            breed_composition[breed] = []
-                        breed_composition[breed].append(count)
-
-                breeds_text = row_data[3]  # poroda
-                if breeds_text:
-                    breeds_data = self.parse_breeds_data(breeds_text)
-                    for breed_info in breeds_data:
-                        if breed_info.get('type') == 'coniferous':
-                            # Густота хвойных = сумма градаций
-                            coniferous_density = (breed_info.get('do_05', 0) +
-                                                breed_info.get('05_15', 0) +
-                                                breed_info.get('bolee_15', 0))
-                            if coniferous_density > 0:
-                                total_stats['density'].append(coniferous_density)
-                            else:
-                                if 'density' in breed_info and breed_info['density']:
-                                    total_stats['density'].append(breed_info['density'])
-
-                        elif 'density' in breed_info and breed_info['density']:
-                            total_stats['density'].append(breed_info['density'])
-
-                        if 'height' in breed_info and breed_info['height']:
-                            total_stats['height'].append(breed_info['height'])
-                        if 'age' in breed_info and breed_info['age']:
-                            total_stats['age'].append(breed_info['age'])
-
-        # Рассчитываем остальные итоги
-
-        current_radius = float(self.current_radius) if self.current_radius else 5.64
-        plot_area_m2 = 3.14159 * (current_radius ** 2)  # Площадь пробной площади в м²
-
-        # Расчет средних по градациям для хвойных по формулам лесного хозяйства на гектар
-        coniferous_stats_ha = []
-        for row_data in [row for page in self.page_data.values() for row in page]:
-            breeds_text = row_data[3]
-            if breeds_text:
-                breeds_data = self.parse_breeds_data(breeds_text)
-                if breeds_data and any(b.get('type') == 'coniferous' for b in breeds_data):
-                    coniferous_density_ha = 0
-                    height_sum = 0
-                    age_sum = 0
-                    count = 0
-                    for breed_info in breeds_data:
-                        if breed_info.get('type') == 'coniferous':
-                            do_05 = breed_info.get('do_05', 0)
-                            _05_15 = breed_info.get('05_15', 0)
-                            bolee_15 = breed_info.get('bolee_15', 0)
-                            coniferous_density_ha += (do_05 * 10000 / plot_area_m2) + (_05_15 * 10000 / plot_area_m2) + (bolee_15 * 10000 / plot_area_m2)
-                            if breed_info.get('height'):
-                                height_sum += breed_info['height']
-                                count += 1
-                            if breed_info.get('age'):
-                                age_sum += breed_info['age']
-
-                    coniferous_stats_ha.append({
-                        'density_ha': coniferous_density_ha if coniferous_density_ha > 0 else 0,
-                        'height': height_sum / count if count > 0 else 0,
-                        'age': age_sum / count if count > 0 else 0
-                    })
-
-        # Итоги по лиственным
-        deciduous_stats = []
-        for row_data in [row for page in self.page_data.values() for row in page]:
-            breeds_text = row_data[3]
-            if breeds_text:
-                breeds_data = self.parse_breeds_data(breeds_text)
-                if breeds_data:
-                    deciduous_density_total = 0
-                    deciduous_height = []
-                    deciduous_age = []
-                    for breed_info in breeds_data:
-                        if breed_info.get('type') == 'deciduous':
-                            deciduous_density_total += breed_info.get('density', 0)
-                            if breed_info.get('height', 0) > 0:
-                                deciduous_height.append(breed_info['height'])
-                            if breed_info.get('age', 0) > 0:
-                                deciduous_age.append(breed_info['age'])
-                    if deciduous_height or deciduous_age:
-                        deciduous_density_ha = deciduous_density_total
-                        avg_height = sum(deciduous_height) / len(deciduous_height) if deciduous_height else 0
-                        avg_age = sum(deciduous_age) / len(deciduous_age) if deciduous_age else 0
-                        deciduous_stats.append({'density': deciduous_density_ha, 'height': avg_height, 'age': avg_age})
-
-        # Сводные итоги
-        avg_composition = {}
-        for breed, counts in breed_composition.items():
-            if counts:
-                avg_composition[breed] = sum(counts) / len(counts)
-
-        composition_text = ""
-        for breed in sorted(avg_composition.keys()):
-            count = avg_composition[breed]
-            if count > 0:
-                composition_text += f"{int(count)}{breed}"
-
-        # Обновляем итоговую строку или возвращаем данные
-        # В зависимости от логики приложения
-        return {
-            'composition_text': composition_text,
-            'forestry_formulas_text': forestry_formulas_text if 'forestry_formulas_text' in locals() else "",
-            'total_plots': total_plots if 'total_plots' in locals() else 0
-        }
-
-        forestry_formulas_text = ""
-
-        # Расчет градаций для хвойных пород
-        coniferous_gradiations_stats = {'do_05_ha': [], '05_15_ha': [], 'bolee_15_ha': [], 'height': [], 'age': []}
-
-        current_radius = float(self.current_radius) if self.current_radius else 5.64
-        plot_area_m2 = 3.14159 * (current_radius ** 2)
-
-        for row_data in [row for page in self.page_data.values() for row in page]:
-            breeds_text = row_data[3]
-            if breeds_text:
-                breeds_data = self.parse_breeds_data(breeds_text)
-                for breed_info in breeds_data:
-                    if breed_info.get('type') == 'coniferous':
-                        do_05_ha = breed_info.get('do_05', 0) * 10000 / plot_area_m2 if plot_area_m2 > 0 else 0
-                        _05_15_ha = breed_info.get('05_15', 0) * 10000 / plot_area_m2 if plot_area_m2 > 0 else 0
-                        bolee_15_ha = breed_info.get('bolee_15', 0) * 10000 / plot_area_m2 if plot_area_m2 > 0 else 0
-                        height = breed_info.get('height', 0)
-                        age = breed_info.get('age', 0)
-
-                        coniferous_gradiations_stats['do_05_ha'].append(do_05_ha)
-                        coniferous_gradiations_stats['05_15_ha'].append(_05_15_ha)
-                        coniferous_gradiations_stats['bolee_15_ha'].append(bolee_15_ha)
-                        if height > 0:
-                            coniferous_gradiations_stats['height'].append(height)
-                        if age > 0:
-                            coniferous_gradiations_stats['age'].append(age)
-
-        if coniferous_gradiations_stats['do_05_ha'] or coniferous_gradiations_stats['05_15_ha'] or coniferous_gradiations_stats['bolee_15_ha']:
-            forestry_formulas_text += "Хвойные: "
-            gradiations = []
-            avg_do_05 = sum(coniferous_gradiations_stats['do_05_ha']) / len(coniferous_gradiations_stats['do_05_ha']) if coniferous_gradiations_stats['do_05_ha'] else 0
-            gradiations.append(f"до 0.5м: {avg_do_05:.1f} шт/га")
-
-            avg_05_15 = sum(coniferous_gradiations_stats['05_15_ha']) / len(coniferous_gradiations_stats['05_15_ha']) if coniferous_gradiations_stats['05_15_ha'] else 0
-            gradiations.append(f"0.5-1.5м: {avg_05_15:.1f} шт/га")
-
-            avg_bolee_15 = sum(coniferous_gradiations_stats['bolee_15_ha']) / len(coniferous_gradiations_stats['bolee_15_ha']) if coniferous_gradiations_stats['bolee_15_ha'] else 0
-            gradiations.append(f">1.5м: {avg_bolee_15:.1f} шт/га")
-
-            forestry_formulas_text += ", ".join(gradiations)
-
-            if coniferous_gradiations_stats['height']:
-                avg_height = sum(coniferous_gradiations_stats['height']) / len(coniferous_gradiations_stats['height'])
-                forestry_formulas_text += f", высота: {avg_height:.1f}м"
-            if coniferous_gradiations_stats['age']:
-                avg_age = sum(coniferous_gradiations_stats['age']) / len(coniferous_gradiations_stats['age'])
-                forestry_formulas_text += f", возраст: {avg_age:.1f} лет"
-
-        # Лиственные итоги
-        if deciduous_stats:
-            if forestry_formulas_text:
-                forestry_formulas_text += "; "
-            forestry_formulas_text += "Лиственные: "
-            avg_deciduous_density = sum(d['density'] for d in deciduous_stats) / len(deciduous_stats) if deciduous_stats else 0
-            avg_deciduous_height = sum(d['height'] for d in deciduous_stats) / len(deciduous_stats) if deciduous_stats else 0
-            avg_deciduous_age = sum(d['age'] for d in deciduous_stats) / len(deciduous_stats) if deciduous_stats else 0
-
-            if avg_deciduous_density > 0:
-                forestry_formulas_text += f"густота: {avg_deciduous_density:.1f} шт/га "
-            if avg_deciduous_height > 0:
-                forestry_formulas_text += f"высота: {avg_deciduous_height:.1f}м "
-            if avg_deciduous_age > 0:
-                forestry_formulas_text += f"возраст: {avg_deciduous_age:.1f} лет"
-
-        return {
-            'composition_text': composition_text,
-            'forestry_formulas_text': forestry_formulas_text,
-            'total_plots': sum(1 for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell))
-        }
-
+    @timed('popup.total_summary')
     def show_total_summary_popup(self, *args, **kwargs):
         """Показать popup со сводными итогами и таксационными расчетами - 10 отдельных цветных боксов"""
         try:
@@ -6653,103 +5390,77 @@ class ExtendedMolodnikiTableScreen(Screen):
             breeds_data = {}
             forest_types_set = set()
             
+            plots = list(self.plot_store.iter_plots(self.page_data))
+
             # Подсчитываем общее количество площадок
-            total_plots_count = sum(1 for page in self.page_data.values() for row in page if any(cell for cell in row[:3] if cell))
+            total_plots_count = sum(1 for plot in plots if plot.is_filled)
 
             # Обрабатываем все страницы для сбора данных
-            for page_num, page_rows in self.page_data.items():
-                for row in page_rows:
-                    if len(row) < 4:
-                        continue
-
-                    plot_radius = default_radius
-                    plot_area_m2 = 3.14159 * (plot_radius ** 2)
-                    plot_area_ha = plot_area_m2 / 10000
-
-                    # Собираем тип леса из row[5] (индекс 5 в расширенной таблице)
-                    if len(row) > 5 and row[5]:
-                        forest_types_set.add(str(row[5]).strip())
-
-                    breeds_text = row[3]
-                    if not breeds_text:
-                        continue
-
-                    try:
-                        breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                    except json.JSONDecodeError:
+            for plot in plots:
+                plot_radius = default_radius
+                plot_area_m2 = 3.14159 * (plot_radius ** 2)
+                plot_area_ha = plot_area_m2 / 10000
+
+                # Собираем тип леса из row[5] (индекс 5 в расширенной таблице)
+                if plot.radius:
+                    forest_types_set.add(str(plot.radius).strip())
+
+                for breed_info in plot.breeds:
+                    breed_name = breed_info.name
+                    if not breed_name:
                         continue
 
-                    for breed_info in breeds_list:
-                        if not isinstance(breed_info, dict):
-                            continue
-
-                        breed_name = breed_info.get('name', '').strip()
-                        if not breed_name:
-                            continue
-
-                        breed_type = breed_info.get('type', 'deciduous')
-                        density = 0
-                        height = None
-                        age = None
-
-                        if breed_type == 'coniferous':
-                            do_05 = breed_info.get('do_05', 0)
-                            _05_15 = breed_info.get('05_15', 0)
-                            bolee_15 = breed_info.get('bolee_15', 0)
-                            density = (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
-
-                            if any([do_05, _05_15, bolee_15]):
-                                if bolee_15 > 0:
-                                    height = 2.0
-                                elif _05_15 > 0:
-                                    height = 1.0
-                                elif do_05 > 0:
-                                    height = 0.3
-                                else:
-                                    height = 0.0
-                            else:
-                                height = breed_info.get('height', 0) or 0
-                        else:
-                            density_value = breed_info.get('density', 0)
-                            density = density_value / plot_area_ha if plot_area_ha > 0 else 0
-                            height = breed_info.get('height', 0) or 0
-
-                        age = breed_info.get('age', 0) or 0
-                        diameter = breed_info.get('diameter', 0) or 0
-
-                        if breed_name not in breeds_data:
-                            breeds_data[breed_name] = {
-                                'type': breed_type,
-                                'plots': [],
-                                'coniferous_zones': {'do_05': 0, '05_15': 0, 'bolee_15': 0} if breed_type == 'coniferous' else None,
-                                'diameters': []
-                            }
-
-                        plot_data = {
-                            'density': density,  # в шт/га
-                            'density_raw': breed_info.get('density', 0) if breed_type == 'deciduous' else (do_05 + _05_15 + bolee_15),  # исходное кол-во деревьев
-                            'height': height,
-                            'age': age,
-                            'diameter': diameter  # ✅ ДОБАВЛЕНО: диаметр
+                    breed_type = breed_info.type
+                    density = 0
+                    height = None
+                    age = None
+
+                    if breed_type == 'coniferous':
+                        do_05 = breed_info.do_05
+                        _05_15 = breed_info._05_15
+                        bolee_15 = breed_info.bolee_15
+                        density = (do_05 + _05_15 + bolee_15) / plot_area_ha if plot_area_ha > 0 else 0
+                        height = breed_info.zone_height
+                    else:
+                        density = breed_info.density / plot_area_ha if plot_area_ha > 0 else 0
+                        height = breed_info.height or 0
+
+                    age = breed_info.age or 0
+                    diameter = breed_info.diameter or 0
+
+                    if breed_name not in breeds_data:
+                        breeds_data[breed_name] = {
+                            'type': breed_type,
+                            'plots': [],
+                            'coniferous_zones': {'do_05': 0, '05_15': 0, 'bolee_15': 0} if breed_type == 'coniferous' else None,
+                            'diameters': []
                         }
 
-                        if breed_type == 'coniferous':
-                            plot_data.update({
-                                'do_05_density': do_05 / plot_area_ha if plot_area_ha > 0 else 0,
-                                '05_15_density': _05_15 / plot_area_ha if plot_area_ha > 0 else 0,
-                                'bolee_15_density': bolee_15 / plot_area_ha if plot_area_ha > 0 else 0,
-                                'do_05': do_05,  # исходное кол-во
-                                '05_15': _05_15,  # исходное кол-во
-                                'bolee_15': bolee_15  # исходное кол-во
-                            })
+                    plot_data = {
+                        'density': density,  # в шт/га
+                        'density_raw': breed_info.density if breed_type == 'deciduous' else (do_05 + _05_15 + bolee_15),  # исходное кол-во деревьев
+                        'height': height,
+                        'age': age,
+                        'diameter': diameter  # ✅ ДОБАВЛЕНО: диаметр
+                    }
+
+                    if breed_type == 'coniferous':
+                        plot_data.update({
+                            'do_05_density': do_05 / plot_area_ha if plot_area_ha > 0 else 0,
+                            '05_15_density': _05_15 / plot_area_ha if plot_area_ha > 0 else 0,
+                            'bolee_15_density': bolee_15 / plot_area_ha if plot_area_ha > 0 else 0,
+                            'do_05': do_05,  # исходное кол-во
+                            '05_15': _05_15,  # исходное кол-во
+                            'bolee_15': bolee_15  # исходное кол-во
+                        })
 
-                        breeds_data[breed_name]['plots'].append(plot_data)
-                        breeds_data[breed_name]['diameters'].append(diameter)
+                    breeds_data[breed_name]['plots'].append(plot_data)
+                    breeds_data[breed_name]['diameters'].append(diameter)
 
-                        if breed_type == 'coniferous':
-                            breeds_data[breed_name]['coniferous_zones']['do_05'] += plot_data['do_05_density']
-                            breeds_data[breed_name]['coniferous_zones']['05_15'] += plot_data['05_15_density']
-                            breeds_data[breed_name]['coniferous_zones']['bolee_15'] += plot_data['bolee_15_density']
+                    if breed_type == 'coniferous':
+                        breeds_data[breed_name]['coniferous_zones']['do_05'] += plot_data['do_05_density']
+                        breeds_data[breed_name]['coniferous_zones']['05_15'] += plot_data['05_15_density']
+                        breeds_data[breed_name]['coniferous_zones']['bolee_15'] += plot_data['bolee_15_density']
 
             # Создаем popup с результатами
             content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
@@ -7093,62 +5804,29 @@ class ExtendedMolodnikiTableScreen(Screen):
             total_remaining_density = 0
             plot_count_with_care = 0
 
-            for page_num, page_rows in self.page_data.items():
-                for row in page_rows:
-                    if len(row) >= 4 and row[3]:
-                        plot_density = 0
-                        breeds_text = row[3]
-                        if breeds_text:
-                            try:
-                                breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                                for breed_info in breeds_list:
-                                    if isinstance(breed_info, dict):
-                                        if breed_info.get('type') == 'coniferous':
-                                            do_05 = breed_info.get('do_05', 0)
-                                            _05_15 = breed_info.get('05_15', 0)
-                                            bolee_15 = breed_info.get('bolee_15', 0)
-                                            plot_density += (do_05 + _05_15 + bolee_15) / plot_area_ha_default if plot_area_ha_default > 0 else 0
-                                        else:
-                                            density = breed_info.get('density', 0)
-                                            plot_density += density / plot_area_ha_default if plot_area_ha_default > 0 else 0
-                            except (json.JSONDecodeError, TypeError):
-                                pass
+            for plot in plots:
+                # Густота площадки (шт/га) по всем породам
+                plot_density = 0
+                for breed_info in plot.breeds:
+                    plot_density += breed_info.trees_count / plot_area_ha_default if plot_area_ha_default > 0 else 0
+
+                if plot_density > 0:
+                    total_density_all += plot_density
+                    plot_count_all += 1
 
+                if plot.predmet_uhoda:
+                    care_text = plot.predmet_uhoda.strip()
+                    if care_text:
                         if plot_density > 0:
-                            total_density_all += plot_density
-                            plot_count_all += 1
-
-                    if len(row) >= 4 and row[2]:
-                        care_text = row[2].strip()
-                        if care_text:
-                            plot_density = 0
-                            breeds_text = row[3]
-                            if breeds_text:
-                                try:
-                                    breeds_list = json.loads(breeds_text) if isinstance(breeds_text, str) else []
-                                    for breed_info in breeds_list:
-                                        if isinstance(breed_info, dict):
-                                            if breed_info.get('type') == 'coniferous':
-                                                do_05 = breed_info.get('do_05', 0)
-                                                _05_15 = breed_info.get('05_15', 0)
-                                                bolee_15 = breed_info.get('bolee_15', 0)
-                                                plot_density += (do_05 + _05_15 + bolee_15) / plot_area_ha_default if plot_area_ha_default > 0 else 0
-                                            else:
-                                                density = breed_info.get('density', 0)
-                                                plot_density += density / plot_area_ha_default if plot_area_ha_default > 0 else 0
-                                except (json.JSONDecodeError, TypeError):
-                                    pass
-
-                            if plot_density > 0:
-                                remaining_density = self.parse_care_subject_density(care_text)
-                                if remaining_density > 0:
-                                    care_data.append({
-                                        'care_text': care_text,
-                                        'plot_density': plot_density,
-                                        'remaining_density': remaining_density
-                                    })
-                                    total_remaining_density += remaining_density
-                                    plot_count_with_care += 1
+                            remaining_density = self.parse_care_subject_density(care_text)
+                            if remaining_density > 0:
+                                care_data.append({
+                                    'care_text': care_text,
+                                    'plot_density': plot_density,
+                                    'remaining_density': remaining_density
+                                })
+                                total_remaining_density += remaining_density
+                                plot_count_with_care += 1
 
             if care_data:
                 care_breed_totals = {}
@@ -7342,48 +6020,41 @@ class ExtendedMolodnikiTableScreen(Screen):
             total_stats = {'density': [], 'height': [], 'age': []}
             coniferous_stats = {'do_05': [], '05_15': [], 'bolee_15': [], 'height': [], 'age': []}
 
-            for row in self.inputs:
-                predmet_text = row[2].text
-                if predmet_text:
-                    composition = self.parse_composition(predmet_text)
-                    for breed, count in composition.items():
-                        if breed not in breed_composition:
-                            breed_composition[breed] = []
-                        breed_composition[breed].append(count)
-
-                breeds_text = row[3].text
-                if breeds_text:
-                    breeds_data = self.parse_breeds_data(breeds_text)
-                    for breed_info in breeds_data:
-                        if breed_info.get('type') == 'coniferous':
-                            # Густота хвойных = сумма градаций
-                            coniferous_density = (breed_info.get('do_05', 0) +
-                                                breed_info.get('05_15', 0) +
-                                                breed_info.get('bolee_15', 0))
-                            if coniferous_density > 0:
-                                total_stats['density'].append(coniferous_density)
-                            else:
-                                if 'density' in breed_info and breed_info['density']:
-                                    total_stats['density'].append(breed_info['density'])
-
-                            # Сбор данных по градациям для хвойных
-                            if breed_info.get('do_05', 0) > 0:
-                                coniferous_stats['do_05'].append(breed_info['do_05'])
-                            if breed_info.get('05_15', 0) > 0:
-                                coniferous_stats['05_15'].append(breed_info['05_15'])
-                            if breed_info.get('bolee_15', 0) > 0:
-                                coniferous_stats['bolee_15'].append(breed_info['bolee_15'])
-                            if breed_info.get('height', 0) > 0:
-                                coniferous_stats['height'].append(breed_info['height'])
-                            if breed_info.get('age', 0) > 0:
-                                coniferous_stats['age'].append(breed_info['age'])
-                        elif 'density' in breed_info and breed_info['density']:
-                            total_stats['density'].append(breed_info['density'])
-
-                        if 'height' in breed_info and breed_info['height']:
-                            total_stats['height'].append(breed_info['height'])
-                        if 'age' in breed_info and breed_info['age']:
-                            total_stats['age'].append(breed_info['age'])
+            page_plots = list(self.plot_store.iter_page(self.page_data, self.current_page))
+
+            for plot in page_plots:
+                for breed, count in plot.composition.items():
+                    if breed not in breed_composition:
+                        breed_composition[breed] = []
+                    breed_composition[breed].append(count)
+
+                for breed_info in plot.breeds:
+                    if breed_info.is_coniferous:
+                        # Густота хвойных = сумма градаций
+                        coniferous_density = breed_info.zones_total
+                        if coniferous_density > 0:
+                            total_stats['density'].append(coniferous_density)
+                        elif breed_info.density:
+                            total_stats['density'].append(breed_info.density)
+
+                        # Сбор данных по градациям для хвойных
+                        if breed_info.do_05 > 0:
+                            coniferous_stats['do_05'].append(breed_info.do_05)
+                        if breed_info._05_15 > 0:
+                            coniferous_stats['05_15'].append(breed_info._05_15)
+                        if breed_info.bolee_15 > 0:
+                            coniferous_stats['bolee_15'].append(breed_info.bolee_15)
+                        if breed_info.height > 0:
+                            coniferous_stats['height'].append(breed_info.height)
+                        if breed_info.age > 0:
+                            coniferous_stats['age'].append(breed_info.age)
+                    elif breed_info.density:
+                        total_stats['density'].append(breed_info.density)
+
+                    if breed_info.height:
+                        total_stats['height'].append(breed_info.height)
+                    if breed_info.age:
+                        total_stats['age'].append(breed_info.age)
 
             # Рассчитываем итоги по странице
 
@@ -7392,7 +6063,7 @@ class ExtendedMolodnikiTableScreen(Screen):
 
             # Расчет средних по градациям для хвойных по формулам лесного хозяйства на гектар
             coniferous_stats_ha = []
-            for row in range(len(self.inputs)):
+            for row in range(len(page_plots)):
                 row_do_05 = coniferous_stats['do_05'][row] if row < len(coniferous_stats['do_05']) and row < len(coniferous_stats['do_05']) else 0
                 row_05_15 = coniferous_stats['05_15'][row] if row < len(coniferous_stats['05_15']) else 0
                 row_bolee_15 = coniferous_stats['bolee_15'][row] if row < len(coniferous_stats['bolee_15']) else 0
@@ -7443,18 +6114,15 @@ class ExtendedMolodnikiTableScreen(Screen):
             deciduous_height = []
             deciduous_age = []
 
-            for row in self.inputs:
-                breeds_text = row[3].text
-                if breeds_text:
-                    breeds_data = self.parse_breeds_data(breeds_text)
-                    for breed_info in breeds_data:
-                        if breed_info.get('type') == 'deciduous':
-                            if breed_info.get('density'):
-                                deciduous_density.append(breed_info['density'] * (10000 / plot_area_m2) if plot_area_m2 > 0 else breed_info['density'])
-                            if breed_info.get('height'):
-                                deciduous_height.append(breed_info['height'])
-                            if breed_info.get('age'):
-                                deciduous_age.append(breed_info['age'])
+            for plot in page_plots:
+                for breed_info in plot.breeds:
+                    if breed_info.type == 'deciduous':
+                        if breed_info.density:
+                            deciduous_density.append(breed_info.density * (10000 / plot_area_m2) if plot_area_m2 > 0 else breed_info.density)
+                        if breed_info.height:
+                            deciduous_height.append(breed_info.height)
+                        if breed_info.age:
+                            deciduous_age.append(breed_info.age)
 
             # Рассчитываем средние по лиственным на га
             if deciduous_density or deciduous_height or deciduous_age:
@@ -7526,42 +6194,28 @@ class ExtendedMolodnikiTableScreen(Screen):
         total_stats = {'density': [], 'height': [], 'age': []}
         total_area = 0.0
 
-        for row in self.inputs:
-            predmet_text = row[2].text
-            if predmet_text:
-                composition = self.parse_composition(predmet_text)
-                for breed, count in composition.items():
-                    if breed not in breed_composition:
-                        breed_composition[breed] = []
-                    breed_composition[breed].append(count)
-
-            radius = 5.64
-            try:
-                if row[5].text:
-                    radius = float(row[5].text)
-            except (ValueError, IndexError):
-                pass
+        for plot in self.plot_store.iter_page(self.page_data, self.current_page):
+            for breed, count in plot.composition.items():
+                if breed not in breed_composition:
+                    breed_composition[breed] = []
+                breed_composition[breed].append(count)
 
+            radius = plot.radius_value or 5.64
             area = 3.14159 * (radius ** 2)
             total_area += area
 
-            breeds_text = row[3].text
-            if breeds_text:
-                breeds_data = self.parse_breeds_data(breeds_text)
-                for breed_info in breeds_data:
-                    if breed_info.get('type') == 'coniferous':
-                        coniferous_density = (breed_info.get('do_05', 0) +
-                                            breed_info.get('05_15', 0) +
-                                            breed_info.get('bolee_15', 0))
-                        if coniferous_density > 0:
-                            total_stats['density'].append(coniferous_density)
-                    elif 'density' in breed_info and breed_info['density']:
-                        total_stats['density'].append(breed_info['density'])
+            for breed_info in plot.breeds:
+                if breed_info.is_coniferous:
+                    coniferous_density = breed_info.zones_total
+                    if coniferous_density > 0:
+                        total_stats['density'].append(coniferous_density)
+                elif breed_info.density:
+                    total_stats['density'].append(breed_info.density)
 
-                    if 'height' in breed_info and breed_info['height']:
-                        total_stats['height'].append(breed_info['height'])
-                    if 'age' in breed_info and breed_info['age']:
-                        total_stats['age'].append(breed_info['age'])
+                if breed_info.height:
+                    total_stats['height'].append(breed_info.height)
+                if breed_info.age:
+                    total_stats['age'].append(breed_info.age)
 
         avg_composition = {}
         for breed, counts in breed_composition.items():
@@ -7582,100 +6236,6 @@ class ExtendedMolodnikiTableScreen(Screen):
 
         return totals
 
-    def save_current_page(self, instance=None):
-        """Сохраняем текущую страницу в базу данных"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute('''
-                DELETE FROM molodniki_data
-                WHERE page_number = ? AND section_name = ?
-            ''', (self.current_page, self.current_section))
-
-            # Сохраняем данные из page_data
-            if self.current_page in self.page_data:
-                for row_idx, row_data in enumerate(self.page_data[self.current_page]):
-                    if any(row_data[:5]):
-                        radius = 5.64
-                        try:
-                            if row_data[5]:
-                                radius = float(row_data[5])
-                        except (ValueError, IndexError):
-                            pass
-
-                        cursor.execute('''
-                            INSERT INTO molodniki_data
-                            (page_number, row_index, nn, gps_point, predmet_uhoda, poroda, primechanie, radius, section_name)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            self.current_page,
-                            row_idx,
-                            row_data[0] or None,
-                            row_data[1] or None,
-                            row_data[2] or None,
-                            row_data[3] or None,
-                            row_data[4] or None,
-                            radius,
-                            self.current_section
-                        ))
-
-                        molodniki_data_id = cursor.lastrowid
-
-                        if row_data[3]:
-                            breeds_data = self.parse_breeds_data(row_data[3])
-                            for breed_info in breeds_data:
-                                try:
-                                    # Validate and convert data types
-                                    density = int(breed_info.get('density', 0) or 0)
-                                    height = float(breed_info.get('height', 0.0) or 0.0)
-                                    age = int(breed_info.get('age', 0) or 0)
-                                    do_05 = int(breed_info.get('do_05', 0) or 0)
-                                    _05_15 = int(breed_info.get('05_15', 0) or 0)
-                                    bolee_15 = int(breed_info.get('bolee_15', 0) or 0)
-
-                                    composition_coeff = 0.0
-                                    if density and radius:
-                                        area = 3.14159 * (radius ** 2)
-                                        composition_coeff = (density * area) / 10000
-
-                                    diameter = float(breed_info.get('diameter', 0.0) or 0.0)
-
-                                    cursor.execute('''
-                                        INSERT INTO molodniki_breeds
-                                        (molodniki_data_id, breed_name, breed_type, do_05, _05_15, bolee_15,
-                                         density, height, diameter, age, composition_coefficient)
-                                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                    ''', (
-                                        molodniki_data_id,
-                                        breed_info.get('name', ''),
-                                        breed_info.get('type', 'deciduous'),
-                                        do_05,
-                                        _05_15,
-                                        bolee_15,
-                                        density,
-                                        height,
-                                        diameter,
-                                        age,
-                                        composition_coeff
-                                    ))
-                                except Exception as e:
-                                    print(f"Error inserting breed: {e}, skipping this breed")
-                                    continue
-
-            conn.commit()
-            self.show_success("Страница сохранена в базу данных!")
-            success = True
-
-        except Exception as e:
-            conn.rollback()
-            self.show_error(f"Ошибка сохранения: {str(e)}")
-            success = False
-        finally:
-            conn.close()
-
-        return success
-
     def show_save_dialog(self, instance=None):
         content = MDBoxLayout(orientation='vertical', spacing=10, padding=10, md_bg_color=Colors.DARK_SURFACE)
 
@@ -7735,7 +6295,7 @@ class ExtendedMolodnikiTableScreen(Screen):
         full_path = os.path.join(self.reports_dir, filename)
 
         try:
-            wb = Workbook()
+            wb = openpyxl.Workbook()
             ws = wb.active
             ws.title = "Молодняки"
 
@@ -8249,7 +6809,6 @@ class ExtendedMolodnikiTableScreen(Screen):
                             raise UnicodeDecodeError("Не удалось определить кодировку файла")
 
             self.current_section = os.path.splitext(os.path.basename(file_path))[0].replace('.json', '').replace('_приложение', '')
-            self.page_data.clear()
 
             # Загружаем настройки адреса
             if isinstance(data, dict):
@@ -8289,16 +6848,16 @@ class ExtendedMolodnikiTableScreen(Screen):
 
             # Ожидаем, что JSON содержит page_data как словарь
             if isinstance(data, dict) and 'page_data' in data:
-                self.page_data = data['page_data']
-                print(f"DEBUG: Loaded page_data: {len(self.page_data)} pages")
+                loaded_pages = data['page_data']
+                print(f"DEBUG: Loaded page_data: {len(loaded_pages)} pages")
             else:
                 # Старый формат или простая структура
-                self.page_data = data if isinstance(data, dict) else {}
-                print(f"DEBUG: Loaded data as dict: {len(self.page_data) if isinstance(self.page_data, dict) else 'not dict'}")
+                loaded_pages = data if isinstance(data, dict) else {}
+                print(f"DEBUG: Loaded data as dict: {len(loaded_pages) if isinstance(loaded_pages, dict) else 'not dict'}")
 
             # Проверяем и исправляем формат страницы
             corrected_page_data = {}
-            for page_key, page_rows in self.page_data.items():
+            for page_key, page_rows in loaded_pages.items():
                 if isinstance(page_key, str):
                     try:
                         page_num = int(page_key)
@@ -8323,7 +6882,7 @@ class ExtendedMolodnikiTableScreen(Screen):
                 else:
                     continue
 
-            self.page_data = corrected_page_data
+            self.replace_page_data(corrected_page_data)
 
             if self.page_data:
                 self.current_page = min(self.page_data.keys())
@@ -8340,19 +6899,6 @@ class ExtendedMolodnikiTableScreen(Screen):
             error_details = traceback.format_exc()
             self.show_error(f"Ошибка загрузки JSON файла: {str(e)}\n{error_details}")
 
-    def save_settings_to_db(self):
-        """Сохранить настройки участка в базу данных"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT OR REPLACE INTO molodniki_settings (section_name, radius, plot_area, updated_at)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (self.current_section, self.current_radius, self.plot_area_input))
-
-        conn.commit()
-        conn.close()
-
     def show_radius_popup(self, instance):
         """Показать popup для установки радиуса"""
         content = MDBoxLayout(orientation='vertical', spacing=Spacing.MD, padding=Spacing.MD,
@@ -8491,41 +7037,22 @@ class ExtendedMolodnikiTableScreen(Screen):
 
     def update_plot_total(self, instance, value):
         """Обновляем итог по площадке при изменении данных"""
-        row_idx = instance.row_index
-        breeds_text = value
-        breeds_data = self.parse_breeds_data(breeds_text)
+        self.sync_plot_row(self.current_page, instance.row_index)
 
-        if not breeds_data:
+        if not value:
             return
 
-        total_density = 0
-        total_height = 0.0
-        total_age = 0
-        breed_count = 0
-        breed_names = []
-
-        for breed_info in breeds_data:
-            breed_count += 1
-            breed_name = breed_info.get('name', 'Неизвестная')
-            breed_names.append(breed_name)
-
-            if breed_info.get('type') == 'coniferous':
-                coniferous_density = (breed_info.get('do_05', 0) +
-                                    breed_info.get('05_15', 0) +
-                                    breed_info.get('bolee_15', 0))
-                if coniferous_density > 0:
-                    total_density += coniferous_density
-            elif 'density' in breed_info and breed_info['density']:
-                total_density += breed_info['density']
-
-            if 'height' in breed_info and breed_info['height']:
-                total_height += breed_info['height']
-            if 'age' in breed_info and breed_info['age']:
-                total_age += breed_info['age']
-
         # Обновляем общие итоги
         self.update_totals()
 
+    def sync_plot_row(self, page_num, row_idx):
+        """Передать изменённую строку page_data в plot_store и итоги участка"""
+        rows = self.page_data.get(page_num, [])
+        if row_idx < len(rows):
+            self.plot_store.update_row(page_num, row_idx, rows[row_idx])
+        else:
+            self.plot_store.remove_row(page_num, row_idx)
+
     def create_new_plot(self, instance=None):
         """Создать новую площадку с помощью всплывающего окна"""
         if self.current_page not in self.page_data:
@@ -8713,6 +7240,7 @@ class ExtendedMolodnikiTableScreen(Screen):
             page, row = plot_info['page'], plot_info['row']
             if page in self.page_data and row < len(self.page_data[page]):
                 self.page_data[page][row] = [''] * 6
+                self.sync_plot_row(page, row)
                 self.save_current_page()
                 self.load_page_data()
             self.show_success(f"Площадка №{plot_info['row'] + 1} удалена")
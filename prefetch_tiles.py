@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Скачивание тайлов карты для работы без сети.
+
+Тайлы, покрывающие участки лесничества (по координатам, сохранённым на
+экране карты), записываются в offline_tiles.mbtiles; экран карты берёт
+их оттуда. Повторный запуск докачивает только недостающие тайлы.
+
+Адрес тайлов (--url) обязателен: нужен сервер, условия которого
+разрешают скачивание тайлов заранее (свой сервер тайлов или платный
+поставщик с офлайн-лицензией). tile.openstreetmap.org массовую
+загрузку запрещает, и скрипт его не принимает.
+
+Примеры:
+  python prefetch_tiles.py --list                    # лесничества в базе
+  python prefetch_tiles.py Октябрьское --url https://tiles.example.org/{z}/{x}/{y}.png
+  python prefetch_tiles.py Октябрьское Лесное --url URL --zooms 12-17 --padding 1000
+  python prefetch_tiles.py --bbox 55.4,37.3,55.6,37.6 --url URL --zooms 10-15
+"""
+
+import argparse
+import sys
+import time
+
+from core.database import DB_NAME
+from core.mbtiles import OFFLINE_TILES, PADDING_M, MBTiles, forestry_bbox, list_forestries, \
+    plan_prefetch, prefetch, prefetch_allowed
+from core.migrations import migrate
+
+
+# Без --yes больше стольких тайлов не скачивается
+MAX_TILES = 20000
+
+
+def parse_zooms(text):
+    low, _, high = text.partition('-')
+    return list(range(int(low), int(high or low) + 1))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Скачивание тайлов карты для работы без сети',
+        epilog='Тайлы скачиваются только с сервера, условия которого это разрешают; '
+               'tile.openstreetmap.org массовую загрузку запрещает.')
+    parser.add_argument('forestries', nargs='*', help='лесничества, участки которых нужно покрыть')
+    parser.add_argument('--list', action='store_true', help='показать лесничества и выйти')
+    parser.add_argument('--bbox', help='юг,запад,север,восток вместо лесничеств')
+    parser.add_argument('--zooms', default='10-16', help='масштабы, например 12 или 10-16 (по умолчанию %(default)s)')
+    parser.add_argument('--padding', type=float, default=PADDING_M,
+                        help='запас вокруг участков, м (по умолчанию %(default)s)')
+    parser.add_argument('--db', default=DB_NAME, help='файл базы (по умолчанию %(default)s)')
+    parser.add_argument('--out', default=OFFLINE_TILES, help='файл MBTiles (по умолчанию %(default)s)')
+    parser.add_argument('--url', help='шаблон адреса тайлов с {z}, {x}, {y} (обязателен для загрузки); '
+                                      'сервер должен разрешать скачивание тайлов заранее')
+    parser.add_argument('--workers', type=int, default=2, help='параллельных загрузок (по умолчанию %(default)s)')
+    parser.add_argument('--yes', action='store_true', help=f'не ограничивать загрузку {MAX_TILES} тайлами')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    migrate(args.db)
+    if args.list:
+        for name in list_forestries(args.db):
+            print(name)
+        return 0
+
+    boxes = []
+    if args.bbox:
+        try:
+            south, west, north, east = (float(v) for v in args.bbox.split(','))
+        except ValueError:
+            print('--bbox: нужно четыре числа через запятую')
+            return 2
+        boxes.append(('bbox', (south, west, north, east)))
+    for forestry in args.forestries:
+        bbox = forestry_bbox(forestry, args.padding, args.db)
+        if bbox is None:
+            print(f"Нет участков с координатами: {forestry}")
+            continue
+        boxes.append((forestry, bbox))
+    if not boxes:
+        print("Укажите лесничества или --bbox (список лесничеств: --list)")
+        return 1
+    if not args.url:
+        print("Укажите --url: шаблон адреса сервера тайлов, разрешающего их скачивание заранее")
+        return 2
+    if not prefetch_allowed(args.url):
+        print("Этот сервер запрещает массовую загрузку тайлов; укажите другой --url")
+        return 2
+
+    zooms = parse_zooms(args.zooms)
+    tiles = MBTiles(args.out)
+    tiles.create()
+    planned = sum(len(plan_prefetch(tiles, bbox, zooms)) for _, bbox in boxes)
+    if planned > MAX_TILES and not args.yes:
+        print(f"Нужно скачать {planned} тайлов (больше {MAX_TILES}); уменьшите --zooms или добавьте --yes")
+        return 1
+
+    started = time.perf_counter()
+    failed = 0
+    for name, bbox in boxes:
+        def progress(done, total):
+            print(f"\r{name}: {done}/{total}", end='', flush=True)
+
+        loaded, errors = prefetch(tiles, bbox, zooms, args.url, args.workers, progress=progress)
+        failed += errors
+        print(f"\r{name}: скачано {loaded}, ошибок {errors}")
+
+    print(f"Готово за {time.perf_counter() - started:.1f} с: {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
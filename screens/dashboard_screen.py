@@ -1,12 +1,7 @@
-import os
 import io
-import sqlite3
-import tempfile
-from collections import Counter
-
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from core.charts import chart_key, get_renderer, render_histogram, render_species_pie
+from core.database import get_connection
+from core.section_stats import AGE_BUCKET, HEIGHT_BUCKET, dashboard_summary
 
 from kivy.app import App
 from kivy.clock import Clock
@@ -28,18 +23,10 @@ from kivymd.uix.dialog import MDDialog, MDDialogHeadlineText, MDDialogSupporting
 from ui_styles import Colors, Spacing
 
 
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['figure.facecolor'] = '#1e1e1e'
-plt.rcParams['axes.facecolor'] = '#2d2d2d'
-plt.rcParams['axes.edgecolor'] = '#555555'
-plt.rcParams['axes.labelcolor'] = '#cccccc'
-plt.rcParams['xtick.color'] = '#cccccc'
-plt.rcParams['ytick.color'] = '#cccccc'
-plt.rcParams['text.color'] = '#ffffff'
-
-
 class ChartWidget(MDBoxLayout):
-    def __init__(self, title, fig, **kwargs):
+    """Заголовок и картинка графика; до готовности — надпись-заглушка"""
+
+    def __init__(self, title, **kwargs):
         super().__init__(orientation='vertical', size_hint_y=None, spacing=Spacing.SM, padding=[Spacing.SM, 0], **kwargs)
 
         self.add_widget(MDLabel(
@@ -48,27 +35,38 @@ class ChartWidget(MDBoxLayout):
             size_hint_y=None, height=dp(24),
         ))
 
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor=fig.get_facecolor())
-        plt.close(fig)
-        buf.seek(0)
+        self.placeholder = MDLabel(
+            text='Строится график…', halign='center',
+            theme_text_color='Hint', size_hint_y=None, height=dp(240),
+        )
+        self.add_widget(self.placeholder)
+        self.height = dp(280)
 
-        img = Image(
-            texture=CoreImage(buf, ext='png').texture,
+    def set_texture(self, texture):
+        if self.placeholder is None:
+            return
+        self.remove_widget(self.placeholder)
+        self.placeholder = None
+        self.add_widget(Image(
+            texture=texture,
             size_hint_y=None,
             height=dp(240),
             allow_stretch=True,
             keep_ratio=True,
-        )
-        self.add_widget(img)
-        self.height = dp(280)
+        ))
+
+    def set_failed(self):
+        if self.placeholder is not None:
+            self.placeholder.text = 'Не удалось построить график'
 
 
 class DashboardScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'dashboard'
-        self.chart_dir = tempfile.mkdtemp(prefix='forestapp_charts_')
+        # Текстуры по ключу chart_key: пока данные не менялись, графики не перерисовываются
+        self.textures = {}
+        self.chart_keys = set()
         Clock.schedule_once(lambda dt: self._build(), 0)
 
     def _build(self):
@@ -106,54 +104,27 @@ class DashboardScreen(MDScreen):
         App.get_running_app().root.current = 'main'
 
     def _gather_stats(self):
+        """Сводка по всей базе из готовых строк molodniki_section_stats"""
         result = {
-            'total_sections': 0, 'total_plots': 0,
-            'total_stock': 0, 'total_area': 0,
+            'total_sections': 0, 'total_plots': 0, 'total_trees': 0,
+            'avg_density_ha': 0.0, 'total_area': 0,
             'species_counts': {}, 'section_list': [],
-            'ages': [], 'heights': [],
+            'age_hist': {}, 'height_hist': {},
         }
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
-
             cursor.execute('SELECT COUNT(*) FROM molodniki_sections WHERE section_number IS NOT NULL AND section_number != ""')
             result['total_sections'] = cursor.fetchone()[0]
-
-            cursor.execute('SELECT DISTINCT section_number FROM molodniki_sections WHERE section_number IS NOT NULL AND section_number != ""')
-            result['section_list'] = [r[0] for r in cursor.fetchall()]
-
             conn.close()
-        except Exception:
-            pass
 
-        try:
-            mol = App.get_running_app().root.get_screen('molodniki')
-            if hasattr(mol, 'calculate_section_totals'):
-                totals = mol.calculate_section_totals()
-                result['total_stock'] = totals.get('total_stock', 0)
-                result['total_area'] = totals.get('total_area', 0)
-                result['total_plots'] = totals.get('total_plots', 0)
-
-                species_summary = totals.get('species_summary', {})
-                for species, data in species_summary.items():
-                    result['species_counts'][species] = data.get('count', data.get('area', 0))
-                    ages = data.get('ages', [])
-                    if ages:
-                        result['ages'].extend(ages)
-                    heights = data.get('heights', [])
-                    if heights:
-                        result['heights'].extend(heights)
-
-            if not result['species_counts'] and hasattr(mol, 'page_data'):
-                for page_rows in mol.page_data.values():
-                    for row in page_rows:
-                        if len(row) >= 2 and row[1]:
-                            species_key = str(row[1]).strip()
-                            if species_key:
-                                result['species_counts'][species_key] = result['species_counts'].get(species_key, 0) + 1
+            summary = dashboard_summary('forest_data.db')
+            result.update({key: summary[key] for key in (
+                'total_plots', 'total_trees', 'avg_density_ha', 'total_area',
+                'species_counts', 'age_hist', 'height_hist')})
+            result['section_list'] = summary['sections']
         except Exception:
             pass
-
         return result
 
     def _make_stats_card(self, stats):
@@ -188,51 +159,60 @@ class DashboardScreen(MDScreen):
         rows.add_widget(stat_item('Участков', stats['total_sections'], Colors.ACCENT))
         rows.add_widget(stat_item('Площадок', stats.get('total_plots', 0), Colors.PRIMARY_LIGHT))
         rows.add_widget(stat_item('Пород', len(stats['species_counts']), Colors.INFO))
-        rows.add_widget(stat_item(f'Запас', f'{stats["total_stock"]:.1f} м³', Colors.SECONDARY_LIGHT))
+        rows.add_widget(stat_item('Густота', f'{stats["avg_density_ha"]:.0f} шт/га', Colors.SECONDARY_LIGHT))
         rows.add_widget(stat_item(f'Площадь', f'{stats["total_area"]:.2f} га', Colors.WARNING))
-        rows.add_widget(stat_item('Секций', len(stats['section_list']), Colors.TEXT_DIM))
+        rows.add_widget(stat_item('С данными', len(stats['section_list']), Colors.TEXT_DIM))
 
         card.add_widget(rows)
         card.height = dp(180)
         return card
 
+    def _chart(self, title, kind, data, render):
+        """Виджет графика; картинка строится в фоне или берётся из кэша"""
+        widget = ChartWidget(title)
+        key = chart_key(kind, data)
+        self.chart_keys.add(key)
+        texture = self.textures.get(key)
+        if texture is not None:
+            widget.set_texture(texture)
+            return widget
+
+        def on_ready(key, png):
+            if png is None:
+                widget.set_failed()
+                return
+            texture = self.textures.get(key)
+            if texture is None:
+                texture = CoreImage(io.BytesIO(png), ext='png').texture
+                self.textures[key] = texture
+            widget.set_texture(texture)
+
+        get_renderer().submit(key, render, on_ready)
+        return widget
+
     def _make_charts(self, stats):
         charts = []
-
-        if stats['species_counts']:
-            fig, ax = plt.subplots(figsize=(4, 3))
-            species = list(stats['species_counts'].keys())
-            counts = list(stats['species_counts'].values())
-            colors = plt.cm.Set3([i/len(species) for i in range(len(species))])
-            wedges, texts, autotexts = ax.pie(
-                counts, labels=None, autopct='%1.0f%%',
-                colors=colors, startangle=90,
-                textprops={'color': 'white', 'fontsize': 8},
-            )
-            if species:
-                ax.legend(wedges, [f'{s} ({c})' for s, c in zip(species, counts)],
-                         loc='lower center', bbox_to_anchor=(0.5, -0.15),
-                         ncol=2, fontsize=7, frameon=False, labelcolor='white')
-            ax.set_title('Распределение пород', color='white', fontsize=11, pad=10)
-            charts.append(ChartWidget('🌳 Распределение по породам', fig))
-
-        if stats['ages']:
-            fig, ax = plt.subplots(figsize=(4, 2.5))
-            ax.hist(stats['ages'], bins=8, color='#4CAF50', edgecolor='white', alpha=0.8)
-            ax.set_xlabel('Возраст, лет', color='#cccccc', fontsize=9)
-            ax.set_ylabel('Количество', color='#cccccc', fontsize=9)
-            ax.set_title('Распределение возрастов', color='white', fontsize=11)
-            ax.tick_params(labelsize=8)
-            charts.append(ChartWidget('📏 Распределение возрастов', fig))
-
-        if stats['heights']:
-            fig, ax = plt.subplots(figsize=(4, 2.5))
-            ax.hist(stats['heights'], bins=8, color='#42A5F5', edgecolor='white', alpha=0.8)
-            ax.set_xlabel('Высота, м', color='#cccccc', fontsize=9)
-            ax.set_ylabel('Количество', color='#cccccc', fontsize=9)
-            ax.set_title('Распределение высот', color='white', fontsize=11)
-            ax.tick_params(labelsize=8)
-            charts.append(ChartWidget('📐 Распределение высот', fig))
+        self.chart_keys = set()
+        species_counts = stats['species_counts']
+        age_hist = stats['age_hist']
+        height_hist = stats['height_hist']
+
+        if species_counts:
+            charts.append(self._chart(
+                '🌳 Распределение по породам', 'species', species_counts,
+                lambda: render_species_pie(species_counts)))
+
+        if age_hist:
+            charts.append(self._chart(
+                '📏 Распределение возрастов', 'age', [age_hist, AGE_BUCKET],
+                lambda: render_histogram(age_hist, AGE_BUCKET, '#4CAF50',
+                                         'Возраст, лет', 'Распределение возрастов')))
+
+        if height_hist:
+            charts.append(self._chart(
+                '📐 Распределение высот', 'height', [height_hist, HEIGHT_BUCKET],
+                lambda: render_histogram(height_hist, HEIGHT_BUCKET, '#42A5F5',
+                                         'Высота, м', 'Распределение высот')))
 
         if not charts:
             no_data = MDBoxLayout(orientation='vertical', size_hint_y=None, height=dp(120))
@@ -242,4 +222,8 @@ class DashboardScreen(MDScreen):
             ))
             charts.append(no_data)
 
+        # Текстуры устаревших данных больше не понадобятся
+        for key in list(self.textures):
+            if key not in self.chart_keys:
+                del self.textures[key]
         return charts
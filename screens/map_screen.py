@@ -1,10 +1,13 @@
 import os
-import sqlite3
-import re
+from core.database import get_connection
+from core.map_points import clusters_in_bbox, count_points, save_section_coords
+from core.plot_geo import nearest_plots, parse_gps
+from core.tile_source import offline_map_source
 
 from kivy.app import App
 from kivy.clock import Clock
 from kivy.metrics import dp
+from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.popup import Popup
@@ -53,20 +56,8 @@ def make_outlined_btn(text, **kwargs):
     return btn
 
 
-COORD_RE = re.compile(r'^(\d{2,3})°(\d{2})′(\d{2})″([NS])\s+(\d{2,3})°(\d{2})′(\d{2})″([EW])$')
-
-
 def parse_coordinates(text):
-    m = COORD_RE.match(text.strip())
-    if not m:
-        return None
-    lat = int(m.group(1)) + int(m.group(2)) / 60 + int(m.group(3)) / 3600
-    if m.group(4) == 'S':
-        lat = -lat
-    lon = int(m.group(5)) + int(m.group(6)) / 60 + int(m.group(7)) / 3600
-    if m.group(8) == 'W':
-        lon = -lon
-    return lat, lon
+    return parse_gps(text)
 
 
 def format_coords(lat, lon):
@@ -80,41 +71,73 @@ def format_coords(lat, lon):
     return f'{dec_to_dms(lat, True)} {dec_to_dms(lon, False)}'
 
 
-MARKER_SOURCE = None
+# Картинки маркеров: вид точки -> (файл, цвет)
+MARKERS = {
+    'section': ('marker.png', (76, 175, 80, 255)),
+    'plot': ('marker_plot.png', (66, 165, 245, 255)),
+}
+MARKER_SOURCES = {}
 
 
-def get_marker_source():
-    global MARKER_SOURCE
-    if MARKER_SOURCE:
-        return MARKER_SOURCE
-    path = 'marker.png'
+def get_marker_source(kind='section'):
+    if kind in MARKER_SOURCES:
+        return MARKER_SOURCES[kind]
+    path, color = MARKERS[kind]
     if os.path.exists(path):
-        MARKER_SOURCE = path
+        MARKER_SOURCES[kind] = path
         return path
     try:
         from PIL import Image, ImageDraw
         img = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
         draw = ImageDraw.Draw(img)
-        draw.ellipse([4, 4, 28, 28], fill=(76, 175, 80, 255))
+        draw.ellipse([4, 4, 28, 28], fill=color)
         draw.ellipse([8, 8, 24, 24], fill=(255, 255, 255, 255))
         img.save(path)
-        MARKER_SOURCE = path
+        MARKER_SOURCES[kind] = path
         return path
     except Exception:
         return ''
 
 
+# Запас вокруг видимой области, доля её размера
+VIEW_MARGIN = 0.25
+REFRESH_DELAY = 0.15
+
+
 class ForestMapMarker(MapMarker):
     def __init__(self, section_number, **kwargs):
         super().__init__(**kwargs)
         self.section_number = section_number
 
 
+class PlotMapMarker(MapMarker):
+    def __init__(self, plot_id, **kwargs):
+        super().__init__(**kwargs)
+        self.plot_id = plot_id
+
+
+class ClusterMarker(MapMarker):
+    """Несколько близких участков; нажатие приближает карту"""
+
+    def __init__(self, count, **kwargs):
+        super().__init__(**kwargs)
+        self.count_label = Label(text=str(count), bold=True, font_size='12sp', color=[0, 0, 0, 1])
+        self.add_widget(self.count_label)
+        self.bind(pos=self._place_label, size=self._place_label)
+
+    def set_count(self, count):
+        self.count_label.text = str(count)
+
+    def _place_label(self, *args):
+        self.count_label.center = self.center
+
+
 class MapScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'map'
-        self.markers = []
+        # Ключ из clusters_in_bbox -> маркер на карте
+        self.markers = {}
         self.default_lat = 55.7558
         self.default_lon = 37.6173
         Clock.schedule_once(lambda dt: self._build(), 0)
@@ -130,16 +153,26 @@ class MapScreen(MDScreen):
             left_action_items=[['arrow-left', lambda x: self._go_back()]],
             right_action_items=[
                 ['plus', lambda x: self._add_coords_dialog()],
+                ['crosshairs-gps', lambda x: self._go_to_nearest_plot()],
                 ['refresh', lambda x: self._refresh_map()],
             ],
         )
         main.add_widget(toolbar)
 
+        map_kwargs = {}
+        # Тайлы из offline_tiles.mbtiles (prefetch_tiles.py), недостающие — из сети
+        source = offline_map_source()
+        if source is not None:
+            map_kwargs['map_source'] = source
         self.mapview = MapView(
             lat=self.default_lat,
             lon=self.default_lon,
             zoom=10,
+            **map_kwargs,
         )
+        self.markers = {}
+        self._refresh_trigger = Clock.create_trigger(lambda dt: self._update_markers(), REFRESH_DELAY)
+        self.mapview.bind(on_map_relocated=lambda *args: self._refresh_trigger())
         main.add_widget(self.mapview)
 
         self.add_widget(main)
@@ -149,54 +182,97 @@ class MapScreen(MDScreen):
         App.get_running_app().root.current = 'main'
 
     def _refresh_map(self):
-        self.mapview.clear_widgets()
-        self.markers.clear()
-
+        self._update_markers()
+        if self.markers:
+            return
         try:
-            conn = sqlite3.connect('forest_data.db')
+            if count_points('forest_data.db'):
+                return
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
-            cursor.execute('SELECT DISTINCT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != ""')
-            sections1 = [(r[0], '', '', '', '') for r in cursor.fetchall()]
-            cursor.execute('SELECT DISTINCT section_number FROM molodniki_sections WHERE section_number IS NOT NULL AND section_number != ""')
-            sections2 = [(r[0], '', '', '', '') for r in cursor.fetchall()]
-            conn.close()
-            seen = set()
-            sections = []
-            for s in sections1 + sections2:
-                if s[0] not in seen:
-                    seen.add(s[0])
-                    sections.append(s)
+            cursor.execute('SELECT 1 FROM sections WHERE section_number IS NOT NULL AND section_number != "" '
+                           'UNION ALL SELECT 1 FROM molodniki_sections '
+                           'WHERE section_number IS NOT NULL AND section_number != "" LIMIT 1')
+            has_sections = cursor.fetchone() is not None
         except Exception:
-            sections = []
-
-        coords_file = 'sections_coords.json'
-        saved_coords = {}
-        if os.path.exists(coords_file):
-            import json
-            try:
-                with open(coords_file, 'r', encoding='utf-8') as f:
-                    saved_coords = json.load(f)
-            except Exception:
-                pass
-
-        source = get_marker_source()
-        for section in sections:
-            section_number = section[0]
-            if section_number in saved_coords:
-                coords = saved_coords[section_number]
-                lat, lon = coords.get('lat'), coords.get('lon')
-                if lat and lon:
-                    marker = ForestMapMarker(
-                        section_number=section_number,
-                        lat=lat, lon=lon,
-                        source=source,
-                    )
-                    self.mapview.add_widget(marker)
-                    self.markers.append(marker)
-
-        if not self.markers and sections:
+            has_sections = False
+        if has_sections:
             self._snack('Нет участков с координатами. Нажмите + чтобы добавить.')
 
+    def _update_markers(self):
+        """Маркеры видимой области: добавить новые, убрать ушедшие, остальные не трогать"""
+        mapview = self.mapview
+        zoom = mapview.zoom
+        south, west, north, east = mapview.get_bbox()
+        lat_pad = (north - south) * VIEW_MARGIN
+        lon_pad = (east - west) * VIEW_MARGIN
+        try:
+            wanted = clusters_in_bbox(south - lat_pad, west - lon_pad, north + lat_pad, east + lon_pad,
+                                      zoom, 'forest_data.db')
+        except Exception:
+            wanted = {}
+
+        for key in list(self.markers):
+            if key not in wanted:
+                mapview.remove_marker(self.markers.pop(key))
+
+        moved = False
+        for key, (lat, lon, count) in wanted.items():
+            marker = self.markers.get(key)
+            if marker is None:
+                if key[0] == 'cluster':
+                    marker = ClusterMarker(count=count, lat=lat, lon=lon, source=get_marker_source())
+                    marker.bind(on_release=self._zoom_to_cluster)
+                elif key[0] == 'plot':
+                    marker = PlotMapMarker(plot_id=key[1], lat=lat, lon=lon, source=get_marker_source('plot'))
+                    marker.bind(on_release=self._show_plot)
+                else:
+                    marker = ForestMapMarker(section_number=key[1], lat=lat, lon=lon, source=get_marker_source())
+                mapview.add_marker(marker)
+                self.markers[key] = marker
+                continue
+            # Центр кластера смещается, когда в запас попадают новые точки
+            if (marker.lat, marker.lon) != (lat, lon):
+                marker.lat, marker.lon = lat, lon
+                moved = True
+            if key[0] == 'cluster':
+                marker.set_count(count)
+        if moved:
+            mapview.trigger_update(True)
+
+    def _zoom_to_cluster(self, marker):
+        self.mapview.center_on(marker.lat, marker.lon)
+        self.mapview.zoom = min(self.mapview.zoom + 2, self.mapview.map_source.get_max_zoom())
+
+    def _show_plot(self, marker):
+        try:
+            cursor = get_connection('forest_data.db').cursor()
+            cursor.execute('SELECT section_name, page_number, row_index, nn, gps_point FROM molodniki_data WHERE id = ?',
+                           (marker.plot_id,))
+            row = cursor.fetchone()
+        except Exception:
+            row = None
+        if row:
+            section, page, row_index, nn, gps = row
+            self._snack(f'Участок {section}, стр. {page}, площадка {nn or row_index + 1}: {gps}')
+
+    def _go_to_nearest_plot(self):
+        """Ближайшая к центру карты площадка без пород"""
+        lat, lon = self.mapview.lat, self.mapview.lon
+        try:
+            found = nearest_plots(lat, lon, k=1, unfinished=True, db_path='forest_data.db')
+        except Exception:
+            found = []
+        if not found:
+            self._snack('Нет незаполненных площадок с координатами')
+            return
+        plot = found[0]
+        self._center_on(plot['lat'], plot['lon'])
+        distance = plot['distance_m']
+        distance_text = f'{distance / 1000:.1f} км' if distance >= 1000 else f'{distance:.0f} м'
+        self._snack(f"Участок {plot['section_name']}, площадка {plot['nn'] or plot['row_index'] + 1}: "
+                    f"{distance_text} от центра карты")
+
     def _snack(self, message):
         snack = MDSnackbar(duration=2.5)
         snack.add_widget(MDSnackbarText(text=message))
@@ -211,7 +287,7 @@ class MapScreen(MDScreen):
         ))
 
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT DISTINCT section_number FROM sections WHERE section_number IS NOT NULL AND section_number != ""')
             s1 = [r[0] for r in cursor.fetchall()]
@@ -270,19 +346,11 @@ class MapScreen(MDScreen):
                 self._snack('Некорректные координаты')
                 return
 
-            import json
-            coords_file = 'sections_coords.json'
-            saved = {}
-            if os.path.exists(coords_file):
-                try:
-                    with open(coords_file, 'r', encoding='utf-8') as f:
-                        saved = json.load(f)
-                except Exception:
-                    pass
-
-            saved[section] = {'lat': lat, 'lon': lon, 'label': section}
-            with open(coords_file, 'w', encoding='utf-8') as f:
-                json.dump(saved, f, ensure_ascii=False, indent=2)
+            try:
+                save_section_coords(section, lat, lon, db_path='forest_data.db')
+            except Exception as e:
+                self._snack(f'Не удалось сохранить координаты: {e}')
+                return
 
             dialog.dismiss()
             Clock.schedule_once(lambda dt: self._refresh_map(), 0)
@@ -11,11 +11,13 @@ from kivy.metrics import dp
 from kivy.utils import get_color_from_hex
 from kivy.animation import Animation
 from kivy.core.text import LabelBase
+from kivy.factory import Factory
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recyclegridlayout import RecycleGridLayout
 
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.gridlayout import MDGridLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.button import MDButton, MDButtonText, MDIconButton
@@ -31,33 +33,151 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.menu import MDDropdownMenu
 from kivymd.uix.appbar import MDTopAppBar, MDTopAppBarLeadingButtonContainer, MDTopAppBarTrailingButtonContainer, MDTopAppBarTitle, MDActionTopAppBarButton
 
-import sqlite3
-import pandas as pd
+from core.database import get_connection
+from core.migrations import migrate
+from core.suggestions import get_index
+from core.lazy import lazy_import
 import os
 import datetime
 import json
 import glob
-import openpyxl
-from openpyxl import Workbook
-from openpyxl import styles
 
 from ui_styles import Colors, Spacing, Fonts
 
+# Нужны только при экспорте/загрузке файлов
+pd = lazy_import('pandas')
+openpyxl = lazy_import('openpyxl')
 
-class ModernTableTextInput(MDTextField):
-    """Современное текстовое поле для таблицы"""
+
+COLUMN_COUNT = 9
+CELL_WIDTH = dp(110)
+CELL_HEIGHT = dp(34)
+COLUMN_HINTS = ['', 'Порода', 'ж/ф', 'шт/лет', 'D, см', 'H, м', 'Сост.', 'Модель', 'Прим.']
+COLUMN_FILTERS = {0: 'int', 4: 'float', 5: 'float'}
+
+
+class ModernTableTextInput(RecycleDataViewBehavior, MDTextField):
+    """Современное текстовое поле для таблицы (ячейка переиспользуемой сетки)"""
     row_index = NumericProperty(0)
     col_index = NumericProperty(0)
-    next_widget = ObjectProperty(None)
-    prev_widget = ObjectProperty(None)
+    table_screen = ObjectProperty(None)
 
     def __init__(self, **kwargs):
+        self._refreshing = False
+        kwargs.setdefault('multiline', False)
+        kwargs.setdefault('mode', 'outlined')
+        kwargs.setdefault('font_size', Fonts.BODY_XS)
         super().__init__(**kwargs)
-        self.bind(on_text_validate=self.on_enter)
+        self.bind(on_text_validate=self.on_enter, text=self.on_cell_text)
+
+    def refresh_view_attrs(self, rv, index, data):
+        # Поле переиспользуется для другой ячейки — фокус и ввод к ней не относятся
+        self._refreshing = True
+        self.focus = False
+        super().refresh_view_attrs(rv, index, data)
+        self._refreshing = False
+
+    def on_cell_text(self, instance, value):
+        if not self._refreshing and self.table_screen:
+            self.table_screen.set_cell(self.row_index, self.col_index, value)
 
     def on_enter(self, instance=None):
-        if instance and self.next_widget:
-            self.next_widget.focus = True
+        if instance and self.table_screen:
+            self.table_screen.focus_next_cell(self.row_index, self.col_index, 1)
+
+    def keyboard_on_key_down(self, window, keycode, text, modifiers):
+        key = keycode[1]
+        if self.table_screen and key in ('up', 'down'):
+            step = -1 if key == 'up' else 1
+            self.table_screen.focus_cell(self.row_index + step, self.col_index)
+            return True
+        if self.table_screen and key == 'tab':
+            step = -1 if 'shift' in modifiers else 1
+            self.table_screen.focus_next_cell(self.row_index, self.col_index, step)
+            return True
+        return super().keyboard_on_key_down(window, keycode, text, modifiers)
+
+
+class TableHeaderCell(RecycleDataViewBehavior, MDCard):
+    """Заголовок столбца в первой строке сетки"""
+    text = StringProperty('')
+    col_index = NumericProperty(0)
+    table_screen = ObjectProperty(None)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.label = MDLabel(
+            text=self.text,
+            font_style='Label', role='small',
+            theme_text_color='Custom',
+            text_color=Colors.TEXT_ON_PRIMARY,
+            bold=True,
+            halign='center',
+            valign='middle',
+            size_hint_y=None,
+            height=CELL_HEIGHT
+        )
+        self.bind(text=self.label.setter('text'))
+        self.add_widget(self.label)
+
+    def on_release(self, *args):
+        if self.table_screen:
+            self.table_screen.edit_column_name(self.col_index)
+
+
+Factory.register('ModernTableTextInput', cls=ModernTableTextInput)
+Factory.register('TableHeaderCell', cls=TableHeaderCell)
+
+
+class TableGrid(RecycleView):
+    """Виртуализированная сетка: виджеты создаются только для видимых ячеек"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layout = RecycleGridLayout(
+            cols=COLUMN_COUNT,
+            default_size=(CELL_WIDTH, CELL_HEIGHT),
+            default_size_hint=(None, None),
+            size_hint=(None, None),
+            spacing=dp(1),
+            padding=[Spacing.SM, 0],
+        )
+        self.layout.bind(
+            minimum_height=self.layout.setter('height'),
+            minimum_width=self.layout.setter('width')
+        )
+        self.add_widget(self.layout)
+        # viewclass применяется только при готовом layout_manager; заголовки и
+        # ячейки — разные классы, поэтому каждый элемент указывает свой
+        self.key_viewclass = 'viewclass'
+        self.viewclass = 'ModernTableTextInput'
+
+    def scroll_to_index(self, index):
+        """Прокрутить так, чтобы элемент index оказался в видимой области"""
+        layout = self.layout
+        row, col = divmod(index, COLUMN_COUNT)
+        spacing = dp(1)
+        top = row * (CELL_HEIGHT + spacing)
+        left = layout.padding[0] + col * (CELL_WIDTH + spacing)
+
+        scrollable_y = layout.height - self.height
+        if scrollable_y > 0:
+            view_top = (1 - self.scroll_y) * scrollable_y
+            if top < view_top:
+                self.scroll_y = 1 - top / scrollable_y
+            elif top + CELL_HEIGHT > view_top + self.height:
+                self.scroll_y = max(0, 1 - (top + CELL_HEIGHT - self.height) / scrollable_y)
+
+        scrollable_x = layout.width - self.width
+        if scrollable_x > 0:
+            view_left = self.scroll_x * scrollable_x
+            if left < view_left:
+                self.scroll_x = left / scrollable_x
+            elif left + CELL_WIDTH > view_left + self.width:
+                self.scroll_x = min(1, (left + CELL_WIDTH - self.width) / scrollable_x)
+
+    def visible_view(self, index):
+        return self.view_adapter.get_visible_view(index)
 
 
 class TableScreen(MDScreen):
@@ -68,7 +188,6 @@ class TableScreen(MDScreen):
     rows_per_page = NumericProperty(50)
     page_data = {}
     column_names = ListProperty([])
-    inputs = []
 
     def _snack(self, message, duration=2.5):
         snack = MDSnackbar(duration=duration)
@@ -88,7 +207,6 @@ class TableScreen(MDScreen):
         ]
         self.column_names = self.default_column_names.copy()
         self.page_data = {}
-        self.inputs = []
         self._edit_mode = False
 
         self.load_column_config()
@@ -111,27 +229,7 @@ class TableScreen(MDScreen):
             json.dump({'column_names': self.column_names}, f, ensure_ascii=False, indent=4)
 
     def setup_database(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS trees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tree_number INTEGER, species TEXT, age TEXT, count TEXT,
-            diameter REAL, height REAL, condition TEXT, model TEXT, notes TEXT,
-            section_id INTEGER, FOREIGN KEY(section_id) REFERENCES sections(id))
-        ''')
-        cursor.execute('''CREATE TABLE IF NOT EXISTS sections (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            section_number TEXT UNIQUE, quarter TEXT, plot TEXT,
-            forestry TEXT, district_forestry TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
-        ''')
-        cursor.execute('''CREATE TABLE IF NOT EXISTS suggestions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            column_index INTEGER, value TEXT, UNIQUE(column_index, value))
-        ''')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestions ON suggestions (column_index, value)')
-        conn.commit()
-        conn.close()
+        migrate(self.db_name)
 
     def create_ui(self):
         self.clear_widgets()
@@ -190,45 +288,10 @@ class TableScreen(MDScreen):
         pagination = self._create_pagination()
         main_layout.add_widget(pagination)
 
-        # Таблица
-        scroll = MDScrollView(do_scroll_x=True, do_scroll_y=True, bar_width=dp(6))
-        self.table = MDGridLayout(cols=9, size_hint=(None, None), spacing=dp(1),
-                                   padding=[Spacing.SM, 0])
-        self.table.bind(
-            minimum_height=self.table.setter('height'),
-            minimum_width=self.table.setter('width')
-        )
-
-        # Заголовки таблицы
-        header_colors = [Colors.PRIMARY_DIM if i == 4 else Colors.PRIMARY for i in range(9)]
-        for i, column_name in enumerate(self.column_names):
-            header = MDCard(
-                size_hint_y=None, height=dp(36),
-                size_hint_x=None, width=dp(110),
-                md_bg_color=header_colors[min(i, len(header_colors)-1)],
-                radius=[Spacing.RADIUS_XS],
-                padding=[Spacing.XS, 0],
-                orientation='vertical',
-                on_release=lambda x, idx=i: self.edit_column_name(idx)
-            )
-            header_text = MDLabel(
-                text=column_name,
-                font_style='Label', role='small',
-                theme_text_color='Custom',
-                text_color=Colors.TEXT_ON_PRIMARY,
-                bold=True,
-                halign='center',
-                valign='middle',
-                size_hint_y=None,
-                height=dp(36)
-            )
-            header.add_widget(header_text)
-            self.table.add_widget(header)
-
-        # Строки таблицы
-        self.create_table_rows()
-        scroll.add_widget(self.table)
-        main_layout.add_widget(scroll)
+        # Таблица: заголовки и строки текущей страницы в одной виртуализированной сетке
+        self.table = TableGrid(do_scroll_x=True, do_scroll_y=True, bar_width=dp(6))
+        self.load_page_data()
+        main_layout.add_widget(self.table)
 
         # Нижняя панель действий
         bottom_bar = MDBoxLayout(
@@ -309,43 +372,76 @@ class TableScreen(MDScreen):
         layout.add_widget(next_btn)
         return layout
 
-    def create_table_rows(self):
-        self.inputs = []
+    def _header_data(self):
+        header_colors = [Colors.PRIMARY_DIM if i == 4 else Colors.PRIMARY for i in range(COLUMN_COUNT)]
+        # Заголовков всегда COLUMN_COUNT, иначе сместятся индексы ячеек
+        column_names = (list(self.column_names) + [''] * COLUMN_COUNT)[:COLUMN_COUNT]
+        return [{
+            'viewclass': 'TableHeaderCell',
+            'text': column_name,
+            'col_index': i,
+            'table_screen': self,
+            'md_bg_color': header_colors[i],
+            'radius': [Spacing.RADIUS_XS],
+            'padding': [Spacing.XS, 0],
+            'orientation': 'vertical',
+        } for i, column_name in enumerate(column_names)]
+
+    def _page_rows(self):
+        """Строки текущей страницы, приведённые к rows_per_page × 9 строковых ячеек"""
+        rows = self.page_data.get(self.current_page, [])
+        page_rows = []
         for row_idx in range(self.rows_per_page):
-            row = []
-            for col_idx in range(9):
-                inp = ModernTableTextInput(
-                    multiline=False,
-                    size_hint_y=None,
-                    height=dp(34),
-                    size_hint_x=None,
-                    width=dp(110),
-                    mode='outlined',
-                    row_index=row_idx,
-                    col_index=col_idx,
-                    hint_text='' if col_idx == 0 else (['№', 'Порода', 'ж/ф', 'шт/лет', 'D, см', 'H, м', 'Сост.', 'Модель', 'Прим.'][col_idx]),
-                    font_size=Fonts.BODY_XS,
-                )
-                if col_idx == 0:
-                    inp.input_filter = 'int'
-                elif col_idx in (4, 5):
-                    inp.input_filter = 'float'
-
-                if row:
-                    inp.prev_widget = row[col_idx - 1]
-                    row[col_idx - 1].next_widget = inp
-                if row_idx > 0 and col_idx < len(self.inputs[row_idx - 1]):
-                    inp.up_widget = self.inputs[row_idx - 1][col_idx]
-                    self.inputs[row_idx - 1][col_idx].down_widget = inp
-
-                inp.bind(on_text_validate=self.navigate_on_enter)
-                row.append(inp)
-                self.table.add_widget(inp)
-            self.inputs.append(row)
-
-    def navigate_on_enter(self, instance):
-        if hasattr(instance, 'next_widget') and instance.next_widget:
-            instance.next_widget.focus = True
+            row = rows[row_idx] if row_idx < len(rows) else []
+            page_rows.append([str(row[col_idx]) if col_idx < len(row) else ''
+                              for col_idx in range(COLUMN_COUNT)])
+        self.page_data[self.current_page] = page_rows
+        return page_rows
+
+    def create_table_rows(self):
+        """Данные ячеек сетки; поля ввода создаёт RecycleView только для видимых"""
+        data = self._header_data()
+        for row_idx, row in enumerate(self._page_rows()):
+            for col_idx, value in enumerate(row):
+                data.append({
+                    'viewclass': 'ModernTableTextInput',
+                    'text': value,
+                    'row_index': row_idx,
+                    'col_index': col_idx,
+                    'table_screen': self,
+                    'hint_text': COLUMN_HINTS[col_idx],
+                    'input_filter': COLUMN_FILTERS.get(col_idx),
+                })
+        self.table.data = data
+
+    def _cell_index(self, row_idx, col_idx):
+        # Первая строка сетки — заголовки
+        return (row_idx + 1) * COLUMN_COUNT + col_idx
+
+    def set_cell(self, row_idx, col_idx, value):
+        """Записать значение ячейки прямо в page_data текущей страницы"""
+        rows = self.page_data.get(self.current_page)
+        if rows is None or not 0 <= row_idx < len(rows) or not 0 <= col_idx < COLUMN_COUNT:
+            return
+        rows[row_idx][col_idx] = value
+        item = self.table.data[self._cell_index(row_idx, col_idx)]
+        item['text'] = value
+
+    def focus_cell(self, row_idx, col_idx):
+        if not (0 <= row_idx < self.rows_per_page and 0 <= col_idx < COLUMN_COUNT):
+            return
+        index = self._cell_index(row_idx, col_idx)
+        self.table.scroll_to_index(index)
+
+        def _focus(dt):
+            view = self.table.visible_view(index)
+            if view is not None:
+                view.focus = True
+        Clock.schedule_once(_focus, 0)
+
+    def focus_next_cell(self, row_idx, col_idx, step):
+        row_idx, col_idx = divmod(row_idx * COLUMN_COUNT + col_idx + step, COLUMN_COUNT)
+        self.focus_cell(row_idx, col_idx)
 
     def change_page(self, direction):
         self.save_current_page()
@@ -360,24 +456,12 @@ class TableScreen(MDScreen):
         self.page_label.text = f'Стр. {self.current_page + 1} из {self.total_pages}'
 
     def load_page_data(self):
-        if self.current_page in self.page_data:
-            page_data = self.page_data[self.current_page]
-            for row_idx, row in enumerate(self.inputs):
-                if row_idx < len(page_data):
-                    for col_idx, cell in enumerate(row):
-                        if col_idx < len(page_data[row_idx]):
-                            cell.text = str(page_data[row_idx][col_idx])
-                        else:
-                            cell.text = ''
-                else:
-                    for cell in row:
-                        cell.text = ''
+        if hasattr(self, 'table'):
+            self.create_table_rows()
 
     def save_current_page(self, instance=None):
-        page_data = []
-        for row in self.inputs:
-            page_data.append([inp.text for inp in row])
-        self.page_data[self.current_page] = page_data
+        # Ячейки пишут в page_data при вводе; здесь только выравниваем страницу
+        self._page_rows()
         if instance:
             self._snack('✅ Страница сохранена!', duration=2)
 
@@ -446,7 +530,7 @@ class TableScreen(MDScreen):
         try:
             filename = f'Перечетная_ведомость_{self.current_section}_{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")}.xlsx'
             full_path = os.path.join(self.reports_dir, filename)
-            wb = Workbook()
+            wb = openpyxl.Workbook()
             ws = wb.active
             ws.title = 'Перечетная ведомость'
             ws['A1'] = f'ПЕРЕЧЕТНАЯ ВЕДОМОСТЬ - УЧАСТОК {self.current_section}'
@@ -565,7 +649,7 @@ class TableScreen(MDScreen):
 
     def load_section(self, instance):
         try:
-            conn = sqlite3.connect('forest_data.db')
+            conn = get_connection('forest_data.db')
             cursor = conn.cursor()
             cursor.execute('SELECT section_number FROM sections WHERE section_number IS NOT NULL ORDER BY id DESC')
             sections = cursor.fetchall()
@@ -629,11 +713,9 @@ class TableScreen(MDScreen):
 
     def clear_data(self, instance=None):
         self.page_data.clear()
-        for row in self.inputs:
-            for cell in row:
-                cell.text = ''
         self.current_page = 0
         self.total_pages = 1
+        self.load_page_data()
         self._update_pagination()
         if instance:
             self.confirm_dialog.dismiss()
@@ -644,7 +726,7 @@ class TableScreen(MDScreen):
 
     def _get_address_info(self):
         try:
-            conn = sqlite3.connect(self.db_name)
+            conn = get_connection(self.db_name)
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT quarter, plot, forestry, district_forestry
@@ -835,13 +917,13 @@ class TableScreen(MDScreen):
 
     def auto_fill_numbers(self, instance=None):
         count = 0
-        for row_idx, row in enumerate(self.inputs):
-            current_val = row[0].text.strip()
-            if not current_val:
+        for row_idx, row in enumerate(self._page_rows()):
+            if not row[0].strip():
                 tree_num = self.current_page * self.rows_per_page + row_idx + 1
-                row[0].text = str(tree_num)
+                row[0] = str(tree_num)
                 count += 1
         if count > 0:
+            self.load_page_data()
             self._snack(f'✅ Добавлено номеров: {count}', duration=2)
         else:
             self._snack('ℹ️ Все строки уже пронумерованы', duration=2)
@@ -850,17 +932,7 @@ class TableScreen(MDScreen):
         pass
 
     def save_suggestion(self, col_index, value):
-        try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO suggestions (column_index, value)
-                VALUES (?, ?)
-            ''', (col_index, value))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error saving suggestion: {e}")
+        get_index('suggestions').add(col_index, value)
 
     def validate_page_data(self):
         warnings = []